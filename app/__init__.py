@@ -2,9 +2,10 @@
 Application Factory Pattern
 Khởi tạo Flask app với các extensions và blueprints
 """
+import click
 from flask import Flask
 from config import config
-from app.extensions import db, migrate
+from app.extensions import db, init_migrate
 
 
 def create_app(config_name: str = 'default') -> Flask:
@@ -24,14 +25,57 @@ def create_app(config_name: str = 'default') -> Flask:
     
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
+    if click.get_current_context(silent=True) is not None:
+        # Chạy qua Flask CLI (flask db ..., flask run): mới cần Flask-Migrate / alembic
+        init_migrate(app)
+    from app import models  # noqa: F401 - đăng ký các bảng với SQLAlchemy
+    
+    # Dataset cache dùng chung cho các service
+    from app.services.dataset_cache import dataset_cache
+    from app.services.snapshot import snapshots
+    from app.services.dataset_store import dataset_store
+    from app.services.rollups import rollups
+    from app.services.chart_cache import chart_cache
+    from app.services.chart_export import chart_exporter
+    from app.services.ingest import ingest
+    from app.services.live_updates import live_feed
+    from app.services.load_pool import load_pool
+    from app.services.precompute import precompute
+    from app.services.profiler import profiler
+    from app.services.timing import timings
+    from app.services.visualizer import VisualizerService
+    timings.init_app(app)
+    profiler.init_app(app)
+    dataset_cache.init_app(app)
+    snapshots.init_app(app)
+    dataset_store.init_app(app)
+    rollups.init_app(app)
+    chart_cache.init_app(app)
+    chart_exporter.init_app(app)
+    ingest.init_app(app)
+    load_pool.init_app(app)
+    VisualizerService.init_app(app)
+    precompute.init_app(app)
+    live_feed.init_app(app)
+    
+    # CLI commands (flask snapshot, ...)
+    from app.commands import register_commands
+    register_commands(app)
     
     # Register blueprints
     from app.routes.admin import admin_bp
+    from app.routes.assets import assets_bp
+    from app.routes.metrics import metrics_bp
+    from app.routes.profiling import profiling_bp
     app.register_blueprint(admin_bp)
+    app.register_blueprint(assets_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(profiling_bp)
     
-    # Create database tables (trong development)
-    with app.app_context():
-        db.create_all()
+    # Tạo bảng khi khởi động chỉ trong development / testing;
+    # production tạo schema bằng `flask init-db` hoặc `flask db upgrade`
+    if app.config.get('AUTO_CREATE_TABLES', False):
+        with app.app_context():
+            db.create_all()
     
     return app
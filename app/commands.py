@@ -0,0 +1,207 @@
+"""
+Flask CLI commands
+Đăng ký trong create_app, chạy bằng: flask --app run <command>
+"""
+import os
+
+import click
+from flask import Flask, current_app
+
+
+@click.command('snapshot')
+@click.option('--force', is_flag=True, help='Tạo lại snapshot kể cả khi còn mới')
+def snapshot_command(force: bool) -> None:
+    """Chuyển các file CSV đã cấu hình sang snapshot Arrow"""
+    from app.services.data_analysis import configured_paths
+    from app.services.snapshot import snapshots
+
+    if not snapshots.available:
+        raise click.ClickException("pyarrow chưa được cài đặt - không thể tạo snapshot")
+
+    for result in snapshots.convert_all(configured_paths(current_app.config), force=force):
+        click.echo(f"{result['table']:<15} {result['status']:<10} {result['csv']} -> {result['snapshot']}")
+
+
+@click.command('publish-datasets')
+@click.option('--force', is_flag=True, help='Build lại kể cả khi phiên bản trong store còn mới')
+def publish_datasets_command(force: bool) -> None:
+    """Parse các bảng vào dataset store dùng chung giữa các worker (chạy khi deploy)"""
+    from app.services.data_analysis import configured_paths
+    from app.services.dataset_store import MANIFEST_NAME, dataset_store
+
+    if not dataset_store.available:
+        raise click.ClickException("pyarrow chưa được cài đặt - không thể dùng dataset store")
+
+    for result in dataset_store.convert_all(configured_paths(current_app.config), force=force):
+        click.echo(f"{result['table']:<15} {result['status']:<10} {result['csv']} -> {result['snapshot']}")
+    click.echo(f"manifest: {os.path.join(dataset_store.snapshot_dir, MANIFEST_NAME)}")
+
+
+@click.command('export-charts')
+@click.option('--format', 'fmt', type=click.Choice(['png', 'svg']), default='png', show_default=True)
+@click.option('--out', 'out_dir', type=click.Path(file_okay=False), default='chart_exports', show_default=True,
+              help='Thư mục ghi ảnh')
+@click.option('--chart', 'charts', multiple=True,
+              help='Chỉ xuất biểu đồ này (revenue-over-time, orders-per-day, top-products, revenue-by; lặp lại được)')
+@click.option('--width', type=int, default=None, help='Chiều rộng (px, mặc định EXPORT_WIDTH)')
+@click.option('--height', type=int, default=None, help='Chiều cao (px, mặc định theo biểu đồ)')
+@click.option('--scale', type=float, default=1.0, show_default=True, help='Hệ số phóng của PNG')
+def export_charts_command(fmt: str, out_dir: str, charts: tuple, width: int, height: int, scale: float) -> None:
+    """Xuất các biểu đồ dashboard thành ảnh (pool kaleido, dùng lại ảnh đã cache)"""
+    from app.services.chart_export import chart_exporter
+    from app.services.dashboard import PAYLOAD_BUILDERS, build_payload, default_payload_keys
+    from app.services.data_analysis import analysis_service, configured_paths
+    from app.services.dimensions import DIMENSIONS
+
+    if not chart_exporter.available:
+        raise click.ClickException("kaleido chưa được cài đặt (hoặc EXPORT_WORKERS = 0) - không thể xuất ảnh")
+    unknown = set(charts) - (set(PAYLOAD_BUILDERS) - {'kpis'})
+    if unknown:
+        raise click.BadParameter(f"Biểu đồ không hỗ trợ: {', '.join(sorted(unknown))}", param_hint='--chart')
+
+    paths = configured_paths(current_app.config)
+    keys = default_payload_keys([name for name, spec in DIMENSIONS.items() if os.path.exists(paths[spec.table])])
+    keys = [key for key in keys if key[0] != 'kpis' and (not charts or key[0] in charts)]
+
+    # Gửi từng biểu đồ vào pool ngay khi có payload: tính payload kế tiếp trong lúc kaleido render
+    service = analysis_service(current_app.config)
+    futures = {}
+    for key in keys:
+        name, params = key
+        filename = '-'.join([name] + [str(value) for _, value in params]) + f'.{fmt}'
+        futures[filename] = chart_exporter.submit(build_payload(service, key)['chart'], fmt, width, height, scale)
+
+    os.makedirs(out_dir, exist_ok=True)
+    try:
+        for filename, future in futures.items():
+            data = future.result()
+            with open(os.path.join(out_dir, filename), 'wb') as f:
+                f.write(data)
+            click.echo(f"{filename:<32} {len(data):>10,} bytes")
+    finally:
+        chart_exporter.shutdown()
+    stats = chart_exporter.stats()
+    click.echo(f"{len(futures)} ảnh -> {out_dir} (render {stats['renders']}, cache {stats['hits']})")
+
+
+@click.command('init-db')
+def init_db_command() -> None:
+    """Tạo các bảng còn thiếu trong database (db.create_all)"""
+    from app.extensions import db
+
+    db.create_all()
+    click.echo(f"Đã tạo bảng: {', '.join(sorted(db.metadata.tables))}")
+
+
+@click.command('import-csv')
+@click.option('--table', 'tables', multiple=True, help='Chỉ nạp bảng này (lặp lại được)')
+@click.option('--batch-size', type=int, default=None, help='Số dòng mỗi lần INSERT')
+@click.option('--replace', is_flag=True, help='Xoá dữ liệu cũ của bảng trước khi nạp')
+def import_csv_command(tables: tuple, batch_size: int, replace: bool) -> None:
+    """Nạp các file CSV đã cấu hình vào database (INSERT theo lô)"""
+    from sqlalchemy.exc import IntegrityError
+    from app.extensions import db
+    from app.services.csv_import import IMPORT_MODELS, import_all
+    from app.services.data_analysis import configured_paths
+
+    unknown = set(tables) - set(IMPORT_MODELS)
+    if unknown:
+        raise click.BadParameter(f"Bảng không hỗ trợ: {', '.join(sorted(unknown))}", param_hint='--table')
+
+    db.create_all()
+    batch_size = batch_size or int(current_app.config.get('IMPORT_BATCH_SIZE', 5000))
+    try:
+        results = import_all(configured_paths(current_app.config), batch_size, replace, list(tables) or None)
+    except IntegrityError as e:
+        raise click.ClickException(f"Dữ liệu đã tồn tại, chạy lại với --replace ({e.orig})")
+    for result in results:
+        click.echo(f"{result['table']:<15} {result['status']:<10} {result['rows']:>10} rows  {result['csv']}")
+
+
+@click.command('memory-report')
+@click.option('--columns', is_flag=True, help='In chi tiết từng cột')
+@click.option('--baseline', is_flag=True, help='So sánh với pd.read_csv mặc định (không schema)')
+def memory_report_command(columns: bool, baseline: bool) -> None:
+    """Bộ nhớ của từng bảng khi load theo schema"""
+    import pandas as pd
+    from app.services.data_analysis import DataAnalysisService, configured_paths
+    from app.services.schema import memory_usage
+
+    paths = configured_paths(current_app.config)
+    service = DataAnalysisService.from_config(current_app.config)
+    for table, usage in service.memory_report().items():
+        line = (f"{table:<15} {usage['rows']:>10} rows  {usage['bytes'] / 2**20:>9.2f} MiB"
+                f"  {usage['bytes_per_row']:>8.1f} B/row")
+        if baseline:
+            default = memory_usage(pd.read_csv(paths[table]))['bytes']
+            ratio = default / usage['bytes'] if usage['bytes'] else 0.0
+            line += f"  (mặc định {default / 2**20:.2f} MiB, x{ratio:.1f})"
+        click.echo(line)
+        if columns:
+            for column, (dtype, nbytes) in usage['columns'].items():
+                click.echo(f"    {column:<15} {dtype:<16} {nbytes / 2**20:>9.2f} MiB")
+
+
+@click.command('profile-token')
+@click.option('--ttl', type=click.IntRange(1), default=3600, show_default=True, help='Thời gian hiệu lực (giây)')
+def profile_token_command(ttl: int) -> None:
+    """Tạo token cho ?_profile= và /profile/sample (ký bằng SECRET_KEY)"""
+    from app.services.profiler import ProfilerError, profiler
+
+    try:
+        click.echo(profiler.create_token(ttl))
+    except ProfilerError as e:
+        raise click.ClickException(str(e))
+
+
+@click.command('startup-report')
+@click.option('--config', 'config_name', default=None,
+              help='Config truyền cho create_app (mặc định FLASK_ENV hoặc development)')
+@click.option('--top', type=click.IntRange(1), default=15, show_default=True, help='Số package / module in ra')
+@click.option('--budget-ms', type=float, default=None, help='Ngân sách khởi động (mặc định STARTUP_BUDGET_MS)')
+def startup_report_command(config_name: str, top: int, budget_ms: float) -> None:
+    """Thời gian import + create_app theo package / module (exit 1 nếu vượt ngân sách)"""
+    from app.services.startup import startup_report
+
+    config_name = config_name or os.environ.get('FLASK_ENV') or 'development'
+    if budget_ms is None:
+        budget_ms = float(current_app.config.get('STARTUP_BUDGET_MS', 1500))
+    try:
+        report = startup_report(config_name, budget_ms)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    total_self = sum(entry['self_ms'] for entry in report['packages'].values()) or 1.0
+    click.echo("Package (self, gộp mọi module con)      ms      %  modules")
+    for package, entry in list(report['packages'].items())[:top]:
+        click.echo(f"  {package:<32} {entry['self_ms']:>8.1f} {entry['self_ms'] / total_self * 100:>6.1f}"
+                   f"  {int(entry['modules']):>7}")
+
+    click.echo("Module của app (cumulative: gồm các import bên trong)     ms")
+    own = sorted((r for r in report['records'] if r.package == 'app'), key=lambda r: -r.cumulative_us)
+    for record in own[:top]:
+        click.echo(f"  {record.module:<48} {record.cumulative_us / 1000:>8.1f}")
+
+    status = 'VƯỢT' if report['over_budget'] else 'OK'
+    click.echo(f"import app {report['import_ms']:.0f} ms + create_app('{config_name}') "
+               f"{report['create_app_ms']:.0f} ms = {report['total_ms']:.0f} ms"
+               f" / ngân sách {budget_ms:.0f} ms [{status}]  (cả process {report['process_ms']:.0f} ms)")
+    if report['over_budget']:
+        raise SystemExit(1)
+
+
+def register_commands(app: Flask) -> None:
+    """
+    Đăng ký các CLI command vào app
+
+    Args:
+        app: Flask application
+    """
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(snapshot_command)
+    app.cli.add_command(publish_datasets_command)
+    app.cli.add_command(export_charts_command)
+    app.cli.add_command(import_csv_command)
+    app.cli.add_command(memory_report_command)
+    app.cli.add_command(profile_token_command)
+    app.cli.add_command(startup_report_command)
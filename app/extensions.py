@@ -3,8 +3,20 @@ Flask extensions initialization
 Tất cả extensions được khởi tạo ở đây và import vào __init__.py
 """
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 
 # Initialize extensions (chưa bind vào app)
 db = SQLAlchemy()
-migrate = Migrate()
+
+
+def init_migrate(app) -> None:
+    """
+    Gắn Flask-Migrate vào app (lệnh `flask db ...`)
+
+    Import Flask-Migrate kéo theo alembic (~0.2 s) nên chỉ gọi khi app được tạo
+    bởi Flask CLI; web worker không cần migration.
+
+    Args:
+        app: Flask application
+    """
+    from flask_migrate import Migrate
+    Migrate(app, db)
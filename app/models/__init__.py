@@ -1 +1,11 @@
-# Placeholder để Python nhận diện thư mục là package
+"""
+Database models
+Import tất cả model ở đây để db.create_all / Flask-Migrate nhận diện được bảng
+"""
+from app.models.category import Category
+from app.models.order import Order, OrderDetail
+from app.models.product import Product
+from app.models.supplier import Supplier
+from app.models.user import User
+
+__all__ = ['Category', 'Order', 'OrderDetail', 'Product', 'Supplier', 'User']
@@ -0,0 +1,24 @@
+"""
+Category model - Danh mục sản phẩm
+"""
+from app.extensions import db
+
+
+class Category(db.Model):
+    """Model cho bảng categories"""
+    __tablename__ = 'categories'
+    
+    category_id: str = db.Column(db.String(20), primary_key=True)
+    category_name: str = db.Column(db.String(100), nullable=False)
+    description: str = db.Column(db.Text)
+    
+    def __repr__(self) -> str:
+        return f'<Category {self.category_name}>'
+    
+    def to_dict(self) -> dict:
+        """Chuyển model thành dictionary"""
+        return {
+            'category_id': self.category_id,
+            'category_name': self.category_name,
+            'description': self.description
+        }
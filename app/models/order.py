@@ -0,0 +1,71 @@
+"""
+Order models - Đơn hàng và chi tiết đơn hàng
+
+Các cột dùng để lọc / group trong analytics (order_date, status, product_id,
+order_id) đều được đánh index. Không khai báo foreign key vì dữ liệu CSV
+nguồn không đảm bảo toàn vẹn tham chiếu.
+"""
+from app.extensions import db
+from datetime import datetime
+
+
+class Order(db.Model):
+    """Model cho bảng orders"""
+    __tablename__ = 'orders'
+    __table_args__ = (
+        # Lọc theo khoảng ngày + trạng thái và group theo ngày
+        db.Index('ix_orders_order_date_status', 'order_date', 'status'),
+    )
+    
+    order_id: str = db.Column(db.String(30), primary_key=True)
+    user_id: str = db.Column(db.String(20), index=True)
+    order_date: datetime = db.Column(db.DateTime, nullable=False, index=True)
+    total: float = db.Column(db.Float, nullable=False, default=0.0)
+    status: str = db.Column(db.String(20), nullable=False, index=True)
+    
+    def __repr__(self) -> str:
+        return f'<Order {self.order_id}>'
+    
+    def to_dict(self) -> dict:
+        """Chuyển model thành dictionary"""
+        return {
+            'order_id': self.order_id,
+            'user_id': self.user_id,
+            'order_date': self.order_date.isoformat() if self.order_date else None,
+            'total': self.total,
+            'status': self.status
+        }
+
+
+class OrderDetail(db.Model):
+    """Model cho bảng order_details"""
+    __tablename__ = 'order_details'
+    __table_args__ = (
+        # Top sản phẩm: group theo product_id, đọc subtotal ngay từ index
+        db.Index('ix_order_details_product_revenue', 'product_id', 'product_name', 'subtotal'),
+    )
+    
+    detail_id: int = db.Column(db.Integer, primary_key=True)
+    order_id: str = db.Column(db.String(30), nullable=False, index=True)
+    product_id: str = db.Column(db.String(20), nullable=False, index=True)
+    sku: str = db.Column(db.String(50))
+    product_name: str = db.Column(db.String(200))
+    unit_price: float = db.Column(db.Float, nullable=False, default=0.0)
+    quantity: int = db.Column(db.Integer, nullable=False, default=0)
+    subtotal: float = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self) -> str:
+        return f'<OrderDetail {self.detail_id} {self.order_id}>'
+    
+    def to_dict(self) -> dict:
+        """Chuyển model thành dictionary"""
+        return {
+            'detail_id': self.detail_id,
+            'order_id': self.order_id,
+            'product_id': self.product_id,
+            'sku': self.sku,
+            'product_name': self.product_name,
+            'unit_price': self.unit_price,
+            'quantity': self.quantity,
+            'subtotal': self.subtotal
+        }
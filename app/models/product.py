@@ -11,9 +11,18 @@ class Product(db.Model):
     __tablename__ = 'products'
     
     id: int = db.Column(db.Integer, primary_key=True)
+    # Mã sản phẩm trong CSV (P001...), khớp với order_details.product_id
+    product_id: Optional[str] = db.Column(db.String(20), unique=True, index=True)
     name: str = db.Column(db.String(200), nullable=False)
+    sku: Optional[str] = db.Column(db.String(50), index=True)
+    category_id: Optional[str] = db.Column(db.String(20), index=True)
+    supplier_id: Optional[str] = db.Column(db.String(20), index=True)
     price: float = db.Column(db.Float, nullable=False)
     quantity: int = db.Column(db.Integer, nullable=False, default=0)
+    description: Optional[str] = db.Column(db.Text)
+    weight_g: Optional[int] = db.Column(db.Integer)
+    rating: Optional[float] = db.Column(db.Float)
+    tags: Optional[str] = db.Column(db.String(255))
     created_at: datetime = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at: datetime = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -24,9 +33,17 @@ class Product(db.Model):
         """Chuyển model thành dictionary"""
         return {
             'id': self.id,
+            'product_id': self.product_id,
             'name': self.name,
+            'sku': self.sku,
+            'category_id': self.category_id,
+            'supplier_id': self.supplier_id,
             'price': self.price,
             'quantity': self.quantity,
+            'description': self.description,
+            'weight_g': self.weight_g,
+            'rating': self.rating,
+            'tags': self.tags,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -0,0 +1,28 @@
+"""
+Supplier model - Nhà cung cấp
+"""
+from app.extensions import db
+
+
+class Supplier(db.Model):
+    """Model cho bảng suppliers"""
+    __tablename__ = 'suppliers'
+    
+    supplier_id: str = db.Column(db.String(20), primary_key=True)
+    supplier_name: str = db.Column(db.String(200), nullable=False)
+    contact: str = db.Column(db.String(200))
+    email: str = db.Column(db.String(200))
+    country: str = db.Column(db.String(100))
+    
+    def __repr__(self) -> str:
+        return f'<Supplier {self.supplier_name}>'
+    
+    def to_dict(self) -> dict:
+        """Chuyển model thành dictionary"""
+        return {
+            'supplier_id': self.supplier_id,
+            'supplier_name': self.supplier_name,
+            'contact': self.contact,
+            'email': self.email,
+            'country': self.country
+        }
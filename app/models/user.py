@@ -0,0 +1,32 @@
+"""
+User model - Khách hàng
+"""
+from app.extensions import db
+from datetime import datetime
+
+
+class User(db.Model):
+    """Model cho bảng users"""
+    __tablename__ = 'users'
+    
+    user_id: str = db.Column(db.String(20), primary_key=True)
+    full_name: str = db.Column(db.String(200), nullable=False)
+    email: str = db.Column(db.String(200), index=True)
+    # Lưu dạng chuỗi để giữ số 0 ở đầu
+    phone: str = db.Column(db.String(30))
+    address: str = db.Column(db.String(255))
+    created_at: datetime = db.Column(db.DateTime)
+    
+    def __repr__(self) -> str:
+        return f'<User {self.full_name}>'
+    
+    def to_dict(self) -> dict:
+        """Chuyển model thành dictionary"""
+        return {
+            'user_id': self.user_id,
+            'full_name': self.full_name,
+            'email': self.email,
+            'phone': self.phone,
+            'address': self.address,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -3,128 +3,407 @@ Admin Blueprint - Dashboard Routes
 Route chỉ nhận request và trả về template.
 Mọi logic xử lý nằm trong services.
 """
-from flask import Blueprint, render_template, current_app
-from app.services.data_analysis import DataAnalysisService
+from flask import Blueprint, Response, render_template, current_app, request, jsonify
+from app.routes.conditional import conditional
+from app.services.chart_export import (
+    FORMATS, MAX_SCALE, MAX_SIZE, MIN_SCALE, MIN_SIZE, ExportUnavailable, chart_exporter
+)
+from app.services.dashboard import (
+    DEFAULT_BREAKDOWN_N, DEFAULT_TOP_N, kpis_payload, orders_per_day_payload, revenue_breakdown_payload,
+    revenue_over_time_payload, top_products_payload
+)
+from app.services.data_analysis import DataAnalysisService, analysis_service
+from app.services.dimensions import DIMENSIONS
+from app.services.live_updates import LiveFeedFull, live_feed
+from app.services.order_filter import OrderFilter
+from app.services.precompute import precompute
+from app.services.product_catalog import ProductQuery
+from app.services.rollups import GRANULARITIES
+from app.services.timing import stage
 from app.services.visualizer import VisualizerService
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional, Tuple
 import os
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/')
 
+# Bảng sản phẩm cạnh biểu đồ tròn ở /charts hẹp hơn nên mỗi trang ít dòng hơn
+CHARTS_PER_PAGE = 20
+
 
 @admin_bp.route('/')
+@conditional()
 def index():
     """Redirect to dashboard"""
     return render_template('admin/dashboard.html')
 
 
 @admin_bp.route('/dashboard')
+@conditional()
 def dashboard():
     """
     Main dashboard with charts and statistics
     
+    Chỉ render khung trang: KPI và từng biểu đồ được tải song song
+    từ các endpoint /api/* nên trang không chờ mọi phép tổng hợp.
+    
+    Query params (tuỳ chọn): start, end (YYYY-MM-DD), days, status
+    
     Returns:
         Rendered dashboard template
     """
+    statuses = current_app.config.get('ORDER_STATUSES', ())
     try:
-        # Lấy đường dẫn CSV từ config
-        csv_path = current_app.config.get('CSV_DATA_PATH', 'products.csv')
-        orders_path = current_app.config.get('ORDERS_CSV_PATH', 'orders.csv')
-        order_details_path = current_app.config.get('ORDER_DETAILS_CSV_PATH', 'order_details.csv')
-        # Khởi tạo services (Separation of Concerns)
-        data_service = DataAnalysisService(csv_path)
-        viz_service = VisualizerService()
-        
-        # Load và xử lý dữ liệu (products + orders)
-        df = data_service.load_data()
-        data_service.load_orders()
-        data_service.load_order_details()
-
-        # KPI stats
-        stats = data_service.get_basic_stats()
-        total_orders = data_service.get_total_orders()
-        total_revenue = data_service.get_total_revenue()
-        total_quantity_sold = data_service.get_total_quantity_sold()
-        avg_order_value = data_service.get_avg_order_value()
-
-        # Charts
-        # 1) Revenue over time (line)
-        rev_df = data_service.get_revenue_over_time()
-        revenue_line = viz_service.create_line_chart(
-            x=rev_df['order_date'].tolist(),
-            y=rev_df['total'].tolist() if not rev_df.empty else [],
-            title="Doanh thu theo ngày",
-            x_title="Ngày",
-            y_title="Doanh thu (₫)"
-        )
-
-        # 2) Top products by revenue (bar)
-        top_products = data_service.get_top_products_by_revenue(n=8)
-        top_bar = viz_service.create_bar_chart(
-            labels=top_products['product_name'].tolist(),
-            values=top_products['subtotal'].tolist(),
-            title="Top sản phẩm theo doanh thu"
-        )
-
-        # 3) Orders per day (bar)
-        orders_per_day = data_service.get_orders_per_day()
-        orders_bar = viz_service.create_bar_chart(
-            labels=orders_per_day['order_date'].astype(str).tolist(),
-            values=orders_per_day['orders'].tolist(),
-            title="Số đơn hàng theo ngày"
-        )
-
-        # Trả về template với dữ liệu đã xử lý
+        order_filter = OrderFilter.from_args(request.args)
+    except ValueError as e:
         return render_template(
             'admin/dashboard.html',
-            stats={
-                'total_products': stats['total_products'],
-                'total_quantity': stats['total_quantity'],
-                'total_revenue': total_revenue,
-                'avg_price': stats['avg_price'],
-                'avg_quantity': stats['avg_quantity'],
-                'total_orders': total_orders,
-                'total_quantity_sold': total_quantity_sold,
-                'avg_order_value': avg_order_value
-            },
-            revenue_line=revenue_line,
-            top_bar=top_bar,
-            orders_bar=orders_bar,
+            error=f"Tham số lọc không hợp lệ: {str(e)}",
+            order_filter=OrderFilter(),
+            statuses=statuses,
             active='dashboard'
-        )
-    
+        ), 400
+
+    return render_template(
+        'admin/dashboard.html',
+        filter_args=order_filter.to_args(),
+        order_filter=order_filter,
+        statuses=statuses,
+        # Event được tính một lần cho dashboard không lọc nên chỉ trang đó cập nhật trực tiếp
+        live=live_feed.enabled and not order_filter.active,
+        active='dashboard'
+    )
+
+
+@admin_bp.route('/dashboard/live')
+def dashboard_live():
+    """
+    Server-Sent Events của dashboard (không lọc): KPI và điểm mới / đã đổi của
+    doanh thu và số đơn theo ngày mỗi khi dữ liệu đơn hàng đổi
+
+    Event `snapshot` (khi mới kết nối hoặc bị lỡ quá nhiều) mang toàn bộ KPI và
+    điểm; event `update` chỉ mang phần chênh lệch so với event trước.
+
+    Returns:
+        text/event-stream, 404 nếu tắt LIVE_UPDATES_ENABLED, 503 nếu quá nhiều kết nối,
+        405 với HEAD (không giữ chỗ kết nối cho request không có body)
+    """
+    if request.method != 'GET':
+        response, status = _api_error("Method not allowed", 405)
+        response.headers['Allow'] = 'GET'
+        return response, status
+    if not live_feed.enabled:
+        return _api_error("Live updates are disabled", 404)
+    try:
+        events = live_feed.subscribe(request.headers.get('Last-Event-ID'))
+    except LiveFeedFull as e:
+        return _api_error(str(e), 503)
+
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-store',
+        # Proxy (nginx) không gom event lại trước khi gửi
+        'X-Accel-Buffering': 'no',
+    })
+
+
+def _api_error(message: str, status: int) -> Tuple[Response, int]:
+    return jsonify({'error': message}), status
+
+
+def _json_response(payload: Dict[str, Any]) -> Response:
+    # Cùng encoder với spec nhúng trong trang / SSE: date -> ISO, mảng numpy -> list
+    # (jsonify biến date thành chuỗi RFC 1123 mà Plotly coi là category)
+    with stage('serialize.json'):
+        return current_app.response_class(VisualizerService.spec_to_json(payload), mimetype='application/json')
+
+
+def _api_call(name: str, build: Callable[[DataAnalysisService], Dict[str, Any]],
+              respond: Callable[[Dict[str, Any]], Any] = _json_response, **params: Any) -> Any:
+    """
+    Chạy một endpoint JSON: parse filter, tạo service, xử lý lỗi thống nhất
+
+    Khi không lọc và precompute worker đang chạy, payload được lấy từ bộ
+    kết quả tính sẵn thay vì tính trong request.
+
+    Args:
+        name: Tên endpoint (dùng cho log và key của payload tính sẵn)
+        build: Hàm nhận DataAnalysisService, trả về payload
+        respond: Hàm tạo response từ payload (mặc định JSON)
+        **params: Tham số đã chuẩn hoá của endpoint
+
+    Returns:
+        Flask response
+    """
+    try:
+        order_filter = OrderFilter.from_args(request.args)
+    except ValueError as e:
+        return _api_error(f"Tham số lọc không hợp lệ: {str(e)}", 400)
+
+    try:
+        if not order_filter.active:
+            payload = precompute.lookup(name, **params)
+            if payload is not None:
+                return respond(payload)
+
+        data_service = analysis_service(current_app.config, order_filter)
+        return respond(build(data_service))
+
+    except ValueError as e:
+        return _api_error(str(e), 400)
+
+    except ExportUnavailable as e:
+        return _api_error(str(e), 503)
+
     except FileNotFoundError as e:
-        return render_template(
-            'admin/dashboard.html',
-            error=f"Không tìm thấy file dữ liệu: {str(e)}",
-            active='dashboard'
-        ), 404
-    
+        return _api_error(f"Không tìm thấy file dữ liệu: {str(e)}", 404)
+
     except Exception as e:
-        current_app.logger.error(f"Dashboard error: {str(e)}")
-        return render_template(
-            'admin/dashboard.html',
-            error=f"Lỗi khi tải dashboard: {str(e)}",
-            active='dashboard'
-        ), 500
+        current_app.logger.error(f"API {name} error: {str(e)}")
+        return _api_error(f"Lỗi khi tính {name}: {str(e)}", 500)
+
+
+def _granularity_arg() -> str:
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Invalid granularity: {granularity}")
+    return granularity
+
+
+def _top_n_arg(default: int = DEFAULT_TOP_N) -> int:
+    try:
+        n = int(request.args.get('n', default))
+    except ValueError:
+        raise ValueError(f"Invalid n: {request.args.get('n')}")
+    if not 1 <= n <= 100:
+        raise ValueError(f"Invalid n: {n}")
+    return n
+
+
+def _export_size_args() -> Tuple[Optional[int], Optional[int], float]:
+    """width, height (px) và scale của ảnh xuất (None: mặc định của exporter)"""
+    size = []
+    for key in ('width', 'height'):
+        value = request.args.get(key)
+        try:
+            size.append(int(value) if value else None)
+        except ValueError:
+            raise ValueError(f"Invalid {key}: {value}")
+        if size[-1] is not None and not MIN_SIZE <= size[-1] <= MAX_SIZE:
+            raise ValueError(f"Invalid {key}: {value}")
+    try:
+        scale = float(request.args.get('scale', 1))
+    except ValueError:
+        raise ValueError(f"Invalid scale: {request.args.get('scale')}")
+    if not MIN_SCALE <= scale <= MAX_SCALE:
+        raise ValueError(f"Invalid scale: {scale}")
+    return size[0], size[1], scale
+
+
+def _image_response(name: str, fmt: str) -> Callable[[Dict[str, Any]], Any]:
+    """
+    Hàm tạo response ảnh từ payload (dùng làm `respond` của _api_call)
+
+    Ảnh chưa render xong trong EXPORT_WAIT giây được trả 202 + Retry-After:
+    render vẫn tiếp tục trong pool kaleido và lần gọi lại lấy ảnh từ cache.
+
+    Args:
+        name: Tên file ảnh (không có phần mở rộng)
+        fmt: 'png' | 'svg'
+
+    Raises:
+        ValueError: Nếu kích thước không hợp lệ
+    """
+    width, height, scale = _export_size_args()
 
+    def respond(payload: Dict[str, Any]) -> Any:
+        data = chart_exporter.export(payload['chart'], fmt, width, height, scale)
+        if data is None:
+            response = jsonify({'status': 'rendering'})
+            response.status_code = 202
+            response.headers['Retry-After'] = '1'
+            return response
+        response = Response(data, mimetype=FORMATS[fmt])
+        response.headers['Content-Disposition'] = f'inline; filename="{name}.{fmt}"'
+        return response
+    return respond
+
+
+@admin_bp.route('/api/kpis')
+@conditional('products', 'orders', 'order_details', max_age_key='API_CACHE_MAX_AGE')
+def api_kpis():
+    """
+    KPI dạng số của dashboard
+
+    Returns:
+        JSON {total_products, total_quantity, ..., avg_order_value}
+    """
+    return _api_call('kpis', kpis_payload)
+
+
+@admin_bp.route('/api/revenue-over-time')
+@conditional('orders', max_age_key='API_CACHE_MAX_AGE')
+def api_revenue_over_time():
+    """
+    Doanh thu theo thời gian (query: granularity = day | week | month)
+
+    Returns:
+        JSON {granularity, order_date, total, chart}
+    """
+    try:
+        granularity = _granularity_arg()
+    except ValueError as e:
+        return _api_error(str(e), 400)
+
+    return _api_call(
+        'revenue-over-time',
+        lambda service: revenue_over_time_payload(service, granularity),
+        granularity=granularity
+    )
+
+
+@admin_bp.route('/api/orders-per-day')
+@conditional('orders', max_age_key='API_CACHE_MAX_AGE')
+def api_orders_per_day():
+    """
+    Số đơn hàng theo thời gian (query: granularity = day | week | month)
+
+    Returns:
+        JSON {granularity, order_date, orders, chart}
+    """
+    try:
+        granularity = _granularity_arg()
+    except ValueError as e:
+        return _api_error(str(e), 400)
+
+    return _api_call(
+        'orders-per-day',
+        lambda service: orders_per_day_payload(service, granularity),
+        granularity=granularity
+    )
+
+
+@admin_bp.route('/api/top-products')
+@conditional('orders', 'order_details', max_age_key='API_CACHE_MAX_AGE')
+def api_top_products():
+    """
+    Top sản phẩm theo doanh thu (query: n, mặc định 8, tối đa 100)
+
+    Returns:
+        JSON {products: [{product_id, product_name, subtotal}], chart}
+    """
+    try:
+        n = _top_n_arg()
+    except ValueError as e:
+        return _api_error(str(e), 400)
+
+    return _api_call('top-products', lambda service: top_products_payload(service, n), n=n)
+
+
+@admin_bp.route('/api/revenue-by/<dimension>')
+@conditional('products', 'orders', 'order_details', 'categories', 'suppliers', 'users',
+             max_age_key='API_CACHE_MAX_AGE')
+def api_revenue_by(dimension: str):
+    """
+    Doanh thu theo chiều: category | supplier | customer (query: n, mặc định 10, tối đa 100)
+
+    Returns:
+        JSON {dimension, items: [{key, name, revenue, (orders)}], chart}
+    """
+    if dimension not in DIMENSIONS:
+        return _api_error(f"Invalid dimension: {dimension}", 404)
+    try:
+        n = _top_n_arg(DEFAULT_BREAKDOWN_N)
+    except ValueError as e:
+        return _api_error(str(e), 400)
+
+    return _api_call(
+        'revenue-by',
+        lambda service: revenue_breakdown_payload(service, dimension, n),
+        dimension=dimension, n=n
+    )
+
+
+@admin_bp.route('/export/<chart>.<fmt>')
+@conditional('orders', 'order_details', max_age_key='API_CACHE_MAX_AGE')
+def export_chart(chart: str, fmt: str):
+    """
+    Ảnh PNG / SVG của biểu đồ dashboard: revenue-over-time | orders-per-day | top-products
+
+    Query: như endpoint /api tương ứng (granularity, n, bộ lọc) cùng width,
+    height (px) và scale.
+
+    Returns:
+        Ảnh (200), 202 nếu đang render, 503 nếu chưa cài kaleido
+    """
+    if fmt not in FORMATS:
+        return _api_error(f"Invalid format: {fmt}", 404)
+    try:
+        if chart in ('revenue-over-time', 'orders-per-day'):
+            granularity = _granularity_arg()
+            builder = revenue_over_time_payload if chart == 'revenue-over-time' else orders_per_day_payload
+            build, params = (lambda service: builder(service, granularity)), {'granularity': granularity}
+        elif chart == 'top-products':
+            n = _top_n_arg()
+            build, params = (lambda service: top_products_payload(service, n)), {'n': n}
+        else:
+            return _api_error(f"Invalid chart: {chart}", 404)
+        respond = _image_response(chart, fmt)
+    except ValueError as e:
+        return _api_error(str(e), 400)
+
+    return _api_call(chart, build, respond, **params)
+
+
+@admin_bp.route('/export/revenue-by/<dimension>.<fmt>')
+@conditional('products', 'orders', 'order_details', 'categories', 'suppliers', 'users',
+             max_age_key='API_CACHE_MAX_AGE')
+def export_revenue_by(dimension: str, fmt: str):
+    """
+    Ảnh PNG / SVG của doanh thu theo chiều: category | supplier | customer
+
+    Returns:
+        Ảnh (200), 202 nếu đang render, 503 nếu chưa cài kaleido
+    """
+    if dimension not in DIMENSIONS:
+        return _api_error(f"Invalid dimension: {dimension}", 404)
+    if fmt not in FORMATS:
+        return _api_error(f"Invalid format: {fmt}", 404)
+    try:
+        n = _top_n_arg(DEFAULT_BREAKDOWN_N)
+        respond = _image_response(f'revenue-by-{dimension}', fmt)
+    except ValueError as e:
+        return _api_error(str(e), 400)
+
+    return _api_call(
+        'revenue-by',
+        lambda service: revenue_breakdown_payload(service, dimension, n),
+        respond, dimension=dimension, n=n
+    )
 
 
 @admin_bp.route('/charts')
+@conditional('products')
 def charts():
     """
     Simple page that renders a pie chart for all products (by quantity)
 
+    Query params (tuỳ chọn) cho bảng sản phẩm: page, per_page, sort, q
+
     Returns:
         Rendered charts template
     """
     try:
-        csv_path = current_app.config.get('CSV_DATA_PATH', 'products.csv')
+        query = ProductQuery.from_args(request.args, default_per_page=CHARTS_PER_PAGE)
+    except ValueError as e:
+        return render_template(
+            'admin/charts.html',
+            error=f"Tham số không hợp lệ: {str(e)}",
+            active='charts'
+        ), 400
 
-        data_service = DataAnalysisService(csv_path)
+    try:
+        data_service = analysis_service(current_app.config)
         viz_service = VisualizerService()
 
-        df = data_service.load_data()
         labels, quantities, prices = data_service.get_product_data()
 
         # Create a larger pie chart for the charts page
@@ -138,7 +417,7 @@ def charts():
         return render_template(
             'admin/charts.html',
             pie_chart=pie_chart,
-            products=df.to_dict('records'),
+            page=data_service.get_product_page(query),
             active='charts'
         )
 
@@ -160,24 +439,32 @@ def charts():
 
 
 @admin_bp.route('/products')
+@conditional('products')
 def products():
     """
     Page to list detailed products (moved from dashboard)
 
+    Query params (tuỳ chọn): page, per_page, sort (vd. ``-revenue``), q
+
     Returns:
         Rendered products template
     """
     try:
-        csv_path = current_app.config.get('CSV_DATA_PATH', 'products.csv')
-
-        data_service = DataAnalysisService(csv_path)
+        query = ProductQuery.from_args(request.args)
+    except ValueError as e:
+        return render_template(
+            'admin/products.html',
+            error=f"Tham số không hợp lệ: {str(e)}",
+            active='products'
+        ), 400
 
-        df = data_service.load_data()
-        df['revenue'] = df['price'] * df['quantity']
+    try:
+        data_service = analysis_service(current_app.config)
 
+        # Chỉ trang đang xem được chuyển sang records
         return render_template(
             'admin/products.html',
-            products=df.to_dict('records'),
+            page=data_service.get_product_page(query),
             active='products'
         )
 
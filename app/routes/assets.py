@@ -0,0 +1,61 @@
+"""
+Assets Blueprint - Phục vụ plotly.js và template biểu đồ từ server
+Thay cho CDN: tải một lần, URL có version nên trình duyệt cache dài hạn.
+"""
+from functools import lru_cache
+
+from flask import Blueprint, Response, current_app, send_file
+from markupsafe import Markup
+from app.services.visualizer import VisualizerService
+
+assets_bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+
+@lru_cache(maxsize=1)
+def _templates_script() -> str:
+    return VisualizerService.templates_script()
+
+
+@assets_bp.app_context_processor
+def inject_asset_versions():
+    """Version của plotly.js (cache-buster) và chế độ render cho components/plotly_scripts.html"""
+    return {
+        'plotlyjs_version': VisualizerService.plotlyjs_version(),
+        'chart_render_mode': VisualizerService.render_mode,
+    }
+
+
+@assets_bp.app_template_filter('chart')
+def chart_filter(html: str) -> Markup:
+    """HTML biểu đồ với id div riêng cho trang này: {{ chart_html | chart }}"""
+    return Markup(VisualizerService.assign_chart_id(html))
+
+
+@assets_bp.route('/plotly.min.js')
+def plotly_js():
+    """
+    plotly.js đi kèm package plotly
+    
+    Returns:
+        File JavaScript (cache dài hạn)
+    """
+    return send_file(
+        VisualizerService.plotlyjs_path(),
+        mimetype='application/javascript',
+        max_age=current_app.config.get('STATIC_ASSET_MAX_AGE', 0),
+        conditional=True
+    )
+
+
+@assets_bp.route('/plotly-templates.js')
+def plotly_templates():
+    """
+    Template dùng chung cho các spec biểu đồ (window.PLOTLY_TEMPLATES)
+    
+    Returns:
+        JavaScript response
+    """
+    response = Response(_templates_script(), mimetype='application/javascript')
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('STATIC_ASSET_MAX_AGE', 0)
+    return response
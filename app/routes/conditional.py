@@ -0,0 +1,143 @@
+"""
+Conditional Responses - ETag / Last-Modified theo phiên bản dữ liệu nguồn
+ETag được tính từ (mtime, size) của các CSV mà route đọc cùng với query
+string, nên If-None-Match trả về 304 trước khi chạm tới pandas hay Plotly.
+"""
+import functools
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Tuple
+
+from flask import current_app, make_response, request
+
+from app.services.data_analysis import configured_paths
+from app.services.dataset_cache import file_version
+
+# Thư mục có nội dung ảnh hưởng tới response (template, JS) - gộp vào ETag
+_CODE_DIRS = ('templates', 'static')
+
+
+def _code_version() -> str:
+    """Phiên bản template / static của app (tính một lần mỗi process)"""
+    version = current_app.extensions.get('conditional_code_version')
+    if version is None:
+        latest = 0
+        for name in _CODE_DIRS:
+            for root, _, files in os.walk(os.path.join(current_app.root_path, name)):
+                for filename in files:
+                    latest = max(latest, os.stat(os.path.join(root, filename)).st_mtime_ns)
+        version = str(latest)
+        current_app.extensions['conditional_code_version'] = version
+    return version
+
+
+def data_validators(tables: Tuple[str, ...]) -> Tuple[str, Optional[datetime]]:
+    """
+    ETag và Last-Modified của request hiện tại
+
+    Args:
+        tables: Các bảng (theo DATA_PATH_CONFIG) mà route đọc
+
+    Returns:
+        Tuple (etag, last_modified)
+
+    Raises:
+        OSError: Nếu một file dữ liệu không tồn tại (hoặc không theo dõi được database)
+    """
+    paths = configured_paths(current_app.config)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(request.endpoint.encode())
+    # Cùng endpoint nhưng khác tham số URL (/api/revenue-by/<dimension>, /export/<chart>.<fmt>)
+    h.update(repr(sorted((request.view_args or {}).items())).encode())
+    h.update(repr(sorted(request.args.items(multi=True))).encode())
+    h.update(current_app.config.get('ETAG_SALT', '').encode())
+    h.update(current_app.config.get('CHART_RENDER_MODE', 'spec').encode())
+    h.update(b'live' if current_app.config.get('LIVE_UPDATES_ENABLED', False) else b'')
+    h.update(_code_version().encode())
+
+    sources = [(table, paths[table]) for table in tables]
+    if tables and current_app.config.get('ANALYTICS_BACKEND', 'csv') == 'sql':
+        # Dữ liệu nằm trong database: chỉ theo dõi được file SQLite
+        sources = [('database', _sqlite_path())]
+
+    latest_ns = 0
+    for name, path in sources:
+        mtime_ns, size = file_version(path)
+        h.update(f"{name}:{mtime_ns}:{size}".encode())
+        latest_ns = max(latest_ns, mtime_ns)
+
+    last_modified = datetime.fromtimestamp(latest_ns / 1e9, tz=timezone.utc) if tables else None
+    return h.hexdigest(), last_modified
+
+
+def _sqlite_path() -> str:
+    """
+    Đường dẫn file SQLite của app
+
+    Raises:
+        OSError: Nếu database không phải SQLite dạng file (không có phiên bản để so)
+    """
+    from app.extensions import db
+    url = db.engine.url
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        raise OSError("Database version is not observable")
+    return url.database
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    if request.if_none_match:
+        # If-None-Match được ưu tiên, bỏ qua If-Modified-Since (RFC 9110)
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def _set_validators(response: Any, etag: str, last_modified: Optional[datetime], max_age_key: Optional[str]) -> None:
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    max_age = current_app.config.get(max_age_key, 0) if max_age_key else 0
+    if max_age:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        # Luôn hỏi lại server, nhưng được dùng bản đã có nếu nhận 304
+        response.cache_control.no_cache = True
+
+
+def conditional(*tables: str, max_age_key: Optional[str] = None) -> Callable:
+    """
+    Decorator thêm ETag / Last-Modified và trả về 304 khi dữ liệu không đổi
+
+    ETag được tính *trước* khi view đọc dữ liệu: nếu CSV đổi giữa chừng,
+    response mang ETag cũ và request kế tiếp sẽ lấy bản mới.
+
+    Args:
+        *tables: Các bảng mà view đọc ('products', 'orders', 'order_details')
+        max_age_key: Config key của max-age (None: no-cache, luôn revalidate)
+
+    Returns:
+        Decorator
+    """
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                etag, last_modified = data_validators(tables)
+            except OSError:
+                # File thiếu (view tự trả 404) hoặc không có phiên bản dữ liệu: bỏ qua validator
+                return view(*args, **kwargs)
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+                _set_validators(response, etag, last_modified, max_age_key)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag, last_modified, max_age_key)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,59 @@
+"""
+Metrics Blueprint - Xuất thời gian từng giai đoạn theo định dạng Prometheus
+Mỗi process (worker) có registry riêng; Prometheus scrape từng worker.
+"""
+import hmac
+import os
+import resource
+import sys
+
+from flask import Blueprint, Response, abort, current_app, request
+
+from app.services.chart_cache import chart_cache
+from app.services.chart_export import chart_exporter
+from app.services.dataset_cache import dataset_cache
+from app.services.dataset_store import dataset_store
+from app.services.live_updates import live_feed
+from app.services.timing import format_prometheus, timings
+
+metrics_bp = Blueprint('metrics', __name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _process_stats() -> dict:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'pid': os.getpid(),
+        'peak_rss_bytes': peak if sys.platform == 'darwin' else peak * 1024,
+    }
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """
+    Percentile thời gian theo giai đoạn (cửa sổ TIMING_WINDOW lần đo gần nhất)
+    cùng thống kê cache của process
+
+    Returns:
+        Text theo định dạng exposition của Prometheus (404 nếu tắt, 401 nếu sai token)
+    """
+    if not current_app.config.get('METRICS_ENABLED', False) or not timings.enabled:
+        abort(404)
+    token = current_app.config.get('METRICS_TOKEN', '')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', status=401, headers={'WWW-Authenticate': 'Bearer'})
+
+    gauges = {
+        'app_dataset_cache': ('Thống kê dataset cache', dataset_cache.stats()),
+        'app_chart_cache': ('Thống kê chart cache', chart_cache.stats()),
+        'app_process': ('Thông tin process', _process_stats()),
+    }
+    if dataset_store.enabled:
+        gauges['app_dataset_store'] = ('Thống kê dataset store dùng chung giữa các worker', dataset_store.stats())
+    if chart_exporter.available:
+        gauges['app_chart_export'] = ('Pool kaleido và cache ảnh xuất của process', chart_exporter.stats())
+    if live_feed.enabled:
+        gauges['app_live_updates'] = ('Kết nối và event của dashboard trực tiếp (SSE)', live_feed.stats())
+    body = format_prometheus(timings.snapshot(), gauges)
+    return Response(body, content_type=PROMETHEUS_CONTENT_TYPE, headers={'Cache-Control': 'no-store'})
@@ -0,0 +1,34 @@
+"""
+Profiling Blueprint - Lấy mẫu stack của cả worker trong một khoảng thời gian
+Profile của một request riêng lẻ: thêm ?_profile=<token> vào URL bất kỳ (xem profiler).
+"""
+from flask import Blueprint, request
+
+from app.services.profiler import PROFILE_ARG, PROFILE_HEADER, ProfilerError, error_response, profiler, sampler_response
+
+profiling_bp = Blueprint('profiling', __name__, url_prefix='/profile')
+
+
+@profiling_bp.route('/sample', methods=['GET', 'POST'])
+def sample():
+    """
+    Lấy mẫu mọi thread của worker đang xử lý request này (trừ chính nó)
+
+    Query params: seconds (mặc định 10, tối đa PROFILER_MAX_SECONDS),
+    interval (giây giữa hai mẫu); token qua ?_profile= hoặc header X-Profile-Token
+
+    Returns:
+        Collapsed stacks (text/plain) cho flamegraph.pl / speedscope
+    """
+    try:
+        profiler.verify(request.args.get(PROFILE_ARG) or request.headers.get(PROFILE_HEADER))
+        try:
+            seconds = float(request.args.get('seconds', 10))
+            interval = float(request.args['interval']) if 'interval' in request.args else None
+        except ValueError:
+            raise ProfilerError("seconds / interval phải là số", 400)
+        if seconds <= 0 or (interval is not None and interval <= 0):
+            raise ProfilerError("seconds / interval phải lớn hơn 0", 400)
+        return sampler_response(profiler.sample_worker(seconds, interval))
+    except ProfilerError as e:
+        return error_response(e)
@@ -0,0 +1,175 @@
+"""
+Chart Cache - Cache HTML của biểu đồ Plotly theo dấu vân tay dữ liệu đầu vào
+Biểu đồ có cùng loại, tham số và dữ liệu được trả về từ cache thay vì
+dựng lại figure và serialize lại JSON.
+"""
+import copy
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.timing import stage
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 300.0
+
+
+def _feed(h: 'hashlib._Hash', value: Any) -> None:
+    """Đưa một giá trị vào hash (mảng số được hash trực tiếp từ bộ nhớ)"""
+    if isinstance(value, pd.DataFrame):
+        h.update(b'D' + repr(list(value.columns)).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        return
+    if isinstance(value, (pd.Series, pd.Index, np.ndarray, list, tuple)):
+        try:
+            arr = np.asarray(value)
+        except ValueError:
+            # List lồng nhau không đều: hash từng phần tử
+            h.update(b'L' + str(len(value)).encode())
+            for item in value:
+                _feed(h, item)
+            return
+        h.update(b'A' + arr.dtype.str.encode() + repr(arr.shape).encode())
+        if arr.dtype.kind in 'biufcmM':
+            h.update(np.ascontiguousarray(arr).tobytes())
+        else:
+            h.update(pd.util.hash_array(arr.ravel().astype(str).astype(object)).tobytes())
+        return
+    if isinstance(value, dict):
+        for key in sorted(value):
+            h.update(b'K' + repr(key).encode())
+            _feed(h, value[key])
+        return
+    h.update(b'S' + repr(value).encode())
+
+
+def fingerprint(*values: Any) -> str:
+    """
+    Dấu vân tay rẻ của dữ liệu đầu vào biểu đồ
+
+    Args:
+        *values: Mảng, list, DataFrame, dict hoặc giá trị đơn
+
+    Returns:
+        Chuỗi hex
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for value in values:
+        _feed(h, value)
+    return h.hexdigest()
+
+
+class ChartCache:
+    """Cache LRU thread-safe có TTL cho các đoạn HTML của biểu đồ"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        """
+        Args:
+            max_entries: Số biểu đồ tối đa (0 để tắt cache)
+            ttl: Thời gian sống của mỗi biểu đồ (giây)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app
+
+        Args:
+            app: Flask application
+        """
+        self.max_entries = int(app.config.get('CHART_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self.ttl = float(app.config.get('CHART_CACHE_TTL', DEFAULT_TTL))
+        app.extensions['chart_cache'] = self
+        self.clear()
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        """
+        Lấy biểu đồ đã cache hoặc dựng mới
+
+        Args:
+            key: Key của biểu đồ
+            render: Hàm dựng biểu đồ khi cache miss
+
+        Returns:
+            Kết quả của render hoặc bản copy của giá trị đã cache (người gọi
+            sửa spec trả về không làm hỏng cache)
+        """
+        if self.max_entries <= 0:
+            return render()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                entry = None
+                self.misses += 1
+        if entry is not None:
+            # Copy ngoài lock: spec là dict / mảng numpy mà người gọi có thể sửa tại chỗ
+            return copy.deepcopy(entry[1])
+
+        value = render()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Thống kê hoạt động của cache
+
+        Returns:
+            Dictionary gồm hits, misses, entries, max_entries
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+    def clear(self) -> None:
+        """Xoá toàn bộ cache"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Instance dùng chung cho toàn bộ process
+chart_cache = ChartCache()
+
+
+def cached_chart(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorator cache kết quả của một hàm tạo biểu đồ theo tên hàm,
+    tham số và dấu vân tay dữ liệu đầu vào
+
+    Args:
+        func: Hàm tạo biểu đồ (trả về HTML string)
+
+    Returns:
+        Hàm đã được bọc cache
+    """
+    name = f'chart.{func.__name__}'
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with stage(name):
+            key = (func.__qualname__, fingerprint(*args, kwargs))
+            return chart_cache.get_or_render(key, lambda: func(*args, **kwargs))
+    return wrapper
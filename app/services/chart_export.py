@@ -0,0 +1,374 @@
+"""
+Chart Export - Xuất biểu đồ thành ảnh PNG / SVG bằng kaleido
+Ảnh được render bởi một số cố định process kaleido sống lâu (không khởi động
+Chromium cho mỗi biểu đồ) và cache trên đĩa theo dấu vân tay của spec.
+"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional
+
+from app.services.chart_cache import fingerprint
+from app.services.timing import stage
+from app.services.visualizer import VisualizerService
+
+try:
+    from kaleido.scopes.plotly import PlotlyScope
+except ImportError:  # pragma: no cover - kaleido là dependency tuỳ chọn
+    PlotlyScope = None
+
+# Định dạng hỗ trợ -> Content-Type
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_WAIT = 5.0
+DEFAULT_WIDTH = 1000
+DEFAULT_HEIGHT = 500
+
+# Giới hạn kích thước ảnh nhận từ request (px) và hệ số phóng
+MIN_SIZE, MAX_SIZE = 100, 4000
+MIN_SCALE, MAX_SCALE = 0.5, 4.0
+
+# Khi cache vượt max_bytes, xoá ảnh cũ tới khi còn tỉ lệ này (không dọn lại sau mỗi lần ghi)
+_PRUNE_TARGET = 0.9
+
+
+class ExportUnavailable(RuntimeError):
+    """kaleido chưa được cài đặt hoặc export bị tắt (EXPORT_WORKERS = 0)"""
+
+
+class ChartExporter:
+    """
+    Render spec biểu đồ thành ảnh qua pool process kaleido giới hạn, cache trên đĩa
+
+    Mỗi thread của executor giữ một PlotlyScope (một process kaleido) cho tới khi
+    shutdown, nên số process render không vượt quá EXPORT_WORKERS dù có bao nhiêu
+    request hay biểu đồ. Các yêu cầu cùng một ảnh đang render dùng chung một Future.
+    Số file / bytes của cache được quét một lần rồi cập nhật khi ghi; thư mục chỉ
+    được quét lại khi vượt max_bytes (lúc đó cũng tính lại ảnh do worker khác ghi).
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, cache_dir: Optional[str] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            workers: Số process kaleido tối đa
+            cache_dir: Thư mục cache ảnh (None: không cache trên đĩa)
+            max_bytes: Tổng dung lượng cache tối đa (ảnh cũ nhất bị xoá trước)
+        """
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.wait = DEFAULT_WAIT
+        self.width = DEFAULT_WIDTH
+        self.height = DEFAULT_HEIGHT
+        self.renders = 0
+        self.hits = 0
+        self.errors = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._scopes: List[Any] = []
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._cache_lock = threading.Lock()
+        self._cache_scanned = False
+        self._cache_files = 0
+        self._cache_bytes = 0
+
+    @property
+    def available(self) -> bool:
+        """kaleido đã được cài đặt và export được bật"""
+        return PlotlyScope is not None and self.workers > 0
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app (EXPORT_WORKERS, EXPORT_CACHE_DIR,
+        EXPORT_CACHE_MAX_BYTES, EXPORT_WAIT, EXPORT_WIDTH, EXPORT_HEIGHT)
+
+        Args:
+            app: Flask application
+        """
+        self.shutdown()
+        self.workers = int(app.config.get('EXPORT_WORKERS', DEFAULT_WORKERS))
+        self.cache_dir = app.config.get('EXPORT_CACHE_DIR') or os.path.join(app.instance_path, 'chart_exports')
+        self.max_bytes = int(app.config.get('EXPORT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.wait = float(app.config.get('EXPORT_WAIT', DEFAULT_WAIT))
+        self.width = int(app.config.get('EXPORT_WIDTH', DEFAULT_WIDTH))
+        self.height = int(app.config.get('EXPORT_HEIGHT', DEFAULT_HEIGHT))
+        with self._cache_lock:
+            self._cache_scanned = False
+        app.extensions['chart_exporter'] = self
+
+    def image_key(self, spec: Dict[str, Any], fmt: str, width: Optional[int] = None,
+                  height: Optional[int] = None, scale: float = 1.0) -> str:
+        """
+        Key cache của một ảnh: dữ liệu + định dạng + kích thước + phiên bản plotly.js
+
+        Args:
+            spec: Spec từ VisualizerService.figure_spec
+            fmt: 'png' | 'svg'
+            width: Chiều rộng (px, None: EXPORT_WIDTH)
+            height: Chiều cao (px, None: height của layout hoặc EXPORT_HEIGHT)
+            scale: Hệ số phóng (PNG)
+
+        Returns:
+            Chuỗi hex
+        """
+        width, height = self._size(spec, width, height)
+        return fingerprint(VisualizerService.spec_to_json(spec), fmt, width, height, float(scale),
+                           VisualizerService.plotlyjs_version())
+
+    def submit(self, spec: Dict[str, Any], fmt: str, width: Optional[int] = None,
+               height: Optional[int] = None, scale: float = 1.0) -> Future:
+        """
+        Yêu cầu render một ảnh (không chờ)
+
+        Args:
+            spec: Spec từ VisualizerService.figure_spec
+            fmt: 'png' | 'svg'
+            width: Chiều rộng (px, None: EXPORT_WIDTH)
+            height: Chiều cao (px, None: height của layout hoặc EXPORT_HEIGHT)
+            scale: Hệ số phóng (PNG)
+
+        Returns:
+            Future trả về bytes của ảnh (đã xong ngay nếu ảnh có trong cache)
+
+        Raises:
+            ValueError: Nếu định dạng không hỗ trợ
+            ExportUnavailable: Nếu kaleido chưa được cài đặt
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+        if not self.available:
+            raise ExportUnavailable("kaleido is required to export charts")
+
+        width, height = self._size(spec, width, height)
+        key = self.image_key(spec, fmt, width, height, scale)
+        data = self._read_cached(key, fmt)
+        if data is not None:
+            self.hits += 1
+            future: Future = Future()
+            future.set_result(data)
+            return future
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._get_executor().submit(self._render, key, spec, fmt, width, height, scale)
+                self._pending[key] = future
+        return future
+
+    def export(self, spec: Dict[str, Any], fmt: str, width: Optional[int] = None,
+               height: Optional[int] = None, scale: float = 1.0,
+               wait: Optional[float] = None) -> Optional[bytes]:
+        """
+        Ảnh của biểu đồ, chờ render tối đa `wait` giây
+
+        Args:
+            spec: Spec từ VisualizerService.figure_spec
+            fmt: 'png' | 'svg'
+            width: Chiều rộng (px, None: EXPORT_WIDTH)
+            height: Chiều cao (px, None: height của layout hoặc EXPORT_HEIGHT)
+            scale: Hệ số phóng (PNG)
+            wait: Thời gian chờ tối đa (None: EXPORT_WAIT)
+
+        Returns:
+            bytes của ảnh, hoặc None nếu vẫn đang render (render tiếp ở background)
+
+        Raises:
+            ValueError: Nếu định dạng không hỗ trợ
+            ExportUnavailable: Nếu kaleido chưa được cài đặt
+            RuntimeError: Nếu kaleido render lỗi
+        """
+        future = self.submit(spec, fmt, width, height, scale)
+        try:
+            with stage('export.wait'):
+                return future.result(timeout=self.wait if wait is None else wait)
+        except FutureTimeout:
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Thống kê của process hiện tại và cache trên đĩa
+
+        Returns:
+            Dict gồm số process kaleido, ảnh đang render, số lần render / hit / lỗi,
+            số file và tổng bytes trong cache
+        """
+        files, total = self._cache_usage()
+        with self._lock:
+            processes = len(self._scopes) if self._pid == os.getpid() else 0
+            pending = len(self._pending)
+        return {
+            'processes': processes,
+            'pending': pending,
+            'renders': self.renders,
+            'hits': self.hits,
+            'errors': self.errors,
+            'files': files,
+            'bytes': total,
+        }
+
+    def shutdown(self) -> None:
+        """Dừng executor và các process kaleido (tạo lại khi có yêu cầu tiếp theo)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            scopes, self._scopes = self._scopes, []
+            self._pending = {}
+        if self._pid != os.getpid():
+            # Executor / process của process cha (trước fork): không thuộc process này
+            return
+        if executor is not None:
+            executor.shutdown(wait=True)
+        for scope in scopes:
+            shutdown = getattr(scope, '_shutdown_kaleido', None)
+            if shutdown is not None:
+                shutdown()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Executor của process hiện tại (gọi khi đang giữ self._lock)"""
+        if self._executor is None or self._pid != os.getpid():
+            # Thread và process kaleido không sống sót qua fork: tạo mới trong process con
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='export')
+            self._scopes = []
+            self._pending = {}
+            self._pid = os.getpid()
+        return self._executor
+
+    def _scope(self) -> Any:
+        """PlotlyScope của thread export hiện tại (khởi động process kaleido ở lần đầu)"""
+        scope = getattr(self._local, 'scope', None)
+        if scope is None or getattr(self._local, 'pid', None) != os.getpid():
+            # plotly.js của package plotly (cùng phiên bản với trình duyệt), không dùng MathJax
+            scope = PlotlyScope(mathjax=False, plotlyjs=VisualizerService.plotlyjs_path())
+            self._local.scope = scope
+            self._local.pid = os.getpid()
+            with self._lock:
+                self._scopes.append(scope)
+        return scope
+
+    def _render(self, key: str, spec: Dict[str, Any], fmt: str, width: int, height: int,
+                scale: float) -> bytes:
+        try:
+            figure = VisualizerService.figure_from_spec(spec)
+            try:
+                data = self._scope().transform(figure, format=fmt, width=width, height=height, scale=scale)
+            except Exception as e:
+                self.errors += 1
+                raise RuntimeError(f"kaleido: {str(e)}") from e
+            self.renders += 1
+            self._write_cached(key, fmt, data)
+            return data
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _size(self, spec: Dict[str, Any], width: Optional[int], height: Optional[int]) -> tuple:
+        if width is None:
+            width = self.width
+        if height is None:
+            layout_height = spec.get('layout', {}).get('height')
+            height = int(layout_height) if isinstance(layout_height, (int, float)) else self.height
+        return int(width), int(height)
+
+    def _path(self, key: str, fmt: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, key[:2], f'{key}.{fmt}')
+
+    def _read_cached(self, key: str, fmt: str) -> Optional[bytes]:
+        path = self._path(key, fmt)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # mtime = lần dùng gần nhất: ảnh ít dùng nhất bị xoá trước khi cache đầy
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write_cached(self, key: str, fmt: str, data: bytes) -> None:
+        path = self._path(key, fmt)
+        if path is None:
+            return
+        # Quét lần đầu trước khi ghi để file mới không bị đếm hai lần
+        self._cache_usage()
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            # Worker khác (cùng thư mục cache) không bao giờ đọc phải file ghi dở
+            os.replace(tmp_path, path)
+        except OSError:
+            # Không ghi được cache (read-only FS...) thì vẫn trả ảnh
+            return
+        with self._cache_lock:
+            self._cache_bytes += len(data) - (old_size or 0)
+            self._cache_files += old_size is None
+            over_limit = self._cache_bytes > self.max_bytes
+        if over_limit:
+            self._prune()
+
+    def _cache_usage(self) -> tuple:
+        """(số file, tổng bytes) của cache - chỉ quét thư mục ở lần gọi đầu"""
+        with self._cache_lock:
+            if not self._cache_scanned:
+                files = self._cached_files()
+                self._cache_files = len(files)
+                self._cache_bytes = sum(size for _, size, _ in files)
+                self._cache_scanned = True
+            return self._cache_files, self._cache_bytes
+
+    def _cached_files(self) -> List[tuple]:
+        """Danh sách (path, bytes, mtime) các ảnh trong cache"""
+        files = []
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return files
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, st.st_size, st.st_mtime))
+        return files
+
+    def _prune(self) -> None:
+        files = self._cached_files()
+        count = len(files)
+        total = sum(size for _, size, _ in files)
+        if total > self.max_bytes:
+            target = self.max_bytes * _PRUNE_TARGET
+            for path, size, _ in sorted(files, key=lambda item: item[2]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                count -= 1
+                total -= size
+                if total <= target:
+                    break
+        with self._cache_lock:
+            # Đồng bộ lại với đĩa (gồm cả ảnh do worker khác ghi / xoá)
+            self._cache_files = count
+            self._cache_bytes = total
+            self._cache_scanned = True
+
+
+# Instance dùng chung cho toàn bộ process
+chart_exporter = ChartExporter()
@@ -0,0 +1,146 @@
+"""
+CSV Import - Nạp các file CSV vào database bằng INSERT theo lô
+Mỗi file được đọc theo chunk, ép kiểu theo định nghĩa cột của model rồi
+chèn bằng executemany; bộ nhớ chỉ phụ thuộc kích thước lô.
+"""
+import os
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+import pandas as pd
+from sqlalchemy import Date, DateTime, Float, Integer, Numeric, delete, insert
+
+from app.extensions import db
+from app.models import Category, Order, OrderDetail, Product, Supplier, User
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Thứ tự nạp: bảng danh mục trước, bảng sự kiện sau
+IMPORT_MODELS: Dict[str, Type[db.Model]] = {
+    'categories': Category,
+    'suppliers': Supplier,
+    'users': User,
+    'products': Product,
+    'orders': Order,
+    'order_details': OrderDetail,
+}
+
+
+def _coerce(chunk: pd.DataFrame, model: Type[db.Model]) -> List[Dict[str, Any]]:
+    """
+    Ép kiểu một chunk (đọc dạng chuỗi) theo kiểu cột của model
+
+    Args:
+        chunk: Các dòng CSV, mọi cột là chuỗi
+        model: Model đích
+
+    Returns:
+        Danh sách dict sẵn sàng cho INSERT (giá trị rỗng -> None)
+    """
+    columns = model.__table__.columns
+    data: Dict[str, pd.Series] = {}
+    for name in chunk.columns:
+        if name not in columns:
+            continue
+        values = chunk[name]
+        column_type = columns[name].type
+        if isinstance(column_type, Integer):
+            values = pd.to_numeric(values).astype('Int64')
+        elif isinstance(column_type, (Float, Numeric)):
+            values = pd.to_numeric(values)
+        elif isinstance(column_type, (DateTime, Date)):
+            values = pd.to_datetime(values)
+        data[name] = values
+
+    frame = pd.DataFrame(data).astype(object)
+    return frame.where(frame.notna(), None).to_dict('records')
+
+
+def iter_batches(csv_path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Đọc CSV theo lô, mọi cột dạng chuỗi (giữ nguyên mã như '0912...')
+
+    Args:
+        csv_path: Đường dẫn CSV
+        batch_size: Số dòng mỗi lô
+
+    Yields:
+        DataFrame của từng lô
+    """
+    with pd.read_csv(csv_path, dtype=str, keep_default_na=False, na_values=[''],
+                     chunksize=batch_size) as reader:
+        yield from reader
+
+
+def import_table(
+    table: str,
+    csv_path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    replace: bool = False
+) -> int:
+    """
+    Nạp một file CSV vào bảng tương ứng
+
+    Args:
+        table: Tên bảng (key của IMPORT_MODELS)
+        csv_path: Đường dẫn CSV
+        batch_size: Số dòng mỗi lần INSERT
+        replace: Xoá dữ liệu cũ của bảng trước khi nạp
+
+    Returns:
+        Số dòng đã nạp
+
+    Raises:
+        KeyError: Nếu bảng không được hỗ trợ
+        FileNotFoundError: Nếu file không tồn tại
+    """
+    model = IMPORT_MODELS[table]
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+    try:
+        if replace:
+            db.session.execute(delete(model))
+        rows = 0
+        for chunk in iter_batches(csv_path, batch_size):
+            records = _coerce(chunk, model)
+            if records:
+                # executemany: một câu INSERT cho cả lô
+                db.session.execute(insert(model), records)
+                rows += len(records)
+        # Một transaction cho cả bảng: lỗi giữa chừng không để lại dữ liệu dở dang
+        db.session.commit()
+        return rows
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def import_all(
+    paths: Dict[str, str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    replace: bool = False,
+    tables: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Nạp nhiều bảng theo thứ tự của IMPORT_MODELS
+
+    Args:
+        paths: Mapping tên bảng -> đường dẫn CSV
+        batch_size: Số dòng mỗi lần INSERT
+        replace: Xoá dữ liệu cũ trước khi nạp
+        tables: Chỉ nạp các bảng này (None: tất cả)
+
+    Returns:
+        Danh sách kết quả {table, csv, rows, status}
+    """
+    results = []
+    for table in IMPORT_MODELS:
+        if tables and table not in tables:
+            continue
+        csv_path = paths.get(table)
+        if not csv_path or not os.path.exists(csv_path):
+            results.append({'table': table, 'csv': csv_path or '', 'rows': 0, 'status': 'missing'})
+            continue
+        rows = import_table(table, csv_path, batch_size, replace)
+        results.append({'table': table, 'csv': csv_path, 'rows': rows, 'status': 'imported'})
+    return results
@@ -0,0 +1,165 @@
+"""
+Dashboard Payloads - Dữ liệu JSON của các endpoint /api/* của dashboard
+Dùng chung cho route (tính trong request) và precompute worker (tính sẵn
+ở background); mỗi payload được xác định bởi tên endpoint và tham số.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from app.services.dimensions import DIMENSIONS
+from app.services.rollups import GRANULARITIES
+from app.services.visualizer import VisualizerService
+
+# Số sản phẩm mặc định của /api/top-products
+DEFAULT_TOP_N = 8
+
+# Số dòng mặc định của /api/revenue-by/<dimension>
+DEFAULT_BREAKDOWN_N = 10
+
+BREAKDOWN_TITLES = {
+    'category': "Doanh thu theo danh mục",
+    'supplier': "Doanh thu theo nhà cung cấp",
+    'customer': "Top khách hàng theo doanh thu",
+}
+
+PayloadKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+def payload_key(name: str, **params: Any) -> PayloadKey:
+    """
+    Key của một payload
+
+    Args:
+        name: Tên endpoint ('kpis', 'revenue-over-time', ...)
+        **params: Tham số đã chuẩn hoá (granularity, n)
+
+    Returns:
+        Tuple hashable
+    """
+    return name, tuple(sorted(params.items()))
+
+
+def _series_payload(df: pd.DataFrame, metric: str, granularity: str, chart: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'granularity': granularity,
+        'order_date': [d.isoformat() for d in df['order_date']],
+        metric: df[metric].tolist(),
+        'chart': chart
+    }
+
+
+def kpis_payload(service: Any) -> Dict[str, Any]:
+    """KPI dạng số của dashboard"""
+    return service.compute_kpi_scalars()
+
+
+def revenue_over_time_payload(service: Any, granularity: str = 'day') -> Dict[str, Any]:
+    """Doanh thu theo thời gian kèm spec biểu đồ đường"""
+    df = service.get_revenue_over_time(granularity)
+    chart = VisualizerService.create_line_chart(
+        x=df['order_date'].tolist(),
+        y=df['total'].tolist() if not df.empty else [],
+        title="Doanh thu theo ngày",
+        x_title="Ngày",
+        y_title="Doanh thu (₫)",
+        as_spec=True
+    )
+    return _series_payload(df, 'total', granularity, chart)
+
+
+def orders_per_day_payload(service: Any, granularity: str = 'day') -> Dict[str, Any]:
+    """Số đơn hàng theo thời gian kèm spec biểu đồ cột"""
+    df = service.get_orders_per_day(granularity)
+    chart = VisualizerService.create_bar_chart(
+        labels=df['order_date'].astype(str).tolist(),
+        values=df['orders'].tolist(),
+        title="Số đơn hàng theo ngày",
+        as_spec=True,
+        ordered=True
+    )
+    return _series_payload(df, 'orders', granularity, chart)
+
+
+def top_products_payload(service: Any, n: int = DEFAULT_TOP_N) -> Dict[str, Any]:
+    """Top sản phẩm theo doanh thu kèm spec biểu đồ cột"""
+    df = service.get_top_products_by_revenue(n)
+    chart = VisualizerService.create_bar_chart(
+        labels=df['product_name'].astype(str).tolist(),
+        values=df['subtotal'].tolist(),
+        title="Top sản phẩm theo doanh thu",
+        as_spec=True
+    )
+    products = [
+        {'product_id': str(pid), 'product_name': str(name), 'subtotal': float(subtotal)}
+        for pid, name, subtotal in zip(df['product_id'], df['product_name'], df['subtotal'])
+    ]
+    return {'products': products, 'chart': chart}
+
+
+def revenue_breakdown_payload(service: Any, dimension: str, n: Optional[int] = DEFAULT_BREAKDOWN_N) -> Dict[str, Any]:
+    """Doanh thu theo danh mục / nhà cung cấp / khách hàng kèm spec biểu đồ"""
+    spec = DIMENSIONS[dimension]
+    df = service.get_revenue_breakdown(dimension, n)
+    labels = df[spec.label].astype(str).tolist()
+    values = df['revenue'].tolist()
+    if dimension == 'category':
+        chart = VisualizerService.create_pie_chart(
+            labels=labels, values=values, title=BREAKDOWN_TITLES[dimension], as_spec=True
+        )
+    else:
+        chart = VisualizerService.create_bar_chart(
+            labels=labels, values=values, title=BREAKDOWN_TITLES[dimension], as_spec=True
+        )
+
+    items = []
+    for row in df.itertuples(index=False):
+        item = {'key': str(getattr(row, spec.key)), 'name': str(getattr(row, spec.label)),
+                'revenue': float(row.revenue)}
+        if 'orders' in df.columns:
+            item['orders'] = int(row.orders)
+        items.append(item)
+    return {'dimension': dimension, 'items': items, 'chart': chart}
+
+
+PAYLOAD_BUILDERS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    'kpis': kpis_payload,
+    'revenue-over-time': revenue_over_time_payload,
+    'orders-per-day': orders_per_day_payload,
+    'top-products': top_products_payload,
+    'revenue-by': revenue_breakdown_payload,
+}
+
+
+def default_payload_keys(dimensions: Sequence[str] = tuple(DIMENSIONS)) -> List[PayloadKey]:
+    """
+    Các payload mà dashboard (không lọc) yêu cầu: KPI, hai chuỗi thời gian
+    ở mọi granularity, top sản phẩm và doanh thu theo từng chiều. KPI đứng
+    đầu để các bảng được load một lần trước khi các payload còn lại chạy song song.
+
+    Args:
+        dimensions: Các chiều có bảng danh mục
+    """
+    keys = [payload_key('kpis')]
+    for granularity in GRANULARITIES:
+        keys.append(payload_key('revenue-over-time', granularity=granularity))
+        keys.append(payload_key('orders-per-day', granularity=granularity))
+    keys.append(payload_key('top-products', n=DEFAULT_TOP_N))
+    for dimension in dimensions:
+        keys.append(payload_key('revenue-by', dimension=dimension, n=DEFAULT_BREAKDOWN_N))
+    return keys
+
+
+def build_payload(service: Any, key: PayloadKey) -> Dict[str, Any]:
+    """
+    Tính một payload
+
+    Args:
+        service: DataAnalysisService hoặc SqlAnalysisService
+        key: Key từ payload_key
+
+    Returns:
+        Payload có thể serialize JSON
+    """
+    name, params = key
+    return PAYLOAD_BUILDERS[name](service, **dict(params))
@@ -4,30 +4,144 @@ Separation of Concerns: Tất cả logic xử lý data nằm ở đây
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Sequence, Tuple, Any, Optional
+import functools
 import os
 
+from app.services.dataset_cache import DatasetCache, dataset_cache, file_version
+from app.services.snapshot import SnapshotManager, snapshots
+from app.services.dataset_store import dataset_store
+from app.services.rollups import DailyRollup, rollups
+from app.services.product_catalog import ProductIndex, ProductPage, ProductQuery
+from app.services.order_filter import (
+    DEFAULT_CHUNK_ROWS, OrderFilter, load_filtered_order_details, load_filtered_orders
+)
+from app.services.streaming import DEFAULT_MAX_BYTES as STREAMING_MAX_BYTES
+from app.services.streaming import StreamingAggregates, aggregate_stream
+from app.services.ingest import IncrementalDataset, ingest
+from app.services.dimensions import (
+    DIMENSIONS, DimensionIndex, ProductJoin, breakdown_frame, reduce_to_dimension
+)
+from app.services.load_pool import load_pool
+from app.services.schema import memory_usage
+from app.services.timing import instrument_methods
 
+# Tên bảng -> (config key, đường dẫn mặc định)
+DATA_PATH_CONFIG: Dict[str, Tuple[str, str]] = {
+    'products': ('CSV_DATA_PATH', 'products.csv'),
+    'orders': ('ORDERS_CSV_PATH', 'orders.csv'),
+    'order_details': ('ORDER_DETAILS_CSV_PATH', 'order_details.csv'),
+    'categories': ('CATEGORIES_CSV_PATH', 'categories.csv'),
+    'suppliers': ('SUPPLIERS_CSV_PATH', 'suppliers.csv'),
+    'users': ('USERS_CSV_PATH', 'users.csv'),
+}
+
+# Các bảng danh mục đi kèm products / orders
+DIMENSION_TABLES = ('categories', 'suppliers', 'users')
+
+
+def configured_paths(config: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Lấy đường dẫn các file dữ liệu từ config
+
+    Args:
+        config: Flask config
+
+    Returns:
+        Mapping tên bảng -> đường dẫn CSV
+    """
+    return {table: config.get(key, default) for table, (key, default) in DATA_PATH_CONFIG.items()}
+
+
+def analysis_service(config: Dict[str, Any], order_filter: Optional[OrderFilter] = None) -> Any:
+    """
+    Tạo service analytics theo ANALYTICS_BACKEND ('csv' hoặc 'sql')
+
+    Args:
+        config: Flask config
+        order_filter: Cửa sổ ngày / trạng thái (tuỳ chọn)
+
+    Returns:
+        DataAnalysisService hoặc SqlAnalysisService (cùng API)
+    """
+    if config.get('ANALYTICS_BACKEND', 'csv') == 'sql':
+        from app.services.sql_analysis import SqlAnalysisService
+        return SqlAnalysisService.from_config(config, order_filter)
+    return DataAnalysisService.from_config(config, order_filter)
+
+
+@instrument_methods
 class DataAnalysisService:
     """Service xử lý và phân tích dữ liệu sản phẩm"""
     
-    def __init__(self, csv_path: str, orders_path: str = 'orders.csv', order_details_path: str = 'order_details.csv'):
+    def __init__(self, csv_path: str, orders_path: str = 'orders.csv', order_details_path: str = 'order_details.csv',
+                 cache: Optional[DatasetCache] = None, snapshot_manager: Optional[SnapshotManager] = None,
+                 order_filter: Optional[OrderFilter] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 streaming: bool = False, streaming_max_bytes: int = STREAMING_MAX_BYTES,
+                 incremental: bool = False, dimension_paths: Optional[Dict[str, str]] = None):
         """
         Khởi tạo service với đường dẫn CSV
         
         Args:
             csv_path: Đường dẫn tới file CSV
+            cache: Cache DataFrame dùng chung (mặc định: cache của process)
+            snapshot_manager: Quản lý snapshot Arrow (mặc định: dataset store dùng chung
+                giữa các worker nếu bật, nếu không thì snapshot của process)
+            order_filter: Cửa sổ ngày / trạng thái áp dụng ngay khi load orders
+            chunk_rows: Số dòng mỗi chunk khi phải đọc CSV theo từng phần
+            streaming: Tính các chỉ số orders/order_details bằng một lượt duyệt
+                theo chunk thay vì load toàn bộ file (cho file lớn hơn RAM)
+            streaming_max_bytes: Ngưỡng bộ nhớ cho mỗi chunk ở chế độ streaming
+            incremental: Khi không lọc, chỉ parse phần được nối thêm vào orders /
+                order_details và gộp vào các chỉ số đã có (xem ingest)
+            dimension_paths: Đường dẫn các bảng danh mục (categories, suppliers, users)
         """
         self.csv_path = csv_path
+        self.order_filter = order_filter if order_filter is not None and order_filter.active else None
+        self.chunk_rows = chunk_rows
+        self.streaming = streaming
+        self.streaming_max_bytes = streaming_max_bytes
+        self.incremental = incremental
+        self._aggregates: Optional[StreamingAggregates] = None
+        self.cache = cache if cache is not None else dataset_cache
+        if snapshot_manager is None:
+            snapshot_manager = dataset_store if dataset_store.enabled else snapshots
+        self.snapshots = snapshot_manager
         self.df: pd.DataFrame = None
         self.orders_path = orders_path
         self.order_details_path = order_details_path
         self.orders_df: pd.DataFrame = None
         self.order_details_df: pd.DataFrame = None
+        self.dimension_paths = dict(dimension_paths or {})
+        self.dimension_dfs: Dict[str, pd.DataFrame] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], order_filter: Optional[OrderFilter] = None) -> 'DataAnalysisService':
+        """
+        Khởi tạo service từ Flask config
+
+        Args:
+            config: Flask config
+            order_filter: Cửa sổ ngày / trạng thái (tuỳ chọn)
+
+        Returns:
+            DataAnalysisService
+        """
+        paths = configured_paths(config)
+        return cls(
+            paths['products'], paths['orders'], paths['order_details'],
+            order_filter=order_filter,
+            chunk_rows=int(config.get('CSV_CHUNK_ROWS', DEFAULT_CHUNK_ROWS)),
+            streaming=bool(config.get('STREAMING_MODE', False)),
+            streaming_max_bytes=int(config.get('STREAMING_MAX_BYTES', STREAMING_MAX_BYTES)),
+            incremental=bool(config.get('INCREMENTAL_INGEST', False)) and ingest.enabled,
+            dimension_paths={table: paths[table] for table in DIMENSION_TABLES}
+        )
     
     def load_data(self) -> pd.DataFrame:
         """
-        Load dữ liệu từ CSV
+        Load dữ liệu từ CSV (qua cache dùng chung, không parse lại nếu file không đổi).
+        Nếu có snapshot Arrow còn mới thì đọc snapshot thay cho CSV.
         
         Returns:
             DataFrame chứa dữ liệu
@@ -39,11 +153,35 @@ class DataAnalysisService:
             if not os.path.exists(self.csv_path):
                 raise FileNotFoundError(f"CSV file not found: {self.csv_path}")
             
-            self.df = pd.read_csv(self.csv_path)
+            self.df = self.cache.get_or_load(self.csv_path, lambda: self.snapshots.load('products', self.csv_path))
             return self.df
         except Exception as e:
             raise Exception(f"Error loading CSV: {str(e)}")
     
+    def get_product_index(self) -> ProductIndex:
+        """
+        Thứ tự sắp xếp + chỉ mục tìm kiếm của products (dựng lại khi CSV đổi)
+
+        Returns:
+            ProductIndex dùng chung giữa các request
+        """
+        if self.df is None:
+            self.load_data()
+        df = self.df
+        return self.cache.get_or_load(self.csv_path, lambda: ProductIndex(df), namespace='product_index')
+
+    def get_product_page(self, query: ProductQuery) -> ProductPage:
+        """
+        Một trang sản phẩm (đã lọc theo q và sắp xếp)
+
+        Args:
+            query: Tham số page, per_page, sort, q
+
+        Returns:
+            ProductPage
+        """
+        return self.get_product_index().page(query)
+    
     def get_basic_stats(self) -> Dict[str, Any]:
         """
         Tính toán các chỉ số thống kê cơ bản
@@ -69,33 +207,293 @@ class DataAnalysisService:
         }
 
     def load_orders(self) -> pd.DataFrame:
-        """Load orders CSV into DataFrame"""
+        """Load orders CSV into DataFrame (chỉ các dòng trong order_filter nếu có)"""
         try:
             if not os.path.exists(self.orders_path):
                 raise FileNotFoundError(f"Orders file not found: {self.orders_path}")
 
-            self.orders_df = pd.read_csv(self.orders_path, parse_dates=['order_date'])
+            if self.order_filter is not None:
+                order_filter = self.order_filter
+                self.orders_df = self.cache.get_or_load(
+                    self.orders_path,
+                    lambda: load_filtered_orders(self.orders_path, order_filter, self.snapshots, self.chunk_rows),
+                    namespace=('orders',) + order_filter.key()
+                )
+                return self.orders_df
+
+            if self.incremental:
+                self.orders_df = self._incremental_frame('orders')
+                return self.orders_df
+
+            self.orders_df = self.cache.get_or_load(
+                self.orders_path,
+                lambda: self.snapshots.load('orders', self.orders_path)
+            )
             return self.orders_df
         except Exception as e:
             raise Exception(f"Error loading orders CSV: {str(e)}")
 
     def load_order_details(self) -> pd.DataFrame:
-        """Load order_details CSV into DataFrame"""
+        """Load order_details CSV into DataFrame (chỉ các đơn trong order_filter nếu có)"""
         try:
             if not os.path.exists(self.order_details_path):
                 raise FileNotFoundError(f"Order details file not found: {self.order_details_path}")
 
-            self.order_details_df = pd.read_csv(self.order_details_path)
+            if self.order_filter is not None:
+                if self.orders_df is None:
+                    self.load_orders()
+                order_ids = self.orders_df['order_id']
+                # Tập order_id phụ thuộc phiên bản file orders
+                namespace = ('order_details',) + self.order_filter.key() + file_version(self.orders_path)
+                self.order_details_df = self.cache.get_or_load(
+                    self.order_details_path,
+                    lambda: load_filtered_order_details(
+                        self.order_details_path, order_ids.unique(), self.snapshots, self.chunk_rows
+                    ),
+                    namespace=namespace
+                )
+                return self.order_details_df
+
+            if self.incremental:
+                self.order_details_df = self._incremental_frame('order_details')
+                return self.order_details_df
+
+            self.order_details_df = self.cache.get_or_load(
+                self.order_details_path,
+                lambda: self.snapshots.load('order_details', self.order_details_path)
+            )
             return self.order_details_df
         except Exception as e:
             raise Exception(f"Error loading order details CSV: {str(e)}")
 
+    def load_dimension(self, table: str) -> pd.DataFrame:
+        """
+        Load một bảng danh mục (categories, suppliers, users) qua cache dùng chung
+
+        Args:
+            table: Tên bảng trong DIMENSION_TABLES
+
+        Returns:
+            DataFrame của bảng
+
+        Raises:
+            FileNotFoundError: Nếu bảng chưa được cấu hình hoặc file không tồn tại
+        """
+        path = self.dimension_paths.get(table)
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"{table} file not found: {path}")
+        df = self.cache.get_or_load(path, lambda: self.snapshots.load(table, path))
+        self.dimension_dfs[table] = df
+        return df
+
+    def load_all(self, tables: Optional[Sequence[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Load nhiều bảng song song trên load pool dùng chung
+
+        Args:
+            tables: Tên các bảng (mặc định: products, orders, order_details và
+                các bảng danh mục đã cấu hình có file)
+
+        Returns:
+            Mapping tên bảng -> DataFrame
+        """
+        if tables is None:
+            tables = ['products', 'orders', 'order_details'] + [
+                table for table in DIMENSION_TABLES
+                if self.dimension_paths.get(table) and os.path.exists(self.dimension_paths[table])
+            ]
+        loaders = {
+            'products': self.load_data,
+            'orders': self.load_orders,
+            'order_details': self.load_order_details,
+        }
+        tasks = {}
+        for table in tables:
+            if table in loaders:
+                tasks[table] = loaders[table]
+            elif table in DIMENSION_TABLES:
+                tasks[table] = functools.partial(self.load_dimension, table)
+            else:
+                raise ValueError(f"Unknown table: {table}")
+        return load_pool.run(tasks)
+
+    def get_dimension_index(self, dimension: str) -> DimensionIndex:
+        """
+        Bảng danh mục của một chiều đã đánh số dòng (dựng lại khi file đổi)
+
+        Args:
+            dimension: 'category', 'supplier' hoặc 'customer'
+
+        Returns:
+            DimensionIndex dùng chung giữa các request
+        """
+        spec = DIMENSIONS[dimension]
+        df = self.load_dimension(spec.table)
+        return self.cache.get_or_load(
+            self.dimension_paths[spec.table], lambda: DimensionIndex(df, spec), namespace='dimension_index'
+        )
+
+    def _product_join(self, dimension: str) -> ProductJoin:
+        """Bảng nối products -> danh mục, theo phiên bản của cả hai file"""
+        index = self.get_dimension_index(dimension)
+        if self.df is None:
+            self.load_data()
+        df = self.df
+        path = self.dimension_paths[DIMENSIONS[dimension].table]
+        return self.cache.get_or_load(
+            self.csv_path, lambda: ProductJoin(df, index),
+            namespace=('product_join', dimension) + file_version(path)
+        )
+
+    def _product_sales(self) -> Tuple[pd.Series, np.ndarray]:
+        """(product_id, doanh thu) của các dòng bán hàng, hoặc đã gộp theo sản phẩm"""
+        if self.folds_aggregates:
+            revenue = self.get_folded_aggregates().product_revenue
+            if revenue.empty:
+                return pd.Series([], dtype=object), np.zeros(0)
+            return pd.Series(revenue.index.get_level_values('product_id')), revenue.to_numpy()
+        if self.order_details_df is None:
+            self.load_order_details()
+        return self.order_details_df['product_id'], self.order_details_df['subtotal'].to_numpy()
+
+    def _customer_sales(self) -> Tuple[pd.Series, np.ndarray, Optional[np.ndarray]]:
+        """(user_id, doanh thu, số đơn) - từ rollup nếu đang streaming và rollup giữ user_id"""
+        if self.streaming and 'user_id' in rollups.dimensions:
+            table = self.get_folded_aggregates().daily.table
+            return table['user_id'], table['total'].to_numpy(), table['orders'].to_numpy()
+        if self.orders_df is None:
+            self.load_orders()
+        return self.orders_df['user_id'], self.orders_df['total'].to_numpy(), None
+
+    def get_revenue_breakdown(self, dimension: str, n: Optional[int] = None) -> pd.DataFrame:
+        """
+        Doanh thu theo danh mục / nhà cung cấp / khách hàng
+
+        Không merge: khoá của bảng sự kiện (categorical) được ánh xạ sang dòng
+        của bảng danh mục qua bảng nối dựng sẵn rồi cộng bằng np.bincount.
+
+        Args:
+            dimension: 'category', 'supplier' hoặc 'customer'
+            n: Chỉ lấy n dòng có doanh thu cao nhất (None: tất cả)
+
+        Returns:
+            DataFrame [<key>, <label>, revenue] (customer có thêm cột orders);
+            khoá không tồn tại trong danh mục được gộp vào dòng UNKNOWN_LABEL
+
+        Raises:
+            ValueError: Nếu dimension không hợp lệ
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        spec = DIMENSIONS[dimension]
+        index = self.get_dimension_index(dimension)
+
+        if spec.via_products:
+            keys, weights = self._product_sales()
+            join = self._product_join(dimension)
+            result = reduce_to_dimension(keys, weights, join.rows_for, index.size)
+            return breakdown_frame(index, *result, n=n)
+
+        keys, weights, counts = self._customer_sales()
+        result = reduce_to_dimension(keys, weights, index.rows_for, index.size, counts)
+        return breakdown_frame(index, *result, count_column='orders', n=n)
+
+    def memory_report(self, tables: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Bộ nhớ của từng bảng sau khi load theo schema
+
+        Args:
+            tables: Tên các bảng (mặc định như load_all)
+
+        Returns:
+            Mapping tên bảng -> kết quả của schema.memory_usage
+        """
+        return {table: memory_usage(df) for table, df in self.load_all(tables).items()}
+
+    def _prefetch(self) -> None:
+        """Load song song dữ liệu mà các KPI của dashboard cần"""
+        tasks = {}
+        if self.df is None:
+            tasks['products'] = self.load_data
+        if self.folds_aggregates:
+            if self._aggregates is None:
+                tasks['aggregates'] = self.get_folded_aggregates
+        else:
+            if self.orders_df is None:
+                tasks['orders'] = self.load_orders
+            if self.order_details_df is None:
+                tasks['order_details'] = self.load_order_details
+        load_pool.run(tasks)
+
+    @property
+    def folds_aggregates(self) -> bool:
+        """Các chỉ số orders/order_details lấy từ aggregates gộp dần thay vì từ frame"""
+        return self.streaming or (self.incremental and self.order_filter is None)
+
+    def get_folded_aggregates(self) -> StreamingAggregates:
+        """
+        Aggregates gộp dần: một lượt streaming theo chunk, hoặc dataset
+        tăng dần (chỉ parse phần nối thêm) khi không lọc
+
+        Returns:
+            StreamingAggregates
+        """
+        if self._aggregates is None:
+            if self.streaming:
+                return self.get_streaming_aggregates()
+            self._aggregates = ingest.synced(self._incremental_dataset())
+        return self._aggregates
+
+    def _incremental_dataset(self) -> IncrementalDataset:
+        for path in (self.orders_path, self.order_details_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Data file not found: {path}")
+        return ingest.dataset(self.orders_path, self.order_details_path,
+                              self.snapshots.load, rollups.dimensions)
+
+    def _incremental_frame(self, table: str) -> pd.DataFrame:
+        dataset = self._incremental_dataset()
+        ingest.synced(dataset)
+        return dataset.frame(table)
+
+    def get_streaming_aggregates(self) -> StreamingAggregates:
+        """
+        Các chỉ số orders/order_details tính bằng một lượt duyệt theo chunk.
+        Kết quả được cache theo phiên bản của cả hai file.
+
+        Returns:
+            StreamingAggregates
+        """
+        if self._aggregates is not None:
+            return self._aggregates
+
+        for path in (self.orders_path, self.order_details_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Data file not found: {path}")
+
+        filter_key = self.order_filter.key() if self.order_filter is not None else None
+        namespace = ('stream', filter_key, rollups.dimensions) + file_version(self.order_details_path)
+        self._aggregates = self.cache.get_or_load(
+            self.orders_path,
+            lambda: aggregate_stream(
+                self.orders_path, self.order_details_path, self.snapshots,
+                self.streaming_max_bytes, self.order_filter, rollups.dimensions
+            ),
+            namespace=namespace
+        )
+        return self._aggregates
+
     def get_total_orders(self) -> int:
+        if self.folds_aggregates:
+            return self.get_folded_aggregates().orders_count
         if self.orders_df is None:
             self.load_orders()
         return len(self.orders_df)
 
     def get_total_revenue(self) -> float:
+        if self.folds_aggregates:
+            return self.get_folded_aggregates().total_revenue
+
         # prefer authoritative total in orders.csv if present
         if self.orders_df is None:
             try:
@@ -112,6 +510,8 @@ class DataAnalysisService:
         return float(self.order_details_df['subtotal'].sum())
 
     def get_total_quantity_sold(self) -> int:
+        if self.folds_aggregates:
+            return self.get_folded_aggregates().quantity_sold
         if self.order_details_df is None:
             self.load_order_details()
         return int(self.order_details_df['quantity'].sum())
@@ -123,35 +523,97 @@ class DataAnalysisService:
         total_revenue = self.get_total_revenue()
         return float(total_revenue / total_orders)
 
-    def get_revenue_over_time(self) -> pd.DataFrame:
-        """Return DataFrame with order_date and total revenue per date"""
+    def get_daily_rollup(self) -> DailyRollup:
+        """
+        Rollup theo ngày của orders (dùng chung giữa các request, cập nhật tăng dần)
+
+        Returns:
+            DailyRollup đã đồng bộ với orders_df
+        """
+        if self.folds_aggregates:
+            return self.get_folded_aggregates().daily
         if self.orders_df is None:
             self.load_orders()
+        variant = self.order_filter.key() if self.order_filter is not None else None
+        return rollups.get(self.orders_path, self.orders_df, variant=variant)
 
-        df = self.orders_df.copy()
-        if 'order_date' in df.columns:
-            df['order_date'] = pd.to_datetime(df['order_date'])
-            grouped = df.groupby(df['order_date'].dt.date)['total'].sum().reset_index()
-            grouped = grouped.sort_values('order_date')
-            return grouped
-        return pd.DataFrame(columns=['order_date', 'total'])
+    def get_revenue_over_time(self, granularity: str = 'day') -> pd.DataFrame:
+        """
+        Doanh thu theo thời gian, tính từ rollup
+
+        Args:
+            granularity: 'day', 'week' hoặc 'month'
 
-    def get_orders_per_day(self) -> pd.DataFrame:
+        Returns:
+            DataFrame với cột order_date và total
+        """
+        if self.folds_aggregates:
+            return self.get_daily_rollup().series('total', granularity)
         if self.orders_df is None:
             self.load_orders()
-        df = self.orders_df.copy()
-        df['order_date'] = pd.to_datetime(df['order_date'])
-        grouped = df.groupby(df['order_date'].dt.date).size().reset_index(name='orders')
-        grouped = grouped.sort_values('order_date')
-        return grouped
+
+        if 'order_date' not in self.orders_df.columns:
+            return pd.DataFrame(columns=['order_date', 'total'])
+        return self.get_daily_rollup().series('total', granularity)
+
+    def get_orders_per_day(self, granularity: str = 'day') -> pd.DataFrame:
+        """
+        Số đơn hàng theo thời gian, tính từ rollup
+
+        Args:
+            granularity: 'day', 'week' hoặc 'month'
+
+        Returns:
+            DataFrame với cột order_date và orders
+        """
+        return self.get_daily_rollup().series('orders', granularity)
 
     def get_top_products_by_revenue(self, n: int = 10) -> pd.DataFrame:
+        if self.folds_aggregates:
+            return self.get_folded_aggregates().top_products(n)
+        return self._product_revenue().nlargest(n).reset_index()
+
+    def _product_revenue(self) -> pd.Series:
+        """Doanh thu theo (product_id, product_name) từ order_details"""
         if self.order_details_df is None:
             self.load_order_details()
 
-        grouped = self.order_details_df.groupby(['product_id', 'product_name'])['subtotal'].sum().reset_index()
-        grouped = grouped.sort_values('subtotal', ascending=False).head(n)
-        return grouped
+        # observed=True: chỉ giữ các cặp (product_id, product_name) thực sự xuất hiện
+        return self.order_details_df.groupby(['product_id', 'product_name'], observed=True)['subtotal'].sum()
+
+    def compute_kpi_scalars(self) -> Dict[str, Any]:
+        """
+        Chỉ các KPI dạng số (không tính chuỗi thời gian / top sản phẩm)
+
+        Returns:
+            Dictionary tên chỉ số -> giá trị (cùng key với SqlAnalysisService)
+        """
+        self._prefetch()
+        total_orders = self.get_total_orders()
+        total_revenue = self.get_total_revenue()
+        return {
+            **self._product_scalars(),
+            'total_orders': total_orders,
+            'total_revenue': total_revenue,
+            'total_quantity_sold': self.get_total_quantity_sold(),
+            'avg_order_value': float(total_revenue / total_orders) if total_orders else 0.0
+        }
+
+    def _product_scalars(self) -> Dict[str, Any]:
+        """Thống kê products trong một lượt NumPy"""
+        if self.df is None:
+            self.load_data()
+
+        price = self.df['price'].to_numpy(dtype='float64')
+        quantity = self.df['quantity'].to_numpy(dtype='int64')
+        has_products = len(price) > 0
+        return {
+            'total_products': len(price),
+            'total_quantity': int(quantity.sum()),
+            'stock_value': float(price @ quantity) if has_products else 0.0,
+            'avg_price': float(price.mean()) if has_products else 0.0,
+            'avg_quantity': float(quantity.mean()) if has_products else 0.0
+        }
     
     def get_product_data(self) -> Tuple[List[str], List[int], List[float]]:
         """
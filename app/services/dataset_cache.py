@@ -0,0 +1,325 @@
+"""
+Dataset Cache - Cache DataFrame dùng chung cho toàn bộ process
+Mỗi file dữ liệu chỉ được parse một lần cho mỗi phiên bản (mtime + size);
+file bị sửa sẽ tự động được load lại ở request kế tiếp.
+"""
+import os
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Mặc định 256 MB cho toàn bộ các bảng đã parse
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Kích thước mỗi lần đọc khi hash phần đầu file
+_DIGEST_CHUNK_BYTES = 1024 * 1024
+
+FileVersion = Tuple[int, int]
+CacheKey = Tuple[Hashable, str, int, int]
+
+
+def file_version(path: str) -> FileVersion:
+    """
+    Lấy phiên bản của file dựa trên mtime (ns) và kích thước
+
+    Args:
+        path: Đường dẫn file
+
+    Returns:
+        Tuple (mtime_ns, size)
+
+    Raises:
+        FileNotFoundError: Nếu file không tồn tại
+    """
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _hash_range(h: 'hashlib._Hash', f: Any, length: int) -> int:
+    """Đưa tối đa length byte tiếp theo của f vào h, trả về số byte đã đọc"""
+    done = 0
+    while done < length:
+        chunk = f.read(min(_DIGEST_CHUNK_BYTES, length - done))
+        if not chunk:
+            break
+        h.update(chunk)
+        done += len(chunk)
+    return done
+
+
+def prefix_digest(path: str, end: int) -> bytes:
+    """
+    Hash của toàn bộ đoạn byte [0, end) của file
+
+    Args:
+        path: Đường dẫn file
+        end: Số byte đầu file được hash
+
+    Returns:
+        Digest của đoạn byte
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        _hash_range(h, f, end)
+    return h.digest()
+
+
+def appended_digest(path: str, old_end: int, old_digest: bytes, end: int) -> Optional[bytes]:
+    """
+    Kiểm tra file chỉ được nối thêm kể từ phiên bản có kích thước old_end
+
+    Toàn bộ old_end byte đầu được hash lại và so với old_digest (sửa tại chỗ
+    ở bất kỳ đâu, kể cả giữ nguyên kích thước, đều bị phát hiện); cùng lần đọc
+    đó tiếp tục hash tới end để làm digest cho lần kiểm tra sau. Chi phí là một
+    lần đọc tuần tự file, rẻ hơn nhiều so với parse lại.
+
+    Args:
+        path: Đường dẫn file
+        old_end: Kích thước phiên bản cũ
+        old_digest: prefix_digest (hoặc appended_digest) của phiên bản cũ
+        end: Kích thước hiện tại
+
+    Returns:
+        Digest của [0, end) nếu phần cũ không đổi, None nếu không phải chỉ nối thêm
+    """
+    if end < old_end:
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if _hash_range(h, f, old_end) != old_end or h.digest() != old_digest:
+            return None
+        if _hash_range(h, f, end - old_end) != end - old_end:
+            return None
+    return h.digest()
+
+
+def estimate_nbytes(value: Any) -> int:
+    """
+    Ước lượng bộ nhớ của một giá trị được cache
+
+    Args:
+        value: DataFrame/Series hoặc object bất kỳ
+
+    Returns:
+        Số byte ước lượng
+    """
+    memory_usage = getattr(value, 'memory_usage', None)
+    if callable(memory_usage):
+        usage = memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    """Một phần tử trong cache"""
+    __slots__ = ('value', 'nbytes')
+
+    def __init__(self, value: Any, nbytes: int):
+        self.value = value
+        self.nbytes = nbytes
+
+
+class DatasetCache:
+    """
+    Cache LRU thread-safe cho các DataFrame đã load từ file
+
+    Key gồm (namespace, đường dẫn tuyệt đối, mtime_ns, size) nên khi file
+    thay đổi, key mới sẽ miss và phiên bản cũ bị loại bỏ. Tổng bộ nhớ được
+    giới hạn bởi ``max_bytes``; vượt ngưỡng thì loại bỏ phần tử ít dùng nhất.
+
+    Giá trị trả về được chia sẻ giữa các request - caller không được sửa
+    trực tiếp (dùng ``.copy()`` / ``.assign()`` nếu cần thêm cột).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[CacheKey, _Entry]' = OrderedDict()
+        self._current: Dict[Tuple[Hashable, str], CacheKey] = {}
+        self._key_locks: Dict[CacheKey, threading.Lock] = {}
+        self._lock = threading.RLock()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app
+
+        Args:
+            app: Flask application
+        """
+        self.max_bytes = int(app.config.get('DATASET_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        app.extensions['dataset_cache'] = self
+        with self._lock:
+            self._evict()
+
+    def get_or_load(self, path: str, loader: Callable[[], Any], namespace: Hashable = 'csv') -> Any:
+        """
+        Trả về giá trị đã cache cho phiên bản hiện tại của file, hoặc gọi loader
+
+        Args:
+            path: Đường dẫn file nguồn (dùng để lấy mtime/size)
+            loader: Hàm không tham số thực hiện việc parse khi cache miss
+            namespace: Phân biệt các cách load khác nhau trên cùng một file
+
+        Returns:
+            Giá trị do loader tạo ra (có thể là bản đã cache)
+
+        Raises:
+            FileNotFoundError: Nếu file không tồn tại
+        """
+        abspath = os.path.abspath(path)
+        mtime_ns, size = file_version(abspath)
+        key: CacheKey = (namespace, abspath, mtime_ns, size)
+
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry.value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Chỉ một thread parse cho mỗi key, các thread khác chờ kết quả
+        with key_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry.value
+                self.misses += 1
+
+            try:
+                value = loader()
+                nbytes = estimate_nbytes(value)
+                with self._lock:
+                    self._store(key, value, nbytes)
+                return value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def get_or_create(self, namespace: Hashable, name: str, factory: Callable[[], Any]) -> Any:
+        """
+        Giá trị có trạng thái không gắn với một phiên bản file (vd. dataset tăng dần)
+
+        Giá trị được tính vào ngân sách bộ nhớ và LRU như các bảng khác; sau khi
+        giá trị lớn lên, gọi resize() để cập nhật kích thước.
+
+        Args:
+            namespace: Phân biệt loại giá trị
+            name: Tên của giá trị trong namespace
+            factory: Hàm không tham số tạo giá trị khi chưa có (gọi khi đang giữ khoá, phải rẻ)
+
+        Returns:
+            Giá trị đã có hoặc vừa tạo
+        """
+        key: CacheKey = (namespace, name, 0, 0)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry.value
+            self.misses += 1
+            value = factory()
+            self._store(key, value, estimate_nbytes(value))
+            return value
+
+    def resize(self, namespace: Hashable, name: str) -> None:
+        """
+        Tính lại kích thước của giá trị tạo bởi get_or_create rồi loại bỏ nếu vượt ngân sách
+
+        Args:
+            namespace: Namespace đã dùng với get_or_create
+            name: Tên đã dùng với get_or_create
+        """
+        key: CacheKey = (namespace, name, 0, 0)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            nbytes = estimate_nbytes(entry.value)
+            self._nbytes += nbytes - entry.nbytes
+            entry.nbytes = nbytes
+            self._evict(keep=key)
+
+    def discard(self, namespace: Hashable, name: str) -> None:
+        """
+        Bỏ giá trị tạo bởi get_or_create
+
+        Args:
+            namespace: Namespace đã dùng với get_or_create
+            name: Tên đã dùng với get_or_create
+        """
+        with self._lock:
+            self._remove((namespace, name, 0, 0))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Thống kê hoạt động của cache
+
+        Returns:
+            Dictionary gồm hits, misses, evictions, entries, bytes, max_bytes
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._nbytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def clear(self) -> None:
+        """Xoá toàn bộ cache và reset bộ đếm"""
+        with self._lock:
+            self._entries.clear()
+            self._current.clear()
+            self._nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def _lookup(self, key: CacheKey) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def _store(self, key: CacheKey, value: Any, nbytes: int) -> None:
+        # Bỏ phiên bản cũ của cùng file/namespace
+        slot = (key[0], key[1])
+        stale = self._current.get(slot)
+        if stale is not None and stale != key:
+            self._remove(stale)
+        self._current[slot] = key
+
+        self._entries[key] = _Entry(value, nbytes)
+        self._nbytes += nbytes
+        self._evict(keep=key)
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._nbytes -= entry.nbytes
+            slot = (key[0], key[1])
+            if self._current.get(slot) == key:
+                del self._current[slot]
+
+    def _evict(self, keep: Optional[CacheKey] = None) -> None:
+        while self._nbytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                # Một bảng lớn hơn cả ngân sách vẫn được giữ tạm
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(oldest)
+                continue
+            self._remove(oldest)
+            self.evictions += 1
+
+
+# Instance dùng chung cho toàn bộ process
+dataset_cache = DatasetCache()
@@ -0,0 +1,306 @@
+"""
+Dataset Store - Bảng đã parse dùng chung giữa các worker process
+Mỗi bảng được parse một lần vào file Arrow (một chunk mỗi cột) rồi mọi worker
+memory-map cùng file đó: các trang nhớ thuộc page cache nên RSS không nhân theo
+số worker. manifest.json (ghi nguyên tử) trỏ tới phiên bản hiện tại của từng bảng.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import pandas as pd
+
+from app.services.dataset_cache import file_version
+from app.services.schema import SCHEMA_VERSION, read_csv_options
+from app.services.snapshot import (
+    DEFAULT_INSTANCE_PATH, SnapshotManager, read_ipc, snapshots, to_arrow, write_ipc
+)
+from app.services.timing import stage
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: chỉ khoá giữa các thread
+    fcntl = None
+
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = '.lock'               # khoá manifest (chỉ giữ trong lúc đọc - sửa - ghi)
+TABLE_LOCK_NAME = '.{table}.lock'  # khoá build của từng bảng
+MANIFEST_FORMAT = 1
+
+# Số lần đọc lại manifest khi file phiên bản vừa bị thay (worker khác publish)
+_ATTACH_RETRIES = 3
+
+
+class DatasetStore(SnapshotManager):
+    """
+    Snapshot dùng chung giữa các process: file có phiên bản + manifest + khoá ghi
+
+    Worker đầu tiên thấy bảng cũ sẽ giữ khoá file của bảng đó, parse và publish
+    phiên bản mới (file `<bảng>-<generation>.arrow` rồi manifest); các worker khác
+    chờ khoá rồi attach vào cùng file, không parse lại. Các bảng khác nhau build
+    song song - khoá manifest chỉ giữ trong lúc cập nhật manifest. Cùng API đọc với SnapshotManager nên
+    đọc theo khoảng ngày (order_filter) và duyệt theo batch (streaming) cũng
+    dùng file của store. Mỗi bảng giữ thêm file của phiên bản ngay trước đó cho
+    worker đang đọc dở; phiên bản cũ hơn bị xoá (vùng nhớ đã map vẫn đọc được).
+    """
+
+    def __init__(self, store_dir: Optional[str] = None, snapshot_manager: Optional[SnapshotManager] = None):
+        """
+        Args:
+            store_dir: Thư mục chứa manifest và các file bảng (None: <instance>/dataset_store)
+            snapshot_manager: Snapshot riêng của process, dùng lại khi build nếu còn mới
+        """
+        super().__init__(snapshot_dir=store_dir or os.path.join(DEFAULT_INSTANCE_PATH, 'dataset_store'))
+        self.enabled = False
+        self.source_snapshots = snapshot_manager if snapshot_manager is not None else snapshots
+        self.attaches = 0
+        self.builds = 0
+        self.lock_waits = 0
+        self._thread_locks: Dict[str, threading.Lock] = {}
+        self._thread_locks_guard = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app (DATASET_STORE_ENABLED, DATASET_STORE_DIR)
+
+        Args:
+            app: Flask application
+        """
+        self.snapshot_dir = app.config.get('DATASET_STORE_DIR') or os.path.join(app.instance_path, 'dataset_store')
+        self.enabled = bool(app.config.get('DATASET_STORE_ENABLED', False)) and self.available
+        app.extensions['dataset_store'] = self
+
+    def manifest(self) -> Dict[str, Any]:
+        """
+        Manifest hiện tại
+
+        Returns:
+            {'format', 'generation', 'tables': {bảng: {file, previous, source,
+            source_version, schema, rows, bytes, generation, created}}}
+        """
+        try:
+            with open(os.path.join(self.snapshot_dir, MANIFEST_NAME), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {'format': MANIFEST_FORMAT, 'generation': 0, 'tables': {}}
+        if manifest.get('format') != MANIFEST_FORMAT:
+            return {'format': MANIFEST_FORMAT, 'generation': int(manifest.get('generation', 0)), 'tables': {}}
+        return manifest
+
+    def path_for(self, csv_path: str) -> str:
+        """
+        File của phiên bản hiện tại (trong manifest) của bảng có nguồn csv_path
+
+        Args:
+            csv_path: Đường dẫn CSV nguồn
+
+        Returns:
+            Đường dẫn file .arrow (không tồn tại nếu bảng chưa được publish)
+        """
+        entry = self._entry_for(csv_path, self.manifest())
+        name = entry['file'] if entry is not None else os.path.basename(csv_path) + '.missing'
+        return os.path.join(self.snapshot_dir, name)
+
+    def is_fresh(self, csv_path: str) -> bool:
+        """
+        Phiên bản trong manifest được tạo từ đúng phiên bản CSV hiện tại
+
+        Args:
+            csv_path: Đường dẫn CSV nguồn
+
+        Returns:
+            True nếu có thể đọc store thay cho CSV
+        """
+        if not self.available:
+            return False
+        entry = self._fresh(self._entry_for(csv_path, self.manifest()), csv_path)
+        return entry is not None and os.path.exists(os.path.join(self.snapshot_dir, entry['file']))
+
+    def load(self, table: str, csv_path: str) -> pd.DataFrame:
+        """
+        DataFrame của bảng từ phiên bản trong store (build nếu cũ hoặc chưa có)
+
+        Args:
+            table: Tên bảng trong schema
+            csv_path: Đường dẫn CSV nguồn
+
+        Returns:
+            DataFrame trỏ vào file memory-map (chỉ đọc)
+        """
+        for _ in range(_ATTACH_RETRIES):
+            entry = self._fresh(self.manifest().get('tables', {}).get(table), csv_path)
+            if entry is None:
+                entry = self.publish(table, csv_path)
+            try:
+                with stage(f'parse.{table}.attach'):
+                    df = read_ipc(os.path.join(self.snapshot_dir, entry['file']))
+            except FileNotFoundError:
+                # File vừa bị xoá bởi các lần publish khác: đọc lại manifest
+                continue
+            self.attaches += 1
+            return df
+        raise FileNotFoundError(f"Dataset store: không attach được bảng {table}")
+
+    def convert(self, table: str, csv_path: str, df: Optional[pd.DataFrame] = None) -> str:
+        """
+        Build lại bảng và publish phiên bản mới (dùng bởi convert_all / --force)
+
+        Args:
+            table: Tên bảng trong schema
+            csv_path: Đường dẫn CSV nguồn
+            df: DataFrame đã đọc sẵn theo schema (None: đọc lại)
+
+        Returns:
+            Đường dẫn file của phiên bản mới
+        """
+        entry = self.publish(table, csv_path, force=True, df=df)
+        return os.path.join(self.snapshot_dir, entry['file'])
+
+    def publish(self, table: str, csv_path: str, force: bool = False,
+                df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        Parse bảng và publish phiên bản mới (bỏ qua nếu worker khác vừa publish)
+
+        Args:
+            table: Tên bảng trong schema
+            csv_path: Đường dẫn CSV nguồn
+            force: Build lại kể cả khi phiên bản hiện tại còn mới
+            df: DataFrame đã đọc sẵn theo schema (None: snapshot riêng nếu còn mới, nếu không thì CSV)
+
+        Returns:
+            Entry của bảng trong manifest
+
+        Raises:
+            RuntimeError: Nếu chưa cài pyarrow
+        """
+        if not self.available:
+            raise RuntimeError("pyarrow is required for the dataset store")
+
+        with self._locked(TABLE_LOCK_NAME.format(table=table)):
+            previous = self.manifest().get('tables', {}).get(table)
+            if not force:
+                entry = self._fresh(previous, csv_path)
+                if entry is not None:
+                    return entry
+
+            # Giữ trước số generation để file của các bảng build song song không trùng tên
+            with self._locked(LOCK_NAME):
+                manifest = self.manifest()
+                generation = int(manifest.get('generation', 0)) + 1
+                manifest['generation'] = generation
+                self._write_manifest(manifest)
+
+            # Lấy phiên bản trước khi đọc để CSV bị sửa giữa chừng sẽ bị coi là cũ
+            source_version = file_version(csv_path)
+            name = f'{table}-{generation:08d}.arrow'
+            with stage(f'parse.{table}.store'):
+                if df is None and self.source_snapshots.is_fresh(csv_path):
+                    df = self.source_snapshots.read(csv_path)
+                elif df is None:
+                    df = pd.read_csv(csv_path, **read_csv_options(table))
+                write_ipc(os.path.join(self.snapshot_dir, name), to_arrow(table, df))
+
+            entry = {
+                'file': name,
+                'previous': previous['file'] if previous else None,
+                'source': os.path.abspath(csv_path),
+                'source_version': list(source_version),
+                'schema': SCHEMA_VERSION,
+                'rows': int(len(df)),
+                'bytes': os.path.getsize(os.path.join(self.snapshot_dir, name)),
+                'generation': generation,
+                'created': time.time(),
+            }
+            with self._locked(LOCK_NAME):
+                # Đọc lại: bảng khác có thể vừa publish trong lúc bảng này build
+                manifest = self.manifest()
+                manifest.setdefault('tables', {})[table] = entry
+                self._write_manifest(manifest)
+            self._remove_unreferenced(table, entry)
+            self.builds += 1
+            return entry
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Thống kê của store và của process hiện tại
+
+        Returns:
+            Dict gồm generation của manifest, số bảng, tổng bytes các file,
+            số lần attach / build / chờ khoá của process
+        """
+        manifest = self.manifest()
+        tables = manifest.get('tables', {})
+        return {
+            'generation': int(manifest.get('generation', 0)),
+            'tables': len(tables),
+            'bytes': sum(int(entry.get('bytes', 0)) for entry in tables.values()),
+            'attaches': self.attaches,
+            'builds': self.builds,
+            'lock_waits': self.lock_waits,
+        }
+
+    @staticmethod
+    def _entry_for(csv_path: str, manifest: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        source = os.path.abspath(csv_path)
+        for entry in manifest.get('tables', {}).values():
+            if entry.get('source') == source:
+                return entry
+        return None
+
+    @staticmethod
+    def _fresh(entry: Optional[Dict[str, Any]], csv_path: str) -> Optional[Dict[str, Any]]:
+        if entry is None or entry.get('schema') != SCHEMA_VERSION:
+            return None
+        if entry.get('source') != os.path.abspath(csv_path):
+            return None
+        if tuple(entry.get('source_version', ())) != file_version(csv_path):
+            return None
+        return entry
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        path = os.path.join(self.snapshot_dir, MANIFEST_NAME)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        # Reader luôn thấy manifest cũ hoặc mới, không bao giờ thấy file ghi dở
+        os.replace(tmp_path, path)
+
+    def _remove_unreferenced(self, table: str, entry: Dict[str, Any]) -> None:
+        # Chỉ xoá file của bảng này (giữ khoá của bảng): file của bảng khác có thể đang được ghi
+        keep = {name for name in (entry.get('file'), entry.get('previous')) if name}
+        for name in os.listdir(self.snapshot_dir):
+            if name.endswith('.arrow') and name.rsplit('-', 1)[0] == table and name not in keep:
+                try:
+                    # Worker đang map file cũ vẫn giữ được vùng nhớ sau khi xoá
+                    os.remove(os.path.join(self.snapshot_dir, name))
+                except OSError:
+                    pass
+
+    @contextmanager
+    def _locked(self, lock_name: str) -> Iterator[None]:
+        """Khoá lock_name giữa các process (flock) và giữa các thread của process này"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        with self._thread_locks_guard:
+            thread_lock = self._thread_locks.setdefault(lock_name, threading.Lock())
+        with thread_lock:
+            if fcntl is None:  # pragma: no cover
+                yield
+                return
+            with open(os.path.join(self.snapshot_dir, lock_name), 'a+') as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Worker khác đang build bảng này (hoặc ghi manifest): chờ rồi dùng lại kết quả
+                    self.lock_waits += 1
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# Instance dùng chung cho toàn bộ process
+dataset_store = DatasetStore()
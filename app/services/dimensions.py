@@ -0,0 +1,214 @@
+"""
+Dimension Joins - Gộp doanh thu theo categories / suppliers / users không cần merge
+Mỗi bảng danh mục được đánh số dòng một lần; khoá của bảng sự kiện (categorical)
+được ánh xạ sang số dòng qua tập category nhỏ rồi cộng dồn bằng np.bincount.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Nhãn cho các dòng sự kiện có khoá không tồn tại trong bảng danh mục
+UNKNOWN_LABEL = 'Không xác định'
+
+
+@dataclass(frozen=True)
+class Dimension:
+    """Một chiều phân tích"""
+    table: str                  # bảng danh mục (categories, suppliers, users)
+    key: str                    # cột khoá
+    label: str                  # cột tên hiển thị
+    via_products: bool          # nối qua products (category_id / supplier_id) hay trực tiếp từ orders
+
+
+DIMENSIONS: Dict[str, Dimension] = {
+    'category': Dimension('categories', 'category_id', 'category_name', via_products=True),
+    'supplier': Dimension('suppliers', 'supplier_id', 'supplier_name', via_products=True),
+    'customer': Dimension('users', 'user_id', 'full_name', via_products=False),
+}
+
+
+def key_codes(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Mã số nguyên của một cột khoá (dùng lại codes nếu cột đã là categorical)
+
+    Args:
+        values: Cột khoá
+
+    Returns:
+        Tuple (codes int, -1 cho giá trị thiếu; các giá trị khác nhau theo thứ tự code)
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+
+def grouped_sum(codes: np.ndarray, size: int, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Tổng theo nhóm bằng np.bincount (bỏ qua code âm)
+
+    Args:
+        codes: Nhóm của từng dòng
+        size: Số nhóm
+        weights: Giá trị cộng dồn (None: đếm số dòng)
+
+    Returns:
+        Mảng float64 độ dài size
+    """
+    valid = codes >= 0
+    if weights is not None:
+        weights = np.asarray(weights, dtype='float64')[valid]
+    return np.bincount(codes[valid], weights=weights, minlength=size).astype('float64', copy=False)
+
+
+class DimensionIndex:
+    """Bảng danh mục đã đánh số dòng: khoá -> vị trí, vị trí -> nhãn"""
+
+    def __init__(self, df: pd.DataFrame, dimension: Dimension):
+        """
+        Args:
+            df: Bảng danh mục
+            dimension: Định nghĩa chiều
+        """
+        self.dimension = dimension
+        keys = df[dimension.key].astype(str)
+        # Khoá trùng: giữ dòng đầu tiên để get_indexer dùng được
+        first = ~keys.duplicated().to_numpy()
+        self.keys = pd.Index(keys.to_numpy(dtype=object)[first])
+        self.labels = df[dimension.label].astype(str).to_numpy(dtype=object)[first]
+
+    @property
+    def size(self) -> int:
+        return len(self.keys)
+
+    @property
+    def nbytes(self) -> int:
+        """Ước lượng bộ nhớ (cho DatasetCache)"""
+        return int(self.keys.memory_usage(deep=True) + sum(len(label) + 49 for label in self.labels))
+
+    def rows_for(self, keys: pd.Index) -> np.ndarray:
+        """
+        Vị trí dòng của từng khoá (-1 nếu không có)
+
+        Args:
+            keys: Các khoá khác nhau (thường là categories của một cột)
+
+        Returns:
+            Mảng int64 cùng độ dài keys
+        """
+        return self.keys.get_indexer(pd.Index(keys).astype(str))
+
+
+class ProductJoin:
+    """Bảng nối dựng sẵn: product_id -> dòng products -> dòng của bảng danh mục"""
+
+    def __init__(self, products: pd.DataFrame, index: DimensionIndex):
+        """
+        Args:
+            products: Bảng products (có product_id và cột khoá của chiều)
+            index: DimensionIndex của categories hoặc suppliers
+        """
+        keys = products['product_id'].astype(str)
+        first = ~keys.duplicated().to_numpy()
+        self.product_keys = pd.Index(keys.to_numpy(dtype=object)[first])
+
+        codes, categories = key_codes(products[index.dimension.key])
+        mapping = index.rows_for(categories)
+        self.rows = np.where(codes >= 0, mapping[codes], -1).astype('int32')[first]
+
+    @property
+    def nbytes(self) -> int:
+        """Ước lượng bộ nhớ (cho DatasetCache)"""
+        return int(self.product_keys.memory_usage(deep=True) + self.rows.nbytes)
+
+    def rows_for(self, product_ids: pd.Index) -> np.ndarray:
+        """
+        Dòng danh mục của từng product_id (-1 nếu sản phẩm hoặc khoá không tồn tại)
+
+        Args:
+            product_ids: Các product_id khác nhau
+
+        Returns:
+            Mảng int64 cùng độ dài product_ids
+        """
+        positions = self.product_keys.get_indexer(pd.Index(product_ids).astype(str))
+        return np.where(positions >= 0, self.rows[positions], -1)
+
+
+def reduce_to_dimension(
+    fact_keys: pd.Series,
+    weights: np.ndarray,
+    key_rows: Callable[[pd.Index], np.ndarray],
+    size: int,
+    counts: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, float, float]:
+    """
+    Cộng dồn bảng sự kiện theo chiều: bincount theo code của khoá, ánh xạ từng
+    code (tập nhỏ) sang dòng danh mục rồi bincount lần nữa
+
+    Args:
+        fact_keys: Cột khoá của bảng sự kiện (product_id hoặc user_id)
+        weights: Giá trị cần cộng (subtotal / total)
+        key_rows: Hàm nhận các khoá khác nhau, trả về dòng danh mục tương ứng
+        size: Số dòng của bảng danh mục
+        counts: Số đếm của từng dòng sự kiện (None: mỗi dòng là 1)
+
+    Returns:
+        Tuple (tổng theo dòng danh mục, số đếm theo dòng danh mục,
+        tổng không khớp, số đếm không khớp)
+    """
+    codes, categories = key_codes(fact_keys)
+    per_key = grouped_sum(codes, len(categories), weights)
+    per_key_count = grouped_sum(codes, len(categories), counts)
+
+    rows = np.asarray(key_rows(categories), dtype='int64')
+    matched = rows >= 0
+    totals = grouped_sum(rows, size, per_key)
+    order_counts = grouped_sum(rows, size, per_key_count)
+    return totals, order_counts, float(per_key[~matched].sum()), float(per_key_count[~matched].sum())
+
+
+def breakdown_frame(
+    index: DimensionIndex,
+    totals: np.ndarray,
+    counts: np.ndarray,
+    unmatched: float,
+    unmatched_count: float,
+    count_column: Optional[str] = None,
+    n: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    DataFrame kết quả, sắp xếp giảm dần theo doanh thu
+
+    Args:
+        index: DimensionIndex của chiều
+        totals: Doanh thu theo dòng danh mục
+        counts: Số đếm theo dòng danh mục
+        unmatched: Doanh thu của khoá không tồn tại trong danh mục
+        unmatched_count: Số đếm của khoá không tồn tại
+        count_column: Tên cột số đếm (vd. 'orders'; None: không có cột đếm)
+        n: Chỉ giữ n dòng đầu (None: tất cả dòng có phát sinh)
+
+    Returns:
+        DataFrame [key, label, revenue, (count_column)]
+    """
+    dimension = index.dimension
+    present = np.flatnonzero((totals != 0) | (counts != 0))
+    order = present[np.argsort(-totals[present], kind='stable')]
+    data = {
+        dimension.key: index.keys.to_numpy()[order],
+        dimension.label: index.labels[order],
+        'revenue': totals[order],
+    }
+    unknown = {dimension.key: '', dimension.label: UNKNOWN_LABEL, 'revenue': unmatched}
+    if count_column:
+        data[count_column] = counts[order].astype('int64')
+        unknown[count_column] = int(unmatched_count)
+
+    df = pd.DataFrame(data)
+    if unmatched or unmatched_count:
+        df = pd.concat([df, pd.DataFrame([unknown])], ignore_index=True)
+        df = df.sort_values('revenue', ascending=False, kind='stable', ignore_index=True)
+    return df.head(n) if n is not None else df
@@ -0,0 +1,141 @@
+"""
+Downsampling - Giới hạn số điểm gửi xuống biểu đồ
+Chuỗi thời gian được rút gọn kiểu LTTB (giữ hình dạng, đỉnh và đáy); biểu đồ
+theo nhóm giữ top-N và gộp phần còn lại vào một mục "Khác".
+"""
+import warnings
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+OTHER_LABEL = 'Khác'
+
+
+def numeric_axis(x: Sequence[Any]) -> np.ndarray:
+    """
+    Trục X dạng số để tính diện tích tam giác
+
+    Args:
+        x: Số, ngày / datetime hoặc chuỗi ngày; giá trị khác dùng vị trí
+
+    Returns:
+        Mảng float64 cùng độ dài x
+    """
+    try:
+        return np.asarray(x, dtype='float64')
+    except (TypeError, ValueError):
+        pass
+    try:
+        with warnings.catch_warnings():
+            # Nhãn không phải ngày: pandas cảnh báo trước khi báo lỗi
+            warnings.simplefilter('ignore', UserWarning)
+            return pd.to_datetime(pd.Index(x)).asi8.astype('float64')
+    except (TypeError, ValueError):
+        return np.arange(len(x), dtype='float64')
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Vị trí các điểm được giữ theo Largest-Triangle-Three-Buckets
+
+    Điểm đầu và cuối luôn được giữ; phần giữa chia thành threshold - 2 bucket,
+    mỗi bucket giữ điểm tạo tam giác lớn nhất với trung bình của bucket trước
+    và bucket sau. Dùng trung bình bucket trước (thay vì điểm vừa chọn như LTTB
+    gốc) để mọi bucket được tính cùng lúc bằng NumPy, không cần vòng lặp.
+
+    Args:
+        x: Trục X (tăng dần)
+        y: Giá trị
+        threshold: Số điểm tối đa (>= 3)
+
+    Returns:
+        Mảng vị trí tăng dần (độ dài min(len(x), threshold))
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.nan_to_num(np.asarray(y, dtype='float64'))
+    buckets = threshold - 2
+    # Biên các bucket trên các điểm 1 .. n-2
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    sizes = np.diff(edges)
+    starts = edges[:-1]
+
+    avg_x = np.add.reduceat(x[1:n - 1], starts - 1) / sizes
+    avg_y = np.add.reduceat(y[1:n - 1], starts - 1) / sizes
+    a_x = np.concatenate(([x[0]], avg_x[:-1]))
+    a_y = np.concatenate(([y[0]], avg_y[:-1]))
+    c_x = np.concatenate((avg_x[1:], [x[-1]]))
+    c_y = np.concatenate((avg_y[1:], [y[-1]]))
+
+    bucket = np.repeat(np.arange(buckets), sizes)
+    px, py = x[1:n - 1], y[1:n - 1]
+    area = np.abs((a_x[bucket] - c_x[bucket]) * (py - a_y[bucket])
+                  - (a_x[bucket] - px) * (c_y[bucket] - a_y[bucket]))
+
+    # Điểm đầu tiên đạt diện tích lớn nhất trong mỗi bucket
+    best = np.maximum.reduceat(area, starts - 1)
+    candidates = np.flatnonzero(area == best[bucket])
+    _, first = np.unique(bucket[candidates], return_index=True)
+    chosen = candidates[first] + 1
+    return np.concatenate(([0], chosen, [n - 1]))
+
+
+def downsample_series(x: Sequence[Any], y: Sequence[float], max_points: int) -> Tuple[List[Any], List[float]]:
+    """
+    Rút gọn một chuỗi (giữ nguyên nếu đã đủ nhỏ)
+
+    Args:
+        x: Trục X theo thứ tự
+        y: Giá trị
+        max_points: Số điểm tối đa (<= 0: không giới hạn)
+
+    Returns:
+        Tuple (x, y) đã rút gọn
+    """
+    if max_points <= 0 or len(y) <= max_points:
+        return list(x), list(y)
+    keep = lttb_indices(numeric_axis(x), np.asarray(y, dtype='float64'), max(max_points, 3))
+    x_values, y_values = list(x), list(y)
+    return [x_values[i] for i in keep], [y_values[i] for i in keep]
+
+
+def top_n_other(
+    labels: Sequence[Any],
+    values: Sequence[float],
+    max_items: int,
+    other_label: str = OTHER_LABEL
+) -> Tuple[List[Any], List[float]]:
+    """
+    Giữ max_items - 1 mục lớn nhất và gộp phần còn lại vào một mục
+
+    Thứ tự của các mục được giữ không đổi; mục gộp đứng cuối.
+
+    Args:
+        labels: Nhãn
+        values: Giá trị (cộng được)
+        max_items: Số mục tối đa kể cả mục gộp (<= 0: không giới hạn)
+        other_label: Nhãn của mục gộp
+
+    Returns:
+        Tuple (labels, values)
+    """
+    if max_items <= 0 or len(values) <= max_items:
+        return list(labels), list(values)
+    arr = np.nan_to_num(np.asarray(values, dtype='float64'))
+    keep_count = max(max_items - 1, 1)
+    top = np.sort(np.argpartition(-arr, keep_count - 1)[:keep_count])
+    rest = np.ones(len(arr), dtype=bool)
+    rest[top] = False
+
+    label_values = list(labels)
+    value_list = list(values)
+    other = arr[rest].sum()
+    if np.issubdtype(np.asarray(values).dtype, np.integer):
+        other = int(other)
+    else:
+        other = float(other)
+    return [label_values[i] for i in top] + [other_label], [value_list[i] for i in top] + [other]
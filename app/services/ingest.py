@@ -0,0 +1,277 @@
+"""
+Incremental Ingestion - Đồng bộ orders / order_details theo phần được nối thêm
+Mỗi file được theo dõi bằng byte offset đã đọc và digest của toàn bộ phần đã
+đọc; khi file chỉ được nối thêm (phần cũ không đổi một byte nào), chỉ các byte
+mới được parse và gộp vào frame đã cache cùng mọi chỉ số dẫn xuất (tổng, chuỗi
+theo ngày, doanh thu theo sản phẩm). Mọi sửa đổi trong phần cũ - kể cả giữ
+nguyên kích thước - dẫn tới load lại toàn bộ.
+Ghi chú: bên ghi phải nối thêm nguyên dòng (mỗi lần ghi là các dòng hoàn chỉnh).
+"""
+import io
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Set
+
+import pandas as pd
+
+from app.services.dataset_cache import (
+    DatasetCache, appended_digest, dataset_cache, file_version, prefix_digest
+)
+from app.services.load_pool import load_pool
+from app.services.rollups import DailyRollup
+from app.services.schema import apply_dtypes, read_csv_options
+from app.services.streaming import StreamingAggregates
+
+# Số lần load lại toàn bộ khi file bị ghi thêm trong lúc đang load
+_RELOAD_ATTEMPTS = 3
+
+
+@dataclass
+class SyncResult:
+    """Kết quả một lần đồng bộ file"""
+    new_rows: Optional[pd.DataFrame]
+    reloaded: bool
+
+
+class IncrementalTable:
+    """Một bảng CSV được giữ đồng bộ bằng cách chỉ parse phần nối thêm"""
+
+    def __init__(self, table: str, path: str, full_loader: Callable[[], pd.DataFrame]):
+        """
+        Args:
+            table: Tên bảng trong schema
+            path: Đường dẫn CSV
+            full_loader: Hàm load toàn bộ bảng (snapshot hoặc CSV)
+        """
+        self.table = table
+        self.path = path
+        self.full_loader = full_loader
+        self.offset = 0
+        self.digest = b''
+        self.mtime_ns = 0
+        self.header = b''
+        self.nbytes = 0
+        self._parts: List[pd.DataFrame] = []
+        self.appends = 0
+        self.reloads = 0
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Toàn bộ bảng (các phần nối thêm được ghép lại khi cần)"""
+        if len(self._parts) > 1:
+            self._parts = [apply_dtypes(pd.concat(self._parts, ignore_index=True), self.table)]
+        return self._parts[0]
+
+    def sync(self) -> SyncResult:
+        """
+        Đồng bộ với file trên đĩa
+
+        Returns:
+            SyncResult: các dòng mới (nếu chỉ nối thêm) hoặc reloaded=True
+        """
+        mtime_ns, size = file_version(self.path)
+        if self._parts and size == self.offset and mtime_ns == self.mtime_ns:
+            return SyncResult(new_rows=None, reloaded=False)
+
+        # Chỉ nối thêm khi toàn bộ offset byte đã đọc vẫn y nguyên (hash lại cả phần đầu)
+        digest = None
+        if self._parts and self.offset >= 0:
+            digest = appended_digest(self.path, self.offset, self.digest, size)
+        if digest is not None:
+            new_rows = self._read_range(self.offset, size)
+            if not new_rows.empty:
+                self._parts.append(new_rows)
+                self.nbytes += int(new_rows.memory_usage(deep=True).sum())
+                self.appends += 1
+            self._mark(mtime_ns, size, digest)
+            return SyncResult(new_rows=new_rows, reloaded=False)
+
+        for _ in range(_RELOAD_ATTEMPTS):
+            frame = self.full_loader()
+            # Dòng nối thêm trong lúc loader chạy có thể đã nằm trong frame: chỉ ghi
+            # nhận offset khi file không đổi suốt lần load, nếu không thì load lại
+            loaded_version = file_version(self.path)
+            if loaded_version == (mtime_ns, size):
+                break
+            mtime_ns, size = loaded_version
+        else:
+            # File vẫn đang được ghi: giữ frame nhưng không ghi nhận offset để lần sync sau load lại
+            mtime_ns, size = 0, -1
+
+        self._parts = [frame]
+        self.nbytes = int(frame.memory_usage(deep=True).sum())
+        with open(self.path, 'rb') as f:
+            self.header = f.readline()
+        self.reloads += 1
+        self._mark(mtime_ns, size)
+        return SyncResult(new_rows=None, reloaded=True)
+
+    def _mark(self, mtime_ns: int, size: int, digest: Optional[bytes] = None) -> None:
+        self.offset = size
+        self.mtime_ns = mtime_ns
+        if digest is None:
+            # size < 0: không có offset hợp lệ, lần sync sau luôn load lại toàn bộ
+            digest = prefix_digest(self.path, size) if size >= 0 else b''
+        self.digest = digest
+
+    def _read_range(self, start: int, end: int) -> pd.DataFrame:
+        """Parse các byte [start, end) của file, dùng lại dòng header đã lưu"""
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        # Dòng trống (file cũ không có newline cuối) được read_csv bỏ qua
+        return pd.read_csv(io.BytesIO(self.header + data), **read_csv_options(self.table))
+
+
+class IncrementalDataset:
+    """Cặp orders / order_details cùng các chỉ số được gộp dần"""
+
+    def __init__(
+        self,
+        orders: IncrementalTable,
+        order_details: IncrementalTable,
+        dimensions: Sequence[str] = ('status',)
+    ):
+        self.orders = orders
+        self.order_details = order_details
+        self.dimensions = tuple(dimensions)
+        self.aggregates = StreamingAggregates(daily=DailyRollup(self.dimensions))
+        self._lock = threading.Lock()
+
+    def sync(self) -> StreamingAggregates:
+        """
+        Đồng bộ cả hai file và gộp phần mới vào các chỉ số
+
+        Returns:
+            StreamingAggregates đã cập nhật
+        """
+        with self._lock:
+            # Hai file độc lập: đồng bộ song song trên load pool
+            synced = load_pool.run({'orders': self.orders.sync, 'order_details': self.order_details.sync})
+            orders, details = synced['orders'], synced['order_details']
+            if orders.reloaded or details.reloaded:
+                # File bị ghi đè: tổng hợp lại từ các frame đầy đủ
+                aggregates = StreamingAggregates(daily=DailyRollup(self.dimensions))
+                aggregates.add_orders(self.orders.frame)
+                aggregates.add_order_details(self.order_details.frame)
+                self.aggregates = aggregates
+                return aggregates
+
+            # Chỉ nối thêm: chi phí tỉ lệ với số dòng mới
+            if orders.new_rows is not None and not orders.new_rows.empty:
+                self.aggregates.add_orders(orders.new_rows)
+            if details.new_rows is not None and not details.new_rows.empty:
+                self.aggregates.add_order_details(details.new_rows)
+            return self.aggregates
+
+    def memory_usage(self, deep: bool = True) -> int:
+        """Bộ nhớ của các frame đã đọc (dùng bởi DatasetCache để tính ngân sách)"""
+        return self.orders.nbytes + self.order_details.nbytes
+
+    def frame(self, table: str) -> pd.DataFrame:
+        """
+        Frame đầy đủ của một bảng (gọi sau sync)
+
+        Args:
+            table: 'orders' hoặc 'order_details'
+
+        Returns:
+            DataFrame (dùng chung, không sửa trực tiếp)
+        """
+        with self._lock:
+            return (self.orders if table == 'orders' else self.order_details).frame
+
+
+# Namespace của các dataset tăng dần trong DatasetCache
+CACHE_NAMESPACE = 'ingest'
+
+
+class IngestRegistry:
+    """
+    Giữ một IncrementalDataset cho mỗi cặp file, dùng chung giữa các request
+
+    Dataset nằm trong DatasetCache (ngân sách DATASET_CACHE_MAX_BYTES và LRU như
+    các bảng khác): bị loại bỏ thì lần sync kế tiếp load lại toàn bộ.
+    """
+
+    def __init__(self, enabled: bool = False, cache: Optional[DatasetCache] = None):
+        """
+        Args:
+            enabled: Bật đồng bộ tăng dần
+            cache: Cache chứa các dataset (mặc định dataset_cache dùng chung)
+        """
+        self.enabled = enabled
+        self.cache = cache if cache is not None else dataset_cache
+        self._names: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app
+
+        Args:
+            app: Flask application
+        """
+        self.enabled = bool(app.config.get('INCREMENTAL_INGEST', False))
+        self.clear()
+        app.extensions['ingest'] = self
+
+    def dataset(
+        self,
+        orders_path: str,
+        order_details_path: str,
+        loader: Callable[[str, str], pd.DataFrame],
+        dimensions: Sequence[str] = ('status',)
+    ) -> IncrementalDataset:
+        """
+        Lấy (hoặc tạo) dataset tăng dần cho một cặp file
+
+        Args:
+            orders_path: Đường dẫn orders CSV
+            order_details_path: Đường dẫn order_details CSV
+            loader: Hàm (table, path) -> DataFrame đầy đủ, dùng khi load lại
+            dimensions: Chiều phụ của rollup theo ngày
+
+        Returns:
+            IncrementalDataset (chưa sync)
+        """
+        name = self._name(orders_path, order_details_path, dimensions)
+        with self._lock:
+            self._names.add(name)
+        return self.cache.get_or_create(CACHE_NAMESPACE, name, lambda: IncrementalDataset(
+            IncrementalTable('orders', orders_path, lambda: loader('orders', orders_path)),
+            IncrementalTable('order_details', order_details_path,
+                             lambda: loader('order_details', order_details_path)),
+            dimensions
+        ))
+
+    def synced(self, dataset: IncrementalDataset) -> StreamingAggregates:
+        """
+        Sync dataset rồi cập nhật kích thước của nó trong cache
+
+        Args:
+            dataset: Dataset từ dataset()
+
+        Returns:
+            StreamingAggregates đã cập nhật
+        """
+        aggregates = dataset.sync()
+        self.cache.resize(CACHE_NAMESPACE, self._name(dataset.orders.path, dataset.order_details.path,
+                                                      dataset.dimensions))
+        return aggregates
+
+    @staticmethod
+    def _name(orders_path: str, order_details_path: str, dimensions: Sequence[str]) -> str:
+        return '|'.join([os.path.abspath(orders_path), os.path.abspath(order_details_path), *dimensions])
+
+    def clear(self) -> None:
+        """Xoá toàn bộ dataset"""
+        with self._lock:
+            names, self._names = self._names, set()
+        for name in names:
+            self.cache.discard(CACHE_NAMESPACE, name)
+
+
+# Instance dùng chung cho toàn bộ process
+ingest = IngestRegistry()
@@ -0,0 +1,381 @@
+"""
+Live Updates - Đẩy thay đổi của dashboard tới trình duyệt qua Server-Sent Events
+Một thread theo dõi phiên bản dữ liệu; khi đổi, KPI và hai chuỗi thời gian được
+tính lại một lần, so với bản trước và phần chênh lệch được gửi cho mọi subscriber.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from app.services.chart_cache import fingerprint
+from app.services.dashboard import build_payload, payload_key
+from app.services.dataset_cache import FileVersion, file_version
+from app.services.visualizer import VisualizerService
+
+# Các bảng mà KPI và chuỗi thời gian phụ thuộc
+WATCHED_TABLES = ('products', 'orders', 'order_details')
+
+# Chuỗi thời gian được cập nhật trực tiếp (granularity mặc định của dashboard)
+LIVE_SERIES = ('revenue-over-time', 'orders-per-day')
+LIVE_GRANULARITY = 'day'
+
+DEFAULT_INTERVAL = 2.0
+DEFAULT_KEEPALIVE = 15.0
+DEFAULT_MAX_SECONDS = 300.0
+DEFAULT_MAX_SUBSCRIBERS = 50
+DEFAULT_HISTORY = 32
+
+# Thời gian trình duyệt chờ trước khi kết nối lại (ms)
+RETRY_MS = 3000
+
+Series = Tuple[List[Any], List[Any]]
+
+
+class LiveFeedFull(RuntimeError):
+    """Process đã đủ LIVE_MAX_SUBSCRIBERS kết nối"""
+
+
+@dataclass(frozen=True)
+class LiveState:
+    """KPI và điểm của các chuỗi từ một phiên bản dữ liệu"""
+    id: str
+    versions: Tuple[Optional[FileVersion], ...]
+    kpis: Dict[str, Any]
+    series: Dict[str, Series]
+
+
+def _event(name: str, event_id: str, data: Dict[str, Any]) -> str:
+    """Một event SSE (JSON một dòng)"""
+    return f"id: {event_id}\nevent: {name}\ndata: {VisualizerService.spec_to_json(data)}\n\n"
+
+
+def chart_points(chart: Dict[str, Any]) -> Series:
+    """
+    Điểm (x, y) của trace đầu tiên trong spec, dạng JSON thuần như trình duyệt nhận được
+
+    Args:
+        chart: Spec từ VisualizerService.figure_spec
+
+    Returns:
+        Tuple (x, y)
+    """
+    figure = VisualizerService.figure_from_spec({'data': chart.get('data', [])[:1]})
+    if not figure['data']:
+        return [], []
+    trace = json.loads(VisualizerService.spec_to_json(figure['data'][0]))
+    return list(trace.get('x') or []), list(trace.get('y') or [])
+
+
+def series_delta(old: Series, new: Series) -> Optional[Dict[str, Any]]:
+    """
+    Chênh lệch giữa hai phiên bản của một chuỗi
+
+    Args:
+        old: (x, y) trước
+        new: (x, y) sau
+
+    Returns:
+        None nếu không đổi; {'extend': {x, y}, 'points': {index, y}} nếu chỉ thêm
+        điểm cuối / sửa giá trị (extendTraces + restyle y); {'x', 'y'} nếu trục X đổi
+        (vd. LTTB chọn điểm khác) và cả trace phải được thay bằng restyle
+    """
+    old_x, old_y = old
+    new_x, new_y = new
+    n = len(old_x)
+    if len(new_x) < n or new_x[:n] != old_x:
+        return {'x': new_x, 'y': new_y}
+
+    changed = [i for i in range(n) if new_y[i] != old_y[i]]
+    if len(changed) > max(1, n // 2):
+        # Đổi gần hết: gửi cả chuỗi rẻ hơn gửi từng điểm
+        return {'x': new_x, 'y': new_y}
+    delta: Dict[str, Any] = {}
+    if changed:
+        delta['points'] = {'index': changed, 'y': [new_y[i] for i in changed]}
+    if len(new_x) > n:
+        delta['extend'] = {'x': new_x[n:], 'y': new_y[n:]}
+    return delta or None
+
+
+class LiveFeed:
+    """
+    Nguồn event SSE của dashboard (không lọc), dùng chung cho mọi kết nối của process
+
+    Thay đổi được tính một lần mỗi phiên bản dữ liệu rồi giữ dạng text trong một
+    hàng đợi ngắn; mỗi kết nối chỉ chờ trên Condition và gửi lại các chuỗi đó.
+    Id của event là dấu vân tay của trạng thái nên trình duyệt kết nối lại
+    (Last-Event-ID) tới worker khác vẫn nhận đúng phần còn thiếu.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.interval = DEFAULT_INTERVAL
+        self.keepalive = DEFAULT_KEEPALIVE
+        self.max_seconds = DEFAULT_MAX_SECONDS
+        self.max_subscribers = DEFAULT_MAX_SUBSCRIBERS
+        self.subscribers = 0
+        self.builds = 0
+        self.failures = 0
+        self.events_sent = 0
+        self.last_error: Optional[str] = None
+        self._app = None
+        self._paths: List[str] = []
+        self._state: Optional[LiveState] = None
+        self._snapshot = ''
+        self._history: Deque[Tuple[str, str, str]] = deque(maxlen=DEFAULT_HISTORY)
+        self._failed_versions: Optional[Tuple[Optional[FileVersion], ...]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._changed = threading.Condition()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app (LIVE_UPDATES_ENABLED, LIVE_INTERVAL,
+        LIVE_KEEPALIVE, LIVE_MAX_SECONDS, LIVE_MAX_SUBSCRIBERS).
+
+        Thread theo dõi chỉ được khởi động khi có kết nối đầu tiên trong process.
+
+        Args:
+            app: Flask application
+        """
+        from app.services.data_analysis import configured_paths
+
+        self.stop()
+        self.enabled = bool(app.config.get('LIVE_UPDATES_ENABLED', False))
+        self.interval = float(app.config.get('LIVE_INTERVAL', DEFAULT_INTERVAL))
+        self.keepalive = float(app.config.get('LIVE_KEEPALIVE', DEFAULT_KEEPALIVE))
+        self.max_seconds = float(app.config.get('LIVE_MAX_SECONDS', DEFAULT_MAX_SECONDS))
+        self.max_subscribers = int(app.config.get('LIVE_MAX_SUBSCRIBERS', DEFAULT_MAX_SUBSCRIBERS))
+        if app.config.get('ANALYTICS_BACKEND', 'csv') != 'csv':
+            # Database không có phiên bản file để theo dõi
+            self.enabled = False
+        self._app = app
+        paths = configured_paths(app.config)
+        self._paths = [paths[table] for table in WATCHED_TABLES]
+        self._state = None
+        self._snapshot = ''
+        self._history.clear()
+        app.extensions['live_feed'] = self
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def ensure_started(self) -> None:
+        """Khởi động thread theo dõi nếu chưa chạy trong process hiện tại"""
+        if self.running:
+            return
+        with self._start_lock:
+            if self.running:
+                return
+            self._stopping.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='live-updates', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Dừng thread theo dõi; các kết nối đang mở kết thúc ở lần chờ kế tiếp"""
+        self._stopping.set()
+        self._wake.set()
+        with self._changed:
+            self._changed.notify_all()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            thread.join(timeout)
+        self._thread = None
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> 'LiveSubscription':
+        """
+        Mở một kết nối SSE
+
+        Args:
+            last_event_id: Header Last-Event-ID khi trình duyệt kết nối lại
+
+        Returns:
+            LiveSubscription: iterable các event dạng text (kết thúc sau LIVE_MAX_SECONDS,
+            trình duyệt tự kết nối lại); chỗ được trả lại khi server gọi close()
+
+        Raises:
+            LiveFeedFull: Nếu process đã đủ LIVE_MAX_SUBSCRIBERS kết nối
+        """
+        with self._changed:
+            if self.subscribers >= self.max_subscribers:
+                raise LiveFeedFull("Too many live dashboard connections")
+            self.subscribers += 1
+        self.ensure_started()
+        # Có kết nối mới: kiểm tra dữ liệu ngay thay vì chờ hết interval
+        self._wake.set()
+        return LiveSubscription(self, self._stream(last_event_id or None))
+
+    def release(self) -> None:
+        """Trả lại một chỗ kết nối (gọi bởi LiveSubscription.close)"""
+        with self._changed:
+            self.subscribers = max(0, self.subscribers - 1)
+
+    def _stream(self, cursor: Optional[str]) -> Iterator[str]:
+        deadline = time.monotonic() + self.max_seconds
+        yield f"retry: {RETRY_MS}\n\n"
+        while not self._stopping.is_set() and time.monotonic() < deadline:
+            with self._changed:
+                self._changed.wait_for(
+                    lambda: self._stopping.is_set() or (self._state is not None and self._state.id != cursor),
+                    timeout=min(self.keepalive, max(0.0, deadline - time.monotonic()))
+                )
+                state, snapshot, history = self._state, self._snapshot, list(self._history)
+            if state is None or state.id == cursor:
+                # Comment SSE giữ kết nối qua proxy, đồng thời phát hiện client đã đóng
+                yield ': keepalive\n\n'
+                continue
+            events = self._since(cursor, history)
+            chunk = ''.join(events) if events is not None else snapshot
+            self.events_sent += 1
+            cursor = state.id
+            yield chunk
+
+    @staticmethod
+    def _since(cursor: Optional[str], history: List[Tuple[str, str, str]]) -> Optional[List[str]]:
+        """Các event delta từ trạng thái `cursor` tới hiện tại (None: phải gửi snapshot)"""
+        if cursor is None:
+            return None
+        for index, (base_id, _, _) in enumerate(history):
+            if base_id == cursor:
+                return [text for _, _, text in history[index:]]
+        return None
+
+    def _versions(self) -> Optional[Tuple[Optional[FileVersion], ...]]:
+        try:
+            return tuple(file_version(path) if os.path.exists(path) else None for path in self._paths)
+        except OSError:
+            return None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            versions = self._versions()
+            state = self._state
+            if (self.subscribers > 0 and versions is not None
+                    and (state is None or state.versions != versions)
+                    and versions != self._failed_versions):
+                self.refresh(versions)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self, versions: Optional[Tuple[Optional[FileVersion], ...]] = None) -> Optional[LiveState]:
+        """
+        Tính lại KPI / chuỗi và phát event cho các subscriber
+
+        Args:
+            versions: Phiên bản dữ liệu (mặc định đọc từ file)
+
+        Returns:
+            LiveState mới, hoặc None nếu lỗi (trạng thái cũ được giữ nguyên)
+        """
+        versions = versions or self._versions()
+        if versions is None or self._app is None:
+            return None
+        try:
+            kpis, series = self._compute()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            self._failed_versions = versions
+            self._app.logger.error(f"Live updates error: {str(e)}")
+            return None
+
+        state_id = fingerprint(VisualizerService.spec_to_json({'kpis': kpis, 'series': series}))
+        state = LiveState(id=state_id, versions=versions, kpis=kpis, series=series)
+        snapshot = _event('snapshot', state_id, {
+            'kpis': kpis,
+            'series': {name: {'x': x, 'y': y} for name, (x, y) in series.items()},
+        })
+        with self._changed:
+            previous = self._state
+            if previous is not None and previous.id != state_id:
+                delta = self._delta(previous, state)
+                self._history.append((previous.id, state_id, _event('update', state_id, delta)))
+            self._state = state
+            self._snapshot = snapshot
+            self._failed_versions = None
+            self.builds += 1
+            self._changed.notify_all()
+        return state
+
+    def _compute(self) -> Tuple[Dict[str, Any], Dict[str, Series]]:
+        """KPI và điểm của các chuỗi (payload tính sẵn nếu precompute đang chạy)"""
+        from app.services.data_analysis import analysis_service
+        from app.services.precompute import precompute
+
+        with self._app.app_context():
+            service = None
+            payloads = {}
+            for name, params in [('kpis', {})] + [(name, {'granularity': LIVE_GRANULARITY}) for name in LIVE_SERIES]:
+                payload = precompute.lookup(name, **params)
+                if payload is None:
+                    service = service or analysis_service(self._app.config)
+                    payload = build_payload(service, payload_key(name, **params))
+                payloads[name] = payload
+
+        kpis = json.loads(VisualizerService.spec_to_json(payloads['kpis']))
+        return kpis, {name: chart_points(payloads[name]['chart']) for name in LIVE_SERIES}
+
+    @staticmethod
+    def _delta(previous: LiveState, state: LiveState) -> Dict[str, Any]:
+        delta: Dict[str, Any] = {}
+        kpis = {key: value for key, value in state.kpis.items() if previous.kpis.get(key) != value}
+        if kpis:
+            delta['kpis'] = kpis
+        series = {}
+        for name, points in state.series.items():
+            change = series_delta(previous.series.get(name, ([], [])), points)
+            if change is not None:
+                series[name] = change
+        if series:
+            delta['series'] = series
+        return delta
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê cho /metrics"""
+        return {
+            'running': int(self.running),
+            'subscribers': self.subscribers,
+            'builds': self.builds,
+            'failures': self.failures,
+            'events_sent': self.events_sent,
+        }
+
+
+class LiveSubscription:
+    """
+    Body của một response SSE, giữ một chỗ trong LIVE_MAX_SUBSCRIBERS
+
+    Chỗ được trả trong close() - server WSGI luôn gọi close() của body, kể cả khi
+    body chưa được đọc lần nào (client ngắt trước chunk đầu) - thay vì trong
+    finally của generator, vốn không chạy nếu generator chưa bắt đầu.
+    """
+
+    def __init__(self, feed: LiveFeed, events: Iterator[str]):
+        self._feed = feed
+        self._events = events
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[str]:
+        return self._events
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._events.close()
+        self._feed.release()
+
+
+# Instance dùng chung cho toàn bộ process
+live_feed = LiveFeed()
@@ -0,0 +1,107 @@
+"""
+Load Pool - Thread pool giới hạn dùng chung để load nhiều bảng song song
+Đọc file và parse CSV / Arrow phần lớn chạy trong C và nhả GIL, nên thời gian
+load nguội của nhiều bảng tiến gần thời gian của bảng lớn nhất.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Mapping, Optional
+
+DEFAULT_WORKERS = 4
+
+
+class LoadPool:
+    """Executor giới hạn số thread, tạo lại sau khi process fork"""
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS):
+        """
+        Args:
+            max_workers: Số thread tối đa (<= 1: load tuần tự trong thread gọi)
+        """
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app (LOAD_WORKERS)
+
+        Args:
+            app: Flask application
+        """
+        self.shutdown()
+        self.max_workers = int(app.config.get('LOAD_WORKERS', DEFAULT_WORKERS))
+        app.extensions['load_pool'] = self
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # Thread của executor không sống sót qua fork: tạo mới trong process con
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='load',
+                    initializer=self._mark_worker
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _mark_worker(self) -> None:
+        self._local.worker = True
+
+    def run(self, tasks: Mapping[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """
+        Chạy các hàm load song song, chờ tất cả hoàn thành
+
+        Task đầu tiên chạy ngay trong thread gọi; khi được gọi từ chính một
+        thread của pool (load lồng nhau) mọi task chạy tuần tự để pool không
+        tự chờ chính nó.
+
+        Args:
+            tasks: Mapping tên -> hàm không tham số
+
+        Returns:
+            Mapping tên -> kết quả
+
+        Raises:
+            Exception: Lỗi đầu tiên (theo thứ tự tasks), sau khi mọi task đã dừng
+        """
+        names = list(tasks)
+        if len(names) <= 1 or self.max_workers <= 1 or getattr(self._local, 'worker', False):
+            return {name: tasks[name]() for name in names}
+
+        executor = self._get_executor()
+        # Mỗi task chạy trong bản sao context của thread gọi (vd. thời gian của request hiện tại)
+        futures: Dict[str, Future] = {
+            name: executor.submit(contextvars.copy_context().run, tasks[name]) for name in names[1:]
+        }
+
+        results: Dict[str, Any] = {}
+        errors: Dict[str, BaseException] = {}
+        try:
+            results[names[0]] = tasks[names[0]]()
+        except Exception as e:
+            errors[names[0]] = e
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+
+        for name in names:
+            if name in errors:
+                raise errors[name]
+        return results
+
+    def shutdown(self) -> None:
+        """Dừng executor (các task đang chạy vẫn được hoàn thành)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=False)
+
+
+# Instance dùng chung cho toàn bộ process
+load_pool = LoadPool()
@@ -0,0 +1,192 @@
+"""
+Order Filter - Lọc orders theo khoảng ngày và trạng thái ngay khi load
+Chỉ các dòng trong cửa sổ được đưa vào bộ nhớ: snapshot chỉ quét các khối
+có order_date giao với cửa sổ (zone map), CSV được đọc theo từng chunk.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Collection, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from app.services.schema import apply_dtypes, read_csv_options
+from app.services.snapshot import SnapshotManager
+
+# Số dòng mỗi chunk khi phải đọc CSV có lọc
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+@dataclass(frozen=True)
+class OrderFilter:
+    """Cửa sổ thời gian (bao gồm hai đầu) và danh sách trạng thái"""
+    start: Optional[date] = None
+    end: Optional[date] = None
+    statuses: Optional[Tuple[str, ...]] = None
+
+    @property
+    def active(self) -> bool:
+        """Filter có giới hạn gì không"""
+        return self.start is not None or self.end is not None or bool(self.statuses)
+
+    @property
+    def start_ts(self) -> Optional[pd.Timestamp]:
+        return pd.Timestamp(self.start) if self.start is not None else None
+
+    @property
+    def end_ts(self) -> Optional[pd.Timestamp]:
+        # end là ngày bao gồm -> lấy tới nanosecond cuối cùng của ngày
+        if self.end is None:
+            return None
+        return pd.Timestamp(self.end) + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+
+    def key(self) -> Tuple[Any, ...]:
+        """Key dùng cho cache"""
+        return ('window', self.start, self.end, self.statuses)
+
+    def to_args(self) -> dict:
+        """Tham số query tương ứng (cho template/link)"""
+        args = {}
+        if self.start is not None:
+            args['start'] = self.start.isoformat()
+        if self.end is not None:
+            args['end'] = self.end.isoformat()
+        if self.statuses:
+            args['status'] = ','.join(self.statuses)
+        return args
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str], today: Optional[date] = None) -> 'OrderFilter':
+        """
+        Tạo filter từ query string
+
+        Hỗ trợ: ``start``/``end`` (YYYY-MM-DD), ``days`` (N ngày gần nhất,
+        tính cả hôm nay) và ``status`` (lặp lại hoặc phân tách bằng dấu phẩy).
+
+        Args:
+            args: request.args
+            today: Ngày hiện tại (mặc định date.today())
+
+        Returns:
+            OrderFilter
+
+        Raises:
+            ValueError: Nếu tham số không hợp lệ
+        """
+        start = _parse_date(args.get('start'), 'start')
+        end = _parse_date(args.get('end'), 'end')
+
+        days = args.get('days')
+        if days:
+            try:
+                n_days = int(days)
+            except ValueError:
+                raise ValueError(f"Invalid days: {days}")
+            if n_days <= 0:
+                raise ValueError(f"Invalid days: {days}")
+            end = end or (today or date.today())
+            start = end - timedelta(days=n_days - 1)
+
+        if start is not None and end is not None and start > end:
+            raise ValueError("start must not be after end")
+
+        getlist = getattr(args, 'getlist', None)
+        raw_statuses = getlist('status') if getlist else [args.get('status') or '']
+        statuses = tuple(sorted({
+            status.strip() for raw in raw_statuses for status in raw.split(',') if status.strip()
+        }))
+        return cls(start=start, end=end, statuses=statuses or None)
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name} date: {value}")
+
+
+def order_mask(df: pd.DataFrame, order_filter: OrderFilter) -> pd.Series:
+    """
+    Mask các dòng orders nằm trong cửa sổ của filter
+
+    Args:
+        df: Bảng (hoặc chunk) orders
+        order_filter: Cửa sổ ngày / trạng thái
+
+    Returns:
+        Series bool cùng index với df
+    """
+    mask = pd.Series(True, index=df.index)
+    if order_filter.start is not None:
+        mask &= df['order_date'] >= order_filter.start_ts
+    if order_filter.end is not None:
+        mask &= df['order_date'] <= order_filter.end_ts
+    if order_filter.statuses:
+        mask &= df['status'].isin(order_filter.statuses)
+    return mask
+
+
+def _read_csv_filtered(table: str, csv_path: str, chunk_rows: int, select) -> pd.DataFrame:
+    """Đọc CSV theo chunk, chỉ giữ các dòng được ``select`` chọn"""
+    parts = []
+    with pd.read_csv(csv_path, chunksize=chunk_rows, **read_csv_options(table)) as reader:
+        for chunk in reader:
+            parts.append(chunk.loc[select(chunk)])
+    if not parts:
+        return pd.read_csv(csv_path, nrows=0, **read_csv_options(table))
+    return apply_dtypes(pd.concat(parts, ignore_index=True), table)
+
+
+def load_filtered_orders(
+    orders_path: str,
+    order_filter: OrderFilter,
+    snapshot_manager: SnapshotManager,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> pd.DataFrame:
+    """
+    Load các orders nằm trong cửa sổ của filter
+
+    Args:
+        orders_path: Đường dẫn orders CSV
+        order_filter: Cửa sổ thời gian / trạng thái
+        snapshot_manager: Quản lý snapshot (dùng nếu snapshot còn mới)
+        chunk_rows: Số dòng mỗi chunk khi đọc CSV
+
+    Returns:
+        DataFrame orders đã lọc
+    """
+    if snapshot_manager.is_fresh(orders_path):
+        isin = {'status': order_filter.statuses} if order_filter.statuses else None
+        return snapshot_manager.read_filtered(
+            'orders', orders_path, order_filter.start_ts, order_filter.end_ts, isin
+        )
+    return _read_csv_filtered('orders', orders_path, chunk_rows,
+                              lambda chunk: order_mask(chunk, order_filter))
+
+
+def load_filtered_order_details(
+    order_details_path: str,
+    order_ids: Collection[str],
+    snapshot_manager: SnapshotManager,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> pd.DataFrame:
+    """
+    Load các order_details thuộc tập order_id cho trước
+
+    Args:
+        order_details_path: Đường dẫn order_details CSV
+        order_ids: Các order_id nằm trong cửa sổ
+        snapshot_manager: Quản lý snapshot (dùng nếu snapshot còn mới)
+        chunk_rows: Số dòng mỗi chunk khi đọc CSV
+
+    Returns:
+        DataFrame order_details đã lọc
+    """
+    order_ids = list(order_ids)
+    if snapshot_manager.is_fresh(order_details_path):
+        return snapshot_manager.read_filtered(
+            'order_details', order_details_path, isin={'order_id': order_ids}
+        )
+    return _read_csv_filtered('order_details', order_details_path, chunk_rows,
+                              lambda chunk: chunk['order_id'].isin(order_ids))
@@ -0,0 +1,252 @@
+"""
+Precompute Worker - Tính sẵn payload của dashboard ở background
+Một thread theo dõi phiên bản các file dữ liệu; khi có thay đổi, các payload
+được tính lại trong thread pool rồi thay thế bộ kết quả cũ trong một phép gán.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.dashboard import PayloadKey, build_payload, default_payload_keys, payload_key
+from app.services.dataset_cache import FileVersion, file_version
+
+# Các bảng mà payload của dashboard phụ thuộc
+WATCHED_TABLES = ('products', 'orders', 'order_details', 'categories', 'suppliers', 'users')
+
+DEFAULT_INTERVAL = 2.0
+DEFAULT_WORKERS = 4
+DEFAULT_WAIT = 10.0
+
+
+@dataclass(frozen=True)
+class PrecomputedResults:
+    """Một bộ payload đầy đủ, tính từ một phiên bản dữ liệu"""
+    versions: Tuple[FileVersion, ...]
+    payloads: Dict[PayloadKey, Dict[str, Any]]
+    built_at: float
+    duration: float
+
+
+class PrecomputeWorker:
+    """Giữ payload của dashboard (không lọc) luôn sẵn sàng cho request"""
+
+    def __init__(self):
+        self.enabled = False
+        self.interval = DEFAULT_INTERVAL
+        self.max_workers = DEFAULT_WORKERS
+        self.wait = DEFAULT_WAIT
+        self.builds = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._app = None
+        self._paths: List[str] = []
+        self._keys: List[PayloadKey] = []
+        self._results: Optional[PrecomputedResults] = None
+        self._failed_versions: Optional[Tuple[FileVersion, ...]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._ready = threading.Condition()
+        self._start_lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app (PRECOMPUTE_ENABLED, PRECOMPUTE_INTERVAL,
+        PRECOMPUTE_WORKERS, PRECOMPUTE_WAIT).
+
+        Worker được khởi động ở request đầu tiên của mỗi process phục vụ
+        request, nên không chạy trong các lệnh CLI, process theo dõi của
+        reloader hay master process trước khi fork.
+
+        Args:
+            app: Flask application
+        """
+        from app.services.data_analysis import configured_paths
+        from app.services.dimensions import DIMENSIONS
+
+        self.stop()
+        self.enabled = bool(app.config.get('PRECOMPUTE_ENABLED', False))
+        self.interval = float(app.config.get('PRECOMPUTE_INTERVAL', DEFAULT_INTERVAL))
+        self.max_workers = max(1, int(app.config.get('PRECOMPUTE_WORKERS', DEFAULT_WORKERS)))
+        self.wait = float(app.config.get('PRECOMPUTE_WAIT', DEFAULT_WAIT))
+        if app.config.get('ANALYTICS_BACKEND', 'csv') != 'csv':
+            # Database không có phiên bản file để theo dõi
+            self.enabled = False
+
+        paths = configured_paths(app.config)
+        self._app = app
+        self._paths = [paths[table] for table in WATCHED_TABLES]
+        # Chỉ tính sẵn các chiều có file danh mục
+        self._keys = default_payload_keys([
+            name for name, spec in DIMENSIONS.items() if os.path.exists(paths[spec.table])
+        ])
+        self._results = None
+        self._failed_versions = None
+        app.extensions['precompute'] = self
+        if self.enabled:
+            app.before_request(self.ensure_started)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    @property
+    def results(self) -> Optional[PrecomputedResults]:
+        return self._results
+
+    def ensure_started(self) -> None:
+        """Khởi động thread nếu chưa chạy trong process hiện tại"""
+        if not self.enabled or self.running:
+            return
+        with self._start_lock:
+            if self.running:
+                return
+            self._stopping.clear()
+            self._pid = os.getpid()
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='precompute')
+            self._thread = threading.Thread(target=self._run, name='precompute-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Dừng thread theo dõi và thread pool"""
+        self._stopping.set()
+        self._wake.set()
+        thread, pool = self._thread, self._pool
+        if thread is not None and self._pid == os.getpid():
+            thread.join(timeout)
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._thread = None
+        self._pool = None
+
+    def _versions(self) -> Optional[Tuple[FileVersion, ...]]:
+        try:
+            return tuple(file_version(path) if os.path.exists(path) else None for path in self._paths)
+        except OSError:
+            return None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            versions = self._versions()
+            results = self._results
+            if (versions is not None
+                    and (results is None or results.versions != versions)
+                    and versions != self._failed_versions):
+                self.refresh(versions)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self, versions: Optional[Tuple[FileVersion, ...]] = None) -> Optional[PrecomputedResults]:
+        """
+        Tính lại mọi payload và thay thế bộ kết quả hiện tại
+
+        Args:
+            versions: Phiên bản dữ liệu (mặc định đọc từ file)
+
+        Returns:
+            PrecomputedResults mới, hoặc None nếu lỗi (bộ cũ được giữ nguyên)
+        """
+        versions = versions or self._versions()
+        if versions is None or self._app is None:
+            return None
+
+        started = time.perf_counter()
+        try:
+            payloads = self._build_all()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            self._failed_versions = versions
+            self._app.logger.error(f"Precompute error: {str(e)}")
+            return None
+
+        results = PrecomputedResults(
+            versions=versions,
+            payloads=payloads,
+            built_at=time.time(),
+            duration=time.perf_counter() - started
+        )
+        with self._ready:
+            # Request đọc self._results một lần nên luôn thấy một bộ trọn vẹn
+            self._results = results
+            self._failed_versions = None
+            self.builds += 1
+            self._ready.notify_all()
+        return results
+
+    def _build(self, key: PayloadKey) -> Dict[str, Any]:
+        from app.services.data_analysis import analysis_service
+
+        with self._app.app_context():
+            return build_payload(analysis_service(self._app.config), key)
+
+    def _build_all(self) -> Dict[PayloadKey, Dict[str, Any]]:
+        first, rest = self._keys[0], self._keys[1:]
+        pool = self._pool
+        if pool is None:
+            return {key: self._build(key) for key in self._keys}
+
+        # Payload đầu (KPI) load mọi bảng vào cache; phần còn lại chạy song song
+        payloads = {first: pool.submit(self._build, first).result()}
+        futures = {key: pool.submit(self._build, key) for key in rest}
+        for key, future in futures.items():
+            payloads[key] = future.result()
+        return payloads
+
+    def lookup(self, name: str, **params: Any) -> Optional[Dict[str, Any]]:
+        """
+        Payload đã tính sẵn cho phiên bản dữ liệu hiện tại
+
+        Nếu dữ liệu vừa đổi, request báo cho worker và chờ tối đa
+        PRECOMPUTE_WAIT giây thay vì tự tính.
+
+        Args:
+            name: Tên endpoint
+            **params: Tham số đã chuẩn hoá
+
+        Returns:
+            Payload, hoặc None nếu không có (request tự tính)
+        """
+        key = payload_key(name, **params)
+        if not self.running or key not in self._keys:
+            return None
+        versions = self._versions()
+        if versions is None:
+            return None
+
+        def fresh() -> bool:
+            results = self._results
+            return results is not None and results.versions == versions
+
+        if not fresh() and self.wait > 0 and versions != self._failed_versions:
+            self._wake.set()
+            with self._ready:
+                self._ready.wait_for(fresh, timeout=self.wait)
+
+        results = self._results
+        if results is None or results.versions != versions:
+            return None
+        return results.payloads.get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê cho debug / monitoring"""
+        results = self._results
+        return {
+            'enabled': self.enabled,
+            'running': self.running,
+            'builds': self.builds,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'built_at': results.built_at if results else None,
+            'duration': results.duration if results else None,
+            'payloads': len(results.payloads) if results else 0
+        }
+
+
+# Instance dùng chung cho toàn bộ process
+precompute = PrecomputeWorker()
@@ -0,0 +1,261 @@
+"""
+Product Catalog - Phân trang, sắp xếp và tìm kiếm sản phẩm phía server
+Thứ tự sắp xếp và chỉ mục tìm kiếm (tên / SKU / tag) được tính một lần cho
+mỗi phiên bản products.csv; mỗi request chỉ chuyển trang đang xem sang records.
+"""
+import bisect
+import math
+import re
+import unicodedata
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+
+# Các cột cho phép sắp xếp (``sort=price`` tăng dần, ``sort=-price`` giảm dần)
+SORT_COLUMNS = ('name', 'sku', 'price', 'quantity', 'revenue', 'rating', 'created_at')
+
+# Các cột được đưa vào chỉ mục tìm kiếm
+SEARCH_COLUMNS = ('name', 'sku', 'tags')
+
+_TOKEN_RE = re.compile(r'\w+')
+_COMBINING_RE = re.compile('[\u0300-\u036f]')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Chuẩn hoá chuỗi để tìm kiếm: chữ thường, bỏ dấu tiếng Việt
+
+    Args:
+        text: Chuỗi gốc
+
+    Returns:
+        Chuỗi đã chuẩn hoá ("Sữa Vinamilk" -> "sua vinamilk")
+    """
+    text = unicodedata.normalize('NFD', text.lower().replace('đ', 'd'))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """Tách chuỗi đã chuẩn hoá thành các token"""
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def _normalize_series(values: pd.Series) -> pd.Series:
+    """normalize_text cho cả cột; mỗi giá trị khác nhau chỉ chuẩn hoá một lần"""
+    codes, uniques = pd.factorize(values.astype(str))
+    normalized = (pd.Series(uniques).str.lower().str.replace('đ', 'd', regex=False)
+                  .str.normalize('NFD').str.replace(_COMBINING_RE, '', regex=True))
+    return pd.Series(normalized.to_numpy()[codes], index=values.index)
+
+
+def _is_text(values: pd.Series) -> bool:
+    """Cột chuỗi (object, string hoặc category) - sắp xếp theo dạng đã chuẩn hoá"""
+    return not (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values))
+
+
+@dataclass(frozen=True)
+class ProductQuery:
+    """Tham số phân trang / sắp xếp / tìm kiếm của bảng sản phẩm"""
+    q: str = ''
+    sort: str = ''
+    page: int = 1
+    per_page: int = DEFAULT_PER_PAGE
+
+    def to_args(self, **overrides: Any) -> Dict[str, Any]:
+        """Tham số query tương ứng (cho link phân trang / sắp xếp)"""
+        query = replace(self, **overrides)
+        args: Dict[str, Any] = {}
+        if query.q:
+            args['q'] = query.q
+        if query.sort:
+            args['sort'] = query.sort
+        if query.page != 1:
+            args['page'] = query.page
+        if query.per_page != DEFAULT_PER_PAGE:
+            args['per_page'] = query.per_page
+        return args
+
+    def sort_link(self, column: str) -> Dict[str, Any]:
+        """Tham số query khi bấm vào tiêu đề cột (đảo chiều nếu đang sắp xếp theo cột đó)"""
+        sort = f'-{column}' if self.sort == column else column
+        return self.to_args(sort=sort, page=1)
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str], default_per_page: int = DEFAULT_PER_PAGE) -> 'ProductQuery':
+        """
+        Tạo query từ query string
+
+        Args:
+            args: request.args (page, per_page, sort, q)
+            default_per_page: Số dòng mỗi trang khi không truyền per_page
+
+        Returns:
+            ProductQuery
+
+        Raises:
+            ValueError: Nếu tham số không hợp lệ
+        """
+        page = _parse_int(args.get('page'), 'page', 1)
+        per_page = _parse_int(args.get('per_page'), 'per_page', default_per_page)
+        if page < 1:
+            raise ValueError(f"Invalid page: {page}")
+        if not 1 <= per_page <= MAX_PER_PAGE:
+            raise ValueError(f"per_page must be between 1 and {MAX_PER_PAGE}")
+
+        sort = (args.get('sort') or '').strip()
+        if sort and sort.lstrip('-') not in SORT_COLUMNS:
+            raise ValueError(f"Invalid sort: {sort}")
+
+        return cls(q=(args.get('q') or '').strip(), sort=sort, page=page, per_page=per_page)
+
+
+def _parse_int(value: Optional[str], name: str, default: int) -> int:
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}")
+
+
+@dataclass
+class ProductPage:
+    """Một trang kết quả"""
+    items: List[Dict[str, Any]]
+    total: int
+    query: ProductQuery
+
+    @property
+    def pages(self) -> int:
+        return max(1, math.ceil(self.total / self.query.per_page))
+
+    @property
+    def page(self) -> int:
+        return self.query.page
+
+    @property
+    def first_index(self) -> int:
+        """Số thứ tự (bắt đầu từ 1) của dòng đầu tiên trong trang"""
+        return (self.page - 1) * self.query.per_page + 1 if self.items else 0
+
+    @property
+    def last_index(self) -> int:
+        return self.first_index + len(self.items) - 1 if self.items else 0
+
+
+class ProductIndex:
+    """Thứ tự sắp xếp và chỉ mục tìm kiếm dựng sẵn trên bảng products"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: Bảng products (không bị sửa)
+        """
+        self.df = df
+        n = len(df)
+
+        normalized = {
+            column: _normalize_series(df[column].set_axis(pd.RangeIndex(n)))
+            for column in df.columns
+            if column in SEARCH_COLUMNS or (column in SORT_COLUMNS and _is_text(df[column]))
+        }
+
+        columns: Dict[str, np.ndarray] = {}
+        for column in SORT_COLUMNS:
+            if column == 'revenue':
+                if 'price' in df.columns and 'quantity' in df.columns:
+                    columns[column] = (df['price'].to_numpy(dtype='float64')
+                                       * df['quantity'].to_numpy(dtype='float64'))
+            elif column in df.columns:
+                columns[column] = normalized.get(column, df[column]).to_numpy()
+        self.revenue = columns.get('revenue', np.zeros(n))
+
+        # order[column][k] = vị trí dòng đứng thứ k; rank = nghịch đảo để sắp xếp tập con
+        self.orders: Dict[str, np.ndarray] = {}
+        self.ranks: Dict[str, np.ndarray] = {}
+        for column, values in columns.items():
+            order = np.argsort(values, kind='stable')
+            rank = np.empty(n, dtype=np.int64)
+            rank[order] = np.arange(n)
+            self.orders[column] = order
+            self.ranks[column] = rank
+
+        # Chỉ mục ngược: token -> các dòng chứa token (tăng dần); từ vựng sắp xếp để tìm theo tiền tố
+        self.vocabulary: List[str] = []
+        self.postings: List[np.ndarray] = []
+        present = [column for column in SEARCH_COLUMNS if column in df.columns]
+        if present and n:
+            tokens = pd.concat([
+                normalized[column].str.findall(_TOKEN_RE) for column in present
+            ]).explode().dropna()
+            pairs = (pd.DataFrame({'token': tokens.to_numpy(dtype=str), 'row': tokens.index.to_numpy()})
+                     .drop_duplicates().sort_values(['token', 'row'], ignore_index=True))
+            vocabulary, starts = np.unique(pairs['token'].to_numpy(), return_index=True)
+            self.vocabulary = vocabulary.tolist()
+            self.postings = np.split(pairs['row'].to_numpy(dtype=np.int64), starts[1:])
+
+    @property
+    def nbytes(self) -> int:
+        """Bộ nhớ của các mảng chỉ mục (cho DatasetCache)"""
+        arrays = [self.revenue, *self.orders.values(), *self.ranks.values(), *self.postings]
+        return int(sum(array.nbytes for array in arrays))
+
+    def search(self, q: str) -> Optional[np.ndarray]:
+        """
+        Tìm các dòng khớp mọi từ của q (theo tiền tố, không phân biệt dấu)
+
+        Args:
+            q: Chuỗi tìm kiếm
+
+        Returns:
+            Mảng vị trí dòng tăng dần, hoặc None nếu q rỗng (khớp tất cả)
+        """
+        tokens = tokenize(q)
+        if not tokens:
+            return None
+
+        matched: Optional[np.ndarray] = None
+        for token in tokens:
+            lo = bisect.bisect_left(self.vocabulary, token)
+            hi = bisect.bisect_left(self.vocabulary, token + '\uffff')
+            if lo == hi:
+                return np.empty(0, dtype=np.int64)
+            rows = np.unique(np.concatenate(self.postings[lo:hi]))
+            matched = rows if matched is None else np.intersect1d(matched, rows, assume_unique=True)
+            if matched.size == 0:
+                break
+        return matched
+
+    def page(self, query: ProductQuery) -> ProductPage:
+        """
+        Lấy một trang theo query; chỉ các dòng của trang được chuyển sang records
+
+        Args:
+            query: Tham số phân trang / sắp xếp / tìm kiếm
+
+        Returns:
+            ProductPage
+        """
+        rows = self.search(query.q)
+        column = query.sort.lstrip('-')
+        descending = query.sort.startswith('-')
+
+        if column in self.orders:
+            if rows is None:
+                rows = self.orders[column]
+            else:
+                rows = rows[np.argsort(self.ranks[column][rows], kind='stable')]
+            if descending:
+                rows = rows[::-1]
+        elif rows is None:
+            rows = np.arange(len(self.df))
+
+        start = (query.page - 1) * query.per_page
+        visible = rows[start:start + query.per_page]
+        items = self.df.iloc[visible].assign(revenue=self.revenue[visible]).to_dict('records')
+        return ProductPage(items=items, total=len(rows), query=query)
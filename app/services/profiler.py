@@ -0,0 +1,349 @@
+"""
+Profiler - Lấy profile của một request hoặc của cả worker khi đang chạy thật
+Sampler đọc stack của các thread định kỳ (sys._current_frames) và xuất dạng
+collapsed stacks cho flamegraph; cProfile cho pstats. Truy cập cần token ký bằng SECRET_KEY.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from itsdangerous import BadSignature, URLSafeSerializer
+
+# Query param / header bật profile cho một request
+PROFILE_ARG = '_profile'
+PROFILE_HEADER = 'X-Profile-Token'
+FORMAT_ARG = '_profile_format'
+
+# collapsed: stack gộp cho flamegraph.pl / speedscope; pstats: dump của cProfile; text: bảng của pstats
+FORMATS = ('collapsed', 'pstats', 'text')
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_MAX_SECONDS = 60.0
+DEFAULT_TOKEN_TTL = 3600
+
+# SECRET_KEY mặc định của Config: không nhận token ngoài debug / testing
+_DEV_SECRET_KEY = 'dev-secret-key-change-in-production'
+
+_TOKEN_SALT = 'profiler'
+
+# Thread của load_pool làm việc thay cho request nên được lấy mẫu cùng request
+_HELPER_THREAD_PREFIX = 'load'
+
+
+class ProfilerError(Exception):
+    """Token không hợp lệ hoặc profiler đang bận"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+def _frame_label(code: Any) -> str:
+    path = code.co_filename
+    parts = path.replace('\\', '/').rsplit('/', 2)
+    short = '/'.join(parts[-2:]) if len(parts) > 1 else path
+    return f'{code.co_name} ({short}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """Lấy mẫu stack của các thread theo chu kỳ trong một thread riêng"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL,
+                 select: Optional[Callable[[threading.Thread], bool]] = None):
+        """
+        Args:
+            interval: Chu kỳ lấy mẫu (giây)
+            select: Chọn thread cần lấy mẫu (None: mọi thread trừ sampler)
+
+        Thread sampler cần GIL: đoạn C giữ GIL lâu (một phép pandas lớn) làm mẫu
+        đến trễ, còn đoạn nhả GIL (đọc file, parse CSV) được lấy mẫu bình thường.
+        """
+        self.interval = interval
+        self.select = select
+        self.samples = 0
+        self.started: Optional[float] = None
+        self.duration = 0.0
+        self._counts: Counter = Counter()
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'StackSampler':
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> 'StackSampler':
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - (self.started or time.perf_counter())
+        return self
+
+    def _targets(self) -> Dict[int, str]:
+        own = threading.get_ident()
+        return {
+            thread.ident: thread.name for thread in threading.enumerate()
+            if thread.ident is not None and thread.ident != own and (self.select is None or self.select(thread))
+        }
+
+    def _run(self) -> None:
+        targets = self._targets()
+        last_refresh = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            if now - last_refresh > 0.5:
+                # Thread mới (vd. của load_pool) xuất hiện trong khi lấy mẫu
+                targets, last_refresh = self._targets(), now
+            frames = sys._current_frames()
+            for ident, name in targets.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._counts[(name, self._stack(frame))] += 1
+            self.samples += 1
+
+    def _stack(self, frame: Any) -> Tuple[str, ...]:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _frame_label(code)
+            labels.append(label)
+            frame = frame.f_back
+        labels.reverse()
+        return tuple(labels)
+
+    def collapsed(self) -> str:
+        """
+        Stack gộp: mỗi dòng 'thread;frame;...;frame count' (flamegraph.pl, speedscope)
+
+        Returns:
+            Text, stack nhiều mẫu nhất trước
+        """
+        lines = []
+        for (name, stack), count in self._counts.most_common():
+            frames = ';'.join((f'thread:{name}',) + stack)
+            lines.append(f'{frames} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+class RequestProfiler:
+    """Profile theo yêu cầu: một request (?_profile=<token>) hoặc cả worker trong N giây"""
+
+    def __init__(self):
+        self.enabled = False
+        self.interval = DEFAULT_INTERVAL
+        self.max_seconds = DEFAULT_MAX_SECONDS
+        self._secret: Optional[str] = None
+        self._busy = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app (PROFILER_ENABLED, PROFILER_INTERVAL,
+        PROFILER_MAX_SECONDS) và gắn hook cho request
+
+        Profiler chỉ bật khi PROFILER_ENABLED và SECRET_KEY đã được đổi khỏi
+        giá trị mặc định (kể cả khi chạy debug / testing): token ký bằng khoá
+        công khai thì ai cũng tạo được.
+
+        Args:
+            app: Flask application
+        """
+        self.interval = float(app.config.get('PROFILER_INTERVAL', DEFAULT_INTERVAL))
+        self.max_seconds = float(app.config.get('PROFILER_MAX_SECONDS', DEFAULT_MAX_SECONDS))
+        secret = app.config.get('SECRET_KEY')
+        if not secret or secret == _DEV_SECRET_KEY:
+            secret = None
+        self._secret = secret
+        self.enabled = bool(app.config.get('PROFILER_ENABLED', False))
+        if self.enabled and secret is None:
+            app.logger.warning("Profiler không được bật: SECRET_KEY đang là giá trị mặc định")
+            self.enabled = False
+        app.extensions['profiler'] = self
+        if self.enabled:
+            app.before_request(self._start_request)
+            app.after_request(self._finish_request)
+            app.teardown_request(self._teardown_request)
+
+    def _serializer(self) -> URLSafeSerializer:
+        if self._secret is None:
+            raise ProfilerError("Profiler cần SECRET_KEY riêng", 403)
+        return URLSafeSerializer(self._secret, salt=_TOKEN_SALT)
+
+    def create_token(self, ttl: int = DEFAULT_TOKEN_TTL) -> str:
+        """
+        Tạo token truy cập profiler
+
+        Args:
+            ttl: Thời gian hiệu lực (giây)
+
+        Returns:
+            Token (URL-safe)
+
+        Raises:
+            ProfilerError: Nếu chưa cấu hình SECRET_KEY
+        """
+        return self._serializer().dumps({'exp': int(time.time()) + int(ttl)})
+
+    def verify(self, token: Optional[str]) -> None:
+        """
+        Kiểm tra token
+
+        Raises:
+            ProfilerError: 404 nếu profiler tắt, 403 nếu token sai / hết hạn
+        """
+        if not self.enabled:
+            raise ProfilerError("Profiler đang tắt", 404)
+        try:
+            payload = self._serializer().loads(token or '')
+        except BadSignature:
+            raise ProfilerError("Token profiler không hợp lệ", 403)
+        if not isinstance(payload, dict) or payload.get('exp', 0) < time.time():
+            raise ProfilerError("Token profiler đã hết hạn", 403)
+
+    def sample_worker(self, seconds: float, interval: Optional[float] = None) -> StackSampler:
+        """
+        Lấy mẫu mọi thread của worker trong một khoảng thời gian (chặn thread gọi)
+
+        Args:
+            seconds: Thời gian lấy mẫu (tối đa PROFILER_MAX_SECONDS)
+            interval: Chu kỳ lấy mẫu (mặc định PROFILER_INTERVAL)
+
+        Returns:
+            StackSampler đã dừng
+
+        Raises:
+            ProfilerError: 409 nếu đang có một profile khác chạy
+        """
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerError("Profiler đang bận", 409)
+        try:
+            caller = threading.get_ident()
+            sampler = StackSampler(interval or self.interval, select=lambda t: t.ident != caller).start()
+            time.sleep(min(max(seconds, 0.0), self.max_seconds))
+            return sampler.stop()
+        finally:
+            self._busy.release()
+
+    def _start_request(self) -> Any:
+        from flask import g, request
+
+        token = request.args.get(PROFILE_ARG) or request.headers.get(PROFILE_HEADER)
+        if not token or request.blueprint == 'profiling':
+            # /profile/* tự kiểm tra token và tự lấy mẫu
+            return None
+        fmt = request.args.get(FORMAT_ARG, FORMATS[0])
+        try:
+            self.verify(token)
+            if fmt not in FORMATS:
+                raise ProfilerError(f"Định dạng profile không hỗ trợ: {fmt}", 400)
+            if not self._busy.acquire(blocking=False):
+                raise ProfilerError("Profiler đang bận", 409)
+        except ProfilerError as e:
+            return error_response(e)
+
+        if fmt == 'collapsed':
+            ident = threading.get_ident()
+            collector: Any = StackSampler(
+                self.interval,
+                select=lambda t: t.ident == ident or t.name.startswith(_HELPER_THREAD_PREFIX)
+            ).start()
+        else:
+            collector = cProfile.Profile()
+            collector.enable()
+        g.profile = (fmt, collector, time.perf_counter())
+        return None
+
+    def _finish_request(self, response: Any) -> Any:
+        from flask import g
+
+        state = g.pop('profile', None)
+        if state is None:
+            return response
+        fmt, collector, started = state
+        try:
+            elapsed = time.perf_counter() - started
+            profile = _stop(fmt, collector)
+        finally:
+            self._busy.release()
+        return _profile_response(fmt, profile, response.status_code, elapsed)
+
+    def _teardown_request(self, exc: Optional[BaseException] = None) -> None:
+        from flask import g
+
+        # Request lỗi trước after_request: vẫn dừng collector và nhả lock
+        state = g.pop('profile', None)
+        if state is not None:
+            try:
+                _stop(state[0], state[1])
+            finally:
+                self._busy.release()
+
+
+def _stop(fmt: str, collector: Any) -> Any:
+    if fmt == 'collapsed':
+        return collector.stop()
+    collector.disable()
+    return collector
+
+
+def _pstats_bytes(profile: cProfile.Profile) -> bytes:
+    profile.create_stats()
+    return marshal.dumps(profile.stats)
+
+
+def _pstats_text(profile: cProfile.Profile, limit: int = 60) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
+
+
+def _profile_response(fmt: str, profile: Any, status: int, elapsed: float) -> Any:
+    from flask import current_app
+
+    headers = {
+        'X-Profiled-Status': str(status),
+        'X-Profile-Duration': f'{elapsed * 1000:.3f}',
+        'Cache-Control': 'no-store',
+    }
+    if fmt == 'collapsed':
+        headers['X-Profile-Samples'] = str(profile.samples)
+        return current_app.response_class(profile.collapsed(), mimetype='text/plain', headers=headers)
+    if fmt == 'pstats':
+        headers['Content-Disposition'] = f'attachment; filename=profile-{os.getpid()}.pstats'
+        return current_app.response_class(_pstats_bytes(profile), mimetype='application/octet-stream',
+                                          headers=headers)
+    return current_app.response_class(_pstats_text(profile), mimetype='text/plain', headers=headers)
+
+
+def error_response(error: ProfilerError) -> Any:
+    """Response JSON cho ProfilerError"""
+    from flask import jsonify
+    response = jsonify({'error': str(error)})
+    response.status_code = error.status
+    return response
+
+
+def sampler_response(sampler: StackSampler) -> Any:
+    """Response collapsed stacks của một lần lấy mẫu worker"""
+    from flask import current_app
+
+    return current_app.response_class(sampler.collapsed(), mimetype='text/plain', headers={
+        'X-Profile-Samples': str(sampler.samples),
+        'X-Profile-Duration': f'{sampler.duration * 1000:.3f}',
+        'Cache-Control': 'no-store',
+    })
+
+
+# Instance dùng chung cho toàn bộ process
+profiler = RequestProfiler()
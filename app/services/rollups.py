@@ -0,0 +1,280 @@
+"""
+Rollup Service - Bảng tổng hợp theo ngày cho doanh thu và số đơn hàng
+Chuỗi thời gian trên dashboard được tính từ bảng này nên chi phí phụ thuộc
+vào số ngày, không phụ thuộc số đơn hàng.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from app.services.dataset_cache import appended_digest, file_version, prefix_digest
+
+# Độ chi tiết hỗ trợ -> mã period của pandas
+GRANULARITIES: Dict[str, str] = {
+    'day': 'D',
+    'week': 'W',
+    'month': 'M',
+}
+
+METRICS = ('total', 'orders')
+
+# Số rollup tối đa cho các cửa sổ lọc (date range / status) được giữ lại
+MAX_VARIANTS = 32
+
+
+class DailyRollup:
+    """
+    Tổng doanh thu và số đơn theo (ngày, [status], [user_id])
+
+    Rollup ghi nhớ số dòng đã tổng hợp; khi orders chỉ được nối thêm dòng
+    mới, ``refresh(..., appended=True)`` chỉ tổng hợp phần mới.
+    """
+
+    def __init__(self, dimensions: Sequence[str] = ('status',)):
+        """
+        Args:
+            dimensions: Các cột chiều phụ (status, user_id) giữ lại trong rollup
+        """
+        self.dimensions: Tuple[str, ...] = tuple(dimensions)
+        self.table: pd.DataFrame = pd.DataFrame(columns=['day', *self.dimensions, *METRICS])
+        self.rows_seen = 0
+        # weakref để rollup không giữ bảng orders đã bị cache loại bỏ
+        self._source: Optional[weakref.ref] = None
+
+    @property
+    def source(self) -> Optional[pd.DataFrame]:
+        """Bảng orders đã được tổng hợp lần gần nhất (nếu còn sống)"""
+        return self._source() if self._source is not None else None
+
+    @property
+    def keys(self) -> list:
+        return ['day', *self.dimensions]
+
+    def refresh(self, orders_df: pd.DataFrame, appended: bool = False) -> 'DailyRollup':
+        """
+        Cập nhật rollup theo DataFrame orders mới nhất
+
+        Args:
+            orders_df: Toàn bộ bảng orders
+            appended: orders_df là bảng cũ được nối thêm dòng ở cuối
+
+        Returns:
+            Chính rollup này (để gọi nối tiếp)
+        """
+        if orders_df is self.source:
+            return self
+
+        if appended and len(orders_df) >= self.rows_seen:
+            self.append(orders_df.iloc[self.rows_seen:])
+        else:
+            self.rebuild(orders_df)
+        self._source = weakref.ref(orders_df)
+        return self
+
+    def rebuild(self, orders_df: pd.DataFrame) -> None:
+        """
+        Tổng hợp lại từ đầu
+
+        Args:
+            orders_df: Toàn bộ bảng orders
+        """
+        self.table = self._aggregate(orders_df)
+        self.rows_seen = len(orders_df)
+
+    def append(self, new_orders: pd.DataFrame) -> None:
+        """
+        Gộp các đơn hàng mới vào rollup (chi phí tỉ lệ với số dòng mới)
+
+        Args:
+            new_orders: Các dòng orders chưa được tổng hợp
+        """
+        if new_orders.empty:
+            return
+        partial = self._aggregate(new_orders)
+        if self.table.empty:
+            self.table = partial
+        else:
+            merged = pd.concat([self.table, partial], ignore_index=True)
+            self.table = merged.groupby(self.keys, sort=True, dropna=False)[list(METRICS)].sum().reset_index()
+        self.rows_seen += len(new_orders)
+
+    def series(
+        self,
+        metric: str,
+        granularity: str = 'day',
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        **filters: Optional[Sequence[str]]
+    ) -> pd.DataFrame:
+        """
+        Chuỗi thời gian của một chỉ số
+
+        Args:
+            metric: 'total' (doanh thu) hoặc 'orders' (số đơn)
+            granularity: 'day', 'week' hoặc 'month'
+            start: Ngày bắt đầu (bao gồm)
+            end: Ngày kết thúc (bao gồm)
+            **filters: Lọc theo chiều phụ, ví dụ status=['completed']
+
+        Returns:
+            DataFrame với cột order_date (kiểu date) và cột metric
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown rollup metric: {metric}")
+        return self.frame(granularity, start, end, metrics=(metric,), **filters)
+
+    def frame(
+        self,
+        granularity: str = 'day',
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        metrics: Sequence[str] = METRICS,
+        **filters: Optional[Sequence[str]]
+    ) -> pd.DataFrame:
+        """
+        Nhiều chỉ số theo thời gian trong cùng một lần groupby
+
+        Args:
+            granularity: 'day', 'week' hoặc 'month'
+            start: Ngày bắt đầu (bao gồm)
+            end: Ngày kết thúc (bao gồm)
+            metrics: Các chỉ số cần lấy
+            **filters: Lọc theo chiều phụ, ví dụ status=['completed']
+
+        Returns:
+            DataFrame với cột order_date (kiểu date) và các cột metrics
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        metrics = list(metrics)
+        table = self.table
+        if table.empty:
+            return pd.DataFrame(columns=['order_date', *metrics])
+
+        mask = pd.Series(True, index=table.index)
+        if start is not None:
+            mask &= table['day'] >= pd.Timestamp(start).normalize()
+        if end is not None:
+            mask &= table['day'] <= pd.Timestamp(end).normalize()
+        for column, values in filters.items():
+            if values is None:
+                continue
+            if column not in self.dimensions:
+                raise ValueError(f"Rollup has no dimension '{column}'")
+            mask &= table[column].isin(list(values))
+        table = table.loc[mask]
+
+        if granularity == 'day':
+            buckets = table['day']
+        else:
+            buckets = table['day'].dt.to_period(GRANULARITIES[granularity]).dt.start_time
+
+        grouped = table.groupby(buckets.rename('order_date'), sort=True)[metrics].sum().reset_index()
+        grouped['order_date'] = grouped['order_date'].dt.date
+        return grouped
+
+    def _aggregate(self, orders_df: pd.DataFrame) -> pd.DataFrame:
+        frame = pd.DataFrame({'day': pd.to_datetime(orders_df['order_date']).dt.normalize()})
+        for column in self.dimensions:
+            frame[column] = orders_df[column].astype(object).to_numpy()
+        frame['total'] = orders_df['total'].to_numpy() if 'total' in orders_df.columns else 0.0
+        frame['orders'] = 1
+        return frame.groupby(self.keys, sort=True, dropna=False)[list(METRICS)].sum().reset_index()
+
+
+class _TrackedRollup:
+    """Rollup kèm kích thước và digest toàn bộ file lúc tổng hợp"""
+    __slots__ = ('rollup', 'size', 'digest', 'lock')
+
+    def __init__(self, rollup: DailyRollup):
+        self.rollup = rollup
+        self.size = 0
+        self.digest = b''
+        # Khoá riêng của rollup: tổng hợp lại một file không chặn request dùng rollup khác
+        self.lock = threading.Lock()
+
+
+class RollupRegistry:
+    """
+    Giữ một DailyRollup cho mỗi file orders, dùng chung giữa các request
+
+    Khoá chung chỉ bảo vệ danh sách rollup; refresh / rebuild chạy dưới khoá
+    của từng rollup nên các file (và cửa sổ lọc) khác nhau cập nhật song song.
+    """
+
+    def __init__(self, dimensions: Sequence[str] = ('status',)):
+        self.dimensions: Tuple[str, ...] = tuple(dimensions)
+        self._rollups: 'OrderedDict[Tuple[str, Hashable], _TrackedRollup]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app
+
+        Args:
+            app: Flask application
+        """
+        dimensions = tuple(app.config.get('ROLLUP_DIMENSIONS', self.dimensions))
+        with self._lock:
+            if dimensions != self.dimensions:
+                self._rollups.clear()
+            self.dimensions = dimensions
+        app.extensions['rollups'] = self
+
+    def get(self, orders_path: str, orders_df: pd.DataFrame, variant: Optional[Hashable] = None) -> DailyRollup:
+        """
+        Lấy rollup đã cập nhật cho một file orders
+
+        Args:
+            orders_path: Đường dẫn file orders (định danh rollup)
+            orders_df: Bảng orders hiện tại
+            variant: Key của cửa sổ lọc nếu orders_df chỉ là một phần file
+                (None: toàn bộ lịch sử, được cập nhật tăng dần khi file nối thêm)
+
+        Returns:
+            DailyRollup đã refresh
+        """
+        path = os.path.abspath(orders_path)
+        key = (path, variant)
+        with self._lock:
+            tracked = self._rollups.get(key)
+            if tracked is None:
+                tracked = self._rollups[key] = _TrackedRollup(DailyRollup(self.dimensions))
+                self._trim()
+            self._rollups.move_to_end(key)
+
+        with tracked.lock:
+            if orders_df is tracked.rollup.source:
+                return tracked.rollup
+
+            if variant is not None:
+                # Cửa sổ lọc: tổng hợp lại, chi phí tỉ lệ với kích thước cửa sổ
+                tracked.rollup.refresh(orders_df)
+                return tracked.rollup
+
+            # File chỉ được nối thêm nếu toàn bộ phần cũ vẫn y nguyên (hash lại cả phần đầu)
+            _, size = file_version(path)
+            digest = appended_digest(path, tracked.size, tracked.digest, size) if tracked.size > 0 else None
+            tracked.rollup.refresh(orders_df, appended=digest is not None)
+            tracked.size = size
+            tracked.digest = digest if digest is not None else prefix_digest(path, size)
+            return tracked.rollup
+
+    def clear(self) -> None:
+        """Xoá toàn bộ rollup"""
+        with self._lock:
+            self._rollups.clear()
+
+    def _trim(self) -> None:
+        variants = [key for key in self._rollups if key[1] is not None]
+        for key in variants[:max(0, len(variants) - MAX_VARIANTS)]:
+            del self._rollups[key]
+
+
+# Instance dùng chung cho toàn bộ process
+rollups = RollupRegistry()
@@ -0,0 +1,147 @@
+"""
+Table Schemas - Kiểu dữ liệu khai báo cho từng file CSV
+Dùng chung cho việc đọc CSV và chuyển đổi sang snapshot dạng cột
+"""
+from typing import Any, Dict, List
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    # Chuỗi tự do lưu liền trong buffer Arrow thay vì mỗi giá trị một object Python
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:  # pragma: no cover - pyarrow là dependency tuỳ chọn
+    STRING_DTYPE = 'object'
+
+# dtype cho pd.read_csv; cột ngày khai báo riêng trong PARSE_DATES.
+# Mã lặp lại (id, trạng thái, tên sản phẩm trong order_details) -> category,
+# chuỗi gần như duy nhất -> STRING_DTYPE, số đếm -> int32, điểm đánh giá -> float32.
+# Tiền (price, total, subtotal) giữ float64 để tổng không mất chính xác.
+TABLE_DTYPES: Dict[str, Dict[str, Any]] = {
+    'products': {
+        'product_id': 'category',
+        'name': STRING_DTYPE,
+        'sku': STRING_DTYPE,
+        'category_id': 'category',
+        'price': 'float64',
+        'quantity': 'int32',
+        'description': STRING_DTYPE,
+        'weight_g': 'int32',
+        'supplier_id': 'category',
+        'rating': 'float32',
+        'tags': STRING_DTYPE,
+    },
+    'orders': {
+        'order_id': STRING_DTYPE,
+        'user_id': 'category',
+        'total': 'float64',
+        'status': 'category',
+    },
+    'order_details': {
+        'detail_id': 'int32',
+        'order_id': STRING_DTYPE,
+        'product_id': 'category',
+        'sku': 'category',
+        'product_name': 'category',
+        'unit_price': 'float64',
+        'quantity': 'int32',
+        'subtotal': 'float64',
+    },
+    'categories': {
+        'category_id': 'category',
+        'category_name': STRING_DTYPE,
+        'description': STRING_DTYPE,
+    },
+    'suppliers': {
+        'supplier_id': 'category',
+        'supplier_name': STRING_DTYPE,
+        'contact': STRING_DTYPE,
+        'email': STRING_DTYPE,
+        'country': 'category',
+    },
+    'users': {
+        'user_id': 'category',
+        'full_name': STRING_DTYPE,
+        'email': STRING_DTYPE,
+        # Số điện thoại là mã (giữ số 0 đầu), không phải số
+        'phone': STRING_DTYPE,
+        'address': STRING_DTYPE,
+    },
+}
+
+PARSE_DATES: Dict[str, List[str]] = {
+    'products': ['created_at'],
+    'orders': ['order_date'],
+    'order_details': [],
+    'categories': [],
+    'suppliers': [],
+    'users': ['created_at'],
+}
+
+# Cột lọc theo khoảng của mỗi bảng: snapshot giữ nguyên thứ tự dòng của CSV (phần
+# nối thêm luôn nằm cuối) và lưu min / max của cột này theo từng khối dòng (zone map)
+RANGE_KEYS: Dict[str, str] = {
+    'orders': 'order_date',
+}
+
+# Tăng khi thay đổi schema để snapshot cũ tự động bị tạo lại
+SCHEMA_VERSION = 4
+
+
+def read_csv_options(table: str) -> Dict[str, Any]:
+    """
+    Tham số pd.read_csv cho một bảng đã khai báo schema
+
+    Args:
+        table: Tên bảng (products, orders, order_details, categories, suppliers, users)
+
+    Returns:
+        Dictionary kwargs cho pd.read_csv (rỗng nếu bảng chưa có schema)
+    """
+    options: Dict[str, Any] = {}
+    if table in TABLE_DTYPES:
+        options['dtype'] = TABLE_DTYPES[table]
+    if PARSE_DATES.get(table):
+        options['parse_dates'] = PARSE_DATES[table]
+    return options
+
+
+def apply_dtypes(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """
+    Ép lại kiểu categorical sau khi ghép nhiều chunk
+    (mỗi chunk có tập category riêng nên pd.concat trả về object)
+
+    Args:
+        df: DataFrame đã ghép
+        table: Tên bảng
+
+    Returns:
+        DataFrame với các cột categorical đúng schema
+    """
+    categorical = [
+        column for column, dtype in TABLE_DTYPES.get(table, {}).items()
+        if dtype == 'category' and column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype)
+    ]
+    if not categorical:
+        return df
+    return df.astype({column: 'category' for column in categorical})
+
+
+def memory_usage(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Bộ nhớ thực của một DataFrame (deep: tính cả chuỗi và category)
+
+    Args:
+        df: DataFrame cần đo
+
+    Returns:
+        Dictionary {rows, bytes, bytes_per_row, columns: {cột: (dtype, bytes)}}
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    total = int(usage.sum())
+    return {
+        'rows': len(df),
+        'bytes': total,
+        'bytes_per_row': total / len(df) if len(df) else 0.0,
+        'columns': {column: (str(df[column].dtype), int(usage[column])) for column in df.columns}
+    }
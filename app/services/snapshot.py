@@ -0,0 +1,384 @@
+"""
+Snapshot Service - Chuyển CSV sang định dạng cột nhị phân (Arrow IPC / Feather)
+Snapshot được đọc bằng memory-map nên các cột số không cần parse lại hay copy.
+Nếu chưa cài pyarrow, mọi thao tác tự động quay về pd.read_csv.
+"""
+import hashlib
+import os
+import json
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.services.dataset_cache import file_version
+from app.services.schema import RANGE_KEYS, SCHEMA_VERSION, STRING_DTYPE, read_csv_options
+from app.services.timing import stage
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pa_compute
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pragma: no cover - pyarrow là dependency tuỳ chọn
+    pa = None
+    pa_compute = None
+    pa_ipc = None
+
+# Key trong metadata của snapshot ghi lại phiên bản CSV nguồn
+_SOURCE_META_KEY = b'source_version'
+
+# Zone map: [min, max] (ns) của cột RANGE_KEYS trong mỗi khối ZONE_ROWS dòng
+_ZONES_META_KEY = b'zones'
+ZONE_ROWS = 65_536
+
+# Thư mục instance mặc định của Flask (<thư mục dự án>/instance) - dùng khi chưa gọi init_app
+DEFAULT_INSTANCE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'instance')
+
+
+def _to_pandas(data: Any) -> pd.DataFrame:
+    """Table / RecordBatch -> DataFrame; cột chuỗi giữ nguyên buffer Arrow như khi đọc CSV"""
+    if STRING_DTYPE == 'object':
+        return data.to_pandas(split_blocks=True)
+    string_dtype = pd.StringDtype('pyarrow')
+    mapping = {pa.string(): string_dtype, pa.large_string(): string_dtype}
+    return data.to_pandas(split_blocks=True, types_mapper=mapping.get)
+
+
+def _zone_map(values: pd.Series) -> List[Optional[List[int]]]:
+    """[min, max] (ns) của mỗi khối ZONE_ROWS dòng; None nếu khối chỉ có NaT"""
+    ns = pd.to_datetime(values).to_numpy(dtype='datetime64[ns]').view('i8')
+    valid = ns != np.iinfo(np.int64).min
+    zones: List[Optional[List[int]]] = []
+    for start in range(0, len(ns), ZONE_ROWS):
+        block = ns[start:start + ZONE_ROWS][valid[start:start + ZONE_ROWS]]
+        zones.append([int(block.min()), int(block.max())] if len(block) else None)
+    return zones
+
+
+def to_arrow(table: str, df: pd.DataFrame, metadata: Optional[Dict[bytes, bytes]] = None) -> Any:
+    """
+    DataFrame đã parse theo schema -> Arrow Table để ghi snapshot
+
+    Thứ tự dòng được giữ nguyên như CSV (DailyRollup / ingest nhận phần nối thêm
+    theo vị trí dòng); bảng có RANGE_KEYS được ghi kèm zone map để lọc theo khoảng.
+
+    Args:
+        table: Tên bảng trong schema (quyết định cột của zone map)
+        df: DataFrame của bảng
+        metadata: Metadata thêm vào schema
+
+    Returns:
+        pyarrow.Table
+    """
+    arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+    merged = dict(arrow_table.schema.metadata or {})
+    if RANGE_KEYS.get(table):
+        merged[_ZONES_META_KEY] = json.dumps(_zone_map(df[RANGE_KEYS[table]])).encode()
+    merged.update(metadata or {})
+    return arrow_table.replace_schema_metadata(merged)
+
+
+def write_ipc(path: str, arrow_table: Any) -> None:
+    """
+    Ghi Arrow IPC không nén (ghi nguyên tử qua file tạm)
+
+    Mỗi cột được ghi thành một chunk duy nhất: khi đọc bằng memory-map,
+    to_pandas trỏ thẳng vào vùng nhớ map thay vì ghép các chunk vào bộ nhớ riêng.
+
+    Args:
+        path: Đường dẫn file .arrow
+        arrow_table: pyarrow.Table
+    """
+    try:
+        arrow_table = arrow_table.combine_chunks()
+    except (pa.ArrowInvalid, pa.ArrowCapacityError):
+        # Cột chuỗi > 2 GB không gộp được vào một chunk: ghi theo chunk như cũ
+        pass
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    # Không nén để có thể memory-map và đọc zero-copy
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa_ipc.new_file(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table, max_chunksize=max(arrow_table.num_rows, 1))
+    os.replace(tmp_path, path)
+
+
+def _filter_range(arrow_table: Any, column: str, start: Optional[pd.Timestamp],
+                  end: Optional[pd.Timestamp]) -> Any:
+    """Các dòng có start <= column <= end, chỉ quét các khối zone map giao với khoảng"""
+    raw_zones = (arrow_table.schema.metadata or {}).get(_ZONES_META_KEY)
+    n_rows = arrow_table.num_rows
+    if raw_zones is None:
+        # Không có zone map: quét toàn bộ như một khối
+        zones, zone_rows = [[None, None]], max(n_rows, 1)
+    else:
+        zones, zone_rows = json.loads(raw_zones), ZONE_ROWS
+    lo = pd.Timestamp(start).value if start is not None else None
+    hi = pd.Timestamp(end).value if end is not None else None
+
+    # Gộp các khối liền nhau cần quét thành slice (không copy)
+    ranges: List[List[int]] = []
+    for i, zone in enumerate(zones):
+        if zone is None:
+            continue
+        zone_min, zone_max = zone
+        if (hi is not None and zone_min is not None and zone_min > hi) or \
+                (lo is not None and zone_max is not None and zone_max < lo):
+            continue
+        if ranges and ranges[-1][1] == i * zone_rows:
+            ranges[-1][1] = min((i + 1) * zone_rows, n_rows)
+        else:
+            ranges.append([i * zone_rows, min((i + 1) * zone_rows, n_rows)])
+
+    pieces = []
+    for first, last in ranges:
+        piece = arrow_table.slice(first, last - first)
+        values = piece.column(column)
+        mask = None
+        if lo is not None:
+            mask = pa_compute.greater_equal(values, pa.scalar(np.datetime64(lo, 'ns'), type=values.type))
+        if hi is not None:
+            upper = pa_compute.less_equal(values, pa.scalar(np.datetime64(hi, 'ns'), type=values.type))
+            mask = upper if mask is None else pa_compute.and_(mask, upper)
+        pieces.append(piece.filter(mask))
+    if not pieces:
+        return arrow_table.slice(0, 0)
+    return pa.concat_tables(pieces) if len(pieces) > 1 else pieces[0]
+
+
+def read_ipc(path: str) -> pd.DataFrame:
+    """
+    Đọc file Arrow IPC bằng memory-map
+
+    Args:
+        path: Đường dẫn file .arrow
+
+    Returns:
+        DataFrame (cột của file một chunk trỏ thẳng vào vùng nhớ map, chỉ đọc)
+    """
+    # Vùng nhớ map vẫn sống sau khi đóng file, cho tới khi DataFrame được giải phóng
+    with pa.memory_map(path, 'r') as source:
+        arrow_table = pa_ipc.open_file(source).read_all()
+    return _to_pandas(arrow_table)
+
+
+class SnapshotManager:
+    """Quản lý snapshot Arrow cho các file CSV đã khai báo schema"""
+
+    def __init__(self, snapshot_dir: Optional[str] = None, auto_convert: bool = True):
+        """
+        Args:
+            snapshot_dir: Thư mục chứa snapshot (None: <instance>/snapshots)
+            auto_convert: Tự tạo snapshot khi đọc CSV lần đầu
+        """
+        self.snapshot_dir = snapshot_dir or os.path.join(DEFAULT_INSTANCE_PATH, 'snapshots')
+        self.auto_convert = auto_convert
+
+    @property
+    def available(self) -> bool:
+        """pyarrow đã được cài đặt hay chưa"""
+        return pa is not None
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app
+
+        Args:
+            app: Flask application
+        """
+        self.snapshot_dir = app.config.get('SNAPSHOT_DIR') or os.path.join(app.instance_path, 'snapshots')
+        self.auto_convert = bool(app.config.get('SNAPSHOT_AUTO_CONVERT', True))
+        app.extensions['snapshots'] = self
+
+    def path_for(self, csv_path: str) -> str:
+        """
+        Đường dẫn snapshot tương ứng với một file CSV
+
+        Tên file gồm hash của đường dẫn tuyệt đối: hai CSV cùng tên ở các thư
+        mục khác nhau không dùng chung snapshot.
+
+        Args:
+            csv_path: Đường dẫn CSV nguồn
+
+        Returns:
+            Đường dẫn file .arrow
+        """
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        digest = hashlib.blake2b(os.path.abspath(csv_path).encode(), digest_size=8).hexdigest()
+        return os.path.join(self.snapshot_dir, f'{stem}-{digest}.arrow')
+
+    def is_fresh(self, csv_path: str) -> bool:
+        """
+        Snapshot có tồn tại và được tạo từ đúng phiên bản CSV hiện tại không
+
+        Args:
+            csv_path: Đường dẫn CSV nguồn
+
+        Returns:
+            True nếu có thể đọc snapshot thay cho CSV
+        """
+        if not self.available:
+            return False
+        path = self.path_for(csv_path)
+        if not os.path.exists(path):
+            return False
+        try:
+            with pa.memory_map(path, 'r') as source:
+                schema = pa_ipc.open_file(source).schema
+        except (OSError, pa.ArrowInvalid):
+            return False
+        meta = (schema.metadata or {}).get(_SOURCE_META_KEY)
+        return meta is not None and meta == self._source_tag(csv_path)
+
+    def convert(self, table: str, csv_path: str, df: Optional[pd.DataFrame] = None) -> str:
+        """
+        Chuyển một file CSV sang snapshot (ghi nguyên tử qua file tạm)
+
+        Args:
+            table: Tên bảng trong schema
+            csv_path: Đường dẫn CSV nguồn
+            df: DataFrame đã đọc sẵn theo schema (None: đọc lại từ CSV)
+
+        Returns:
+            Đường dẫn snapshot đã ghi
+
+        Raises:
+            RuntimeError: Nếu chưa cài pyarrow
+        """
+        if not self.available:
+            raise RuntimeError("pyarrow is required to write snapshots")
+
+        # Lấy tag trước khi đọc để CSV bị sửa giữa chừng sẽ bị coi là cũ
+        source_tag = self._source_tag(csv_path)
+        if df is None:
+            df = pd.read_csv(csv_path, **read_csv_options(table))
+        path = self.path_for(csv_path)
+        write_ipc(path, to_arrow(table, df, {_SOURCE_META_KEY: source_tag}))
+        return path
+
+    def read(self, csv_path: str) -> pd.DataFrame:
+        """
+        Đọc snapshot bằng memory-map
+
+        Args:
+            csv_path: Đường dẫn CSV nguồn
+
+        Returns:
+            DataFrame (các cột trỏ thẳng vào vùng nhớ map, chỉ đọc)
+        """
+        return read_ipc(self.path_for(csv_path))
+
+    def read_filtered(
+        self,
+        table: str,
+        csv_path: str,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        isin: Optional[Dict[str, Sequence[Any]]] = None
+    ) -> pd.DataFrame:
+        """
+        Đọc một phần snapshot: lọc theo khoảng trên cột RANGE_KEYS (chỉ xét các
+        khối mà zone map giao với khoảng) rồi lọc theo giá trị. Chỉ các dòng được
+        chọn mới được chuyển sang pandas; thứ tự dòng giữ như trong CSV.
+
+        Args:
+            table: Tên bảng trong schema
+            csv_path: Đường dẫn CSV nguồn
+            start: Giá trị nhỏ nhất của cột RANGE_KEYS (bao gồm)
+            end: Giá trị lớn nhất của cột RANGE_KEYS (bao gồm)
+            isin: Mapping cột -> danh sách giá trị được giữ lại
+
+        Returns:
+            DataFrame chỉ chứa các dòng thoả điều kiện
+        """
+        with pa.memory_map(self.path_for(csv_path), 'r') as source:
+            arrow_table = pa_ipc.open_file(source).read_all()
+
+        column = RANGE_KEYS.get(table)
+        if column and (start is not None or end is not None):
+            arrow_table = _filter_range(arrow_table, column, start, end)
+
+        for column, values in (isin or {}).items():
+            if len(values) == 0:
+                arrow_table = arrow_table.slice(0, 0)
+                continue
+            mask = pa_compute.is_in(arrow_table.column(column), value_set=pa.array(list(values)))
+            arrow_table = arrow_table.filter(mask)
+
+        return _to_pandas(arrow_table)
+
+    def iter_batches(self, csv_path: str, batch_rows: int) -> Iterator[pd.DataFrame]:
+        """
+        Duyệt snapshot theo từng batch (mỗi batch là một slice của vùng nhớ map)
+
+        Args:
+            csv_path: Đường dẫn CSV nguồn
+            batch_rows: Số dòng tối đa mỗi batch
+
+        Yields:
+            DataFrame của từng batch
+        """
+        with pa.memory_map(self.path_for(csv_path), 'r') as source:
+            arrow_table = pa_ipc.open_file(source).read_all()
+        for batch in arrow_table.to_batches(max_chunksize=batch_rows):
+            yield _to_pandas(batch)
+
+    def load(self, table: str, csv_path: str) -> pd.DataFrame:
+        """
+        Load một bảng: ưu tiên snapshot còn mới, nếu không thì đọc CSV theo schema
+
+        Args:
+            table: Tên bảng trong schema
+            csv_path: Đường dẫn CSV nguồn
+
+        Returns:
+            DataFrame của bảng
+        """
+        if self.is_fresh(csv_path):
+            with stage(f'parse.{table}.arrow'):
+                return self.read(csv_path)
+
+        with stage(f'parse.{table}.csv'):
+            df = pd.read_csv(csv_path, **read_csv_options(table))
+        if self.available and self.auto_convert:
+            try:
+                self.convert(table, csv_path, df)
+            except OSError:
+                # Không ghi được snapshot (read-only FS...) thì vẫn dùng CSV
+                pass
+        return df
+
+    def convert_all(self, tables: Dict[str, str], force: bool = False) -> List[Dict[str, str]]:
+        """
+        Chuyển nhiều CSV sang snapshot
+
+        Args:
+            tables: Mapping tên bảng -> đường dẫn CSV
+            force: Tạo lại kể cả khi snapshot còn mới
+
+        Returns:
+            Danh sách kết quả {table, csv, snapshot, status}
+        """
+        results = []
+        for table, csv_path in tables.items():
+            if not os.path.exists(csv_path):
+                results.append({'table': table, 'csv': csv_path, 'snapshot': '', 'status': 'missing'})
+                continue
+            if not force and self.is_fresh(csv_path):
+                status = 'fresh'
+            else:
+                self.convert(table, csv_path)
+                status = 'converted'
+            results.append({'table': table, 'csv': csv_path,
+                            'snapshot': self.path_for(csv_path), 'status': status})
+        return results
+
+    @staticmethod
+    def _source_tag(csv_path: str) -> bytes:
+        mtime_ns, size = file_version(csv_path)
+        return json.dumps({'mtime_ns': mtime_ns, 'size': size, 'schema': SCHEMA_VERSION}).encode()
+
+
+# Instance dùng chung cho toàn bộ process
+snapshots = SnapshotManager()
@@ -0,0 +1,380 @@
+"""
+SQL Analysis Service - Cùng API với DataAnalysisService nhưng tính trong database
+Group, tổng và top-N chạy trên các cột có index (order_date, status,
+product_id); chỉ các dòng kết quả được chuyển sang Python.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import Integer, String, cast, func, select
+
+from app.extensions import db
+from app.models import Category, Order, OrderDetail, Product, Supplier, User
+from app.services.dimensions import DIMENSIONS, UNKNOWN_LABEL
+from app.services.order_filter import OrderFilter
+from app.services.product_catalog import ProductPage, ProductQuery
+from app.services.rollups import GRANULARITIES
+from app.services.timing import instrument_methods
+
+# Chiều phân tích -> model của bảng danh mục
+_DIMENSION_MODELS = {
+    'category': Category,
+    'supplier': Supplier,
+    'customer': User,
+}
+
+
+@instrument_methods
+class SqlAnalysisService:
+    """Analytics trên database (Flask-SQLAlchemy session)"""
+
+    def __init__(self, order_filter: Optional[OrderFilter] = None):
+        """
+        Args:
+            order_filter: Cửa sổ ngày / trạng thái áp dụng cho orders và order_details
+        """
+        self.order_filter = order_filter
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], order_filter: Optional[OrderFilter] = None) -> 'SqlAnalysisService':
+        """
+        Khởi tạo service từ Flask config (kết nối lấy từ SQLALCHEMY_DATABASE_URI)
+
+        Args:
+            config: Flask config
+            order_filter: Cửa sổ ngày / trạng thái (tuỳ chọn)
+
+        Returns:
+            SqlAnalysisService
+        """
+        return cls(order_filter=order_filter)
+
+    # ---- Bộ lọc -------------------------------------------------------------
+
+    def _order_conditions(self) -> List[Any]:
+        """Điều kiện WHERE trên orders theo order_filter"""
+        conditions: List[Any] = []
+        order_filter = self.order_filter
+        if order_filter is None:
+            return conditions
+        if order_filter.start is not None:
+            conditions.append(Order.order_date >= order_filter.start_ts.to_pydatetime())
+        if order_filter.end is not None:
+            # end bao gồm cả ngày: so sánh với đầu ngày kế tiếp
+            next_day = pd.Timestamp(order_filter.end) + pd.Timedelta(days=1)
+            conditions.append(Order.order_date < next_day.to_pydatetime())
+        if order_filter.statuses:
+            conditions.append(Order.status.in_(order_filter.statuses))
+        return conditions
+
+    def _detail_conditions(self) -> List[Any]:
+        """Điều kiện WHERE trên order_details (chỉ các đơn nằm trong cửa sổ)"""
+        conditions = self._order_conditions()
+        if not conditions:
+            return []
+        return [OrderDetail.order_id.in_(select(Order.order_id).where(*conditions))]
+
+    # ---- Products -----------------------------------------------------------
+
+    def get_basic_stats(self) -> Dict[str, Any]:
+        """
+        Tính toán các chỉ số thống kê cơ bản
+
+        Returns:
+            Dictionary chứa các chỉ số
+        """
+        row = db.session.execute(select(
+            func.count(Product.id),
+            func.coalesce(func.sum(Product.quantity), 0),
+            func.coalesce(func.sum(Product.price * Product.quantity), 0.0),
+            func.coalesce(func.avg(Product.price), 0.0),
+            func.coalesce(func.avg(Product.quantity), 0.0)
+        )).one()
+        return {
+            'total_products': int(row[0]),
+            'total_quantity': int(row[1]),
+            'total_revenue': float(row[2]),
+            'avg_price': float(row[3]),
+            'avg_quantity': float(row[4])
+        }
+
+    def _product_scalars(self) -> Dict[str, Any]:
+        stats = self.get_basic_stats()
+        return {
+            'total_products': stats['total_products'],
+            'total_quantity': stats['total_quantity'],
+            'stock_value': stats['total_revenue'],
+            'avg_price': stats['avg_price'],
+            'avg_quantity': stats['avg_quantity']
+        }
+
+    def get_product_data(self) -> Tuple[List[str], List[int], List[float]]:
+        """
+        Lấy dữ liệu sản phẩm cho biểu đồ
+
+        Returns:
+            Tuple (labels, quantities, prices)
+        """
+        rows = db.session.execute(
+            select(Product.name, Product.quantity, Product.price).order_by(Product.id)
+        ).all()
+        return [r[0] for r in rows], [int(r[1]) for r in rows], [float(r[2]) for r in rows]
+
+    def _products_frame(self, statement: Any) -> pd.DataFrame:
+        columns = [c.name for c in Product.__table__.columns]
+        rows = db.session.execute(statement).all()
+        return pd.DataFrame(rows, columns=[*columns, 'revenue'])
+
+    def get_revenue_by_product(self) -> pd.DataFrame:
+        """
+        Tính doanh thu theo từng sản phẩm
+
+        Returns:
+            DataFrame với cột revenue
+        """
+        revenue = (Product.price * Product.quantity).label('revenue')
+        return self._products_frame(
+            select(*Product.__table__.columns, revenue).order_by(revenue.desc())
+        )
+
+    def get_top_products(self, n: int = 5, by: str = 'quantity') -> pd.DataFrame:
+        """
+        Lấy top N sản phẩm
+
+        Args:
+            n: Số lượng sản phẩm cần lấy
+            by: Tiêu chí sắp xếp ('quantity', 'price', 'revenue')
+
+        Returns:
+            DataFrame chứa top products
+        """
+        revenue = (Product.price * Product.quantity).label('revenue')
+        key = revenue if by == 'revenue' else getattr(Product, by)
+        return self._products_frame(
+            select(*Product.__table__.columns, revenue).order_by(key.desc()).limit(n)
+        )
+
+    def get_product_page(self, query: ProductQuery) -> ProductPage:
+        """
+        Một trang sản phẩm: lọc / sắp xếp / LIMIT-OFFSET trong database.
+        Tìm kiếm dùng LIKE nên (khác bản pandas) có phân biệt dấu.
+
+        Args:
+            query: Tham số page, per_page, sort, q
+
+        Returns:
+            ProductPage
+        """
+        revenue = (Product.price * Product.quantity).label('revenue')
+        statement = select(*Product.__table__.columns, revenue)
+
+        for token in query.q.split():
+            pattern = f'%{token}%'
+            statement = statement.where(
+                Product.name.ilike(pattern) | Product.sku.ilike(pattern) | Product.tags.ilike(pattern)
+            )
+
+        total = db.session.execute(select(func.count()).select_from(statement.subquery())).scalar_one()
+
+        column = query.sort.lstrip('-')
+        if column:
+            key = revenue if column == 'revenue' else getattr(Product, column)
+            statement = statement.order_by(key.desc() if query.sort.startswith('-') else key, Product.id)
+        else:
+            statement = statement.order_by(Product.id)
+
+        statement = statement.limit(query.per_page).offset((query.page - 1) * query.per_page)
+        items = self._products_frame(statement).to_dict('records')
+        return ProductPage(items=items, total=int(total), query=query)
+
+    # ---- Orders -------------------------------------------------------------
+
+    def get_total_orders(self) -> int:
+        return int(db.session.execute(
+            select(func.count(Order.order_id)).where(*self._order_conditions())
+        ).scalar_one())
+
+    def get_total_revenue(self) -> float:
+        return float(db.session.execute(
+            select(func.coalesce(func.sum(Order.total), 0.0)).where(*self._order_conditions())
+        ).scalar_one())
+
+    def get_total_quantity_sold(self) -> int:
+        return int(db.session.execute(
+            select(func.coalesce(func.sum(OrderDetail.quantity), 0)).where(*self._detail_conditions())
+        ).scalar_one())
+
+    def get_avg_order_value(self) -> float:
+        count, revenue = db.session.execute(
+            select(func.count(Order.order_id), func.coalesce(func.sum(Order.total), 0.0))
+            .where(*self._order_conditions())
+        ).one()
+        return float(revenue / count) if count else 0.0
+
+    def _bucket(self, granularity: str) -> Tuple[Any, bool]:
+        """
+        Biểu thức gom nhóm order_date theo granularity
+
+        Returns:
+            Tuple (biểu thức SQL, cần gom lại trong pandas hay không).
+            Với dialect không hỗ trợ, database gom theo ngày và pandas gom tiếp.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        dialect = db.session.get_bind().dialect.name
+        column = Order.order_date
+        if granularity == 'day':
+            return func.date(column), False
+        if dialect == 'postgresql':
+            return func.date_trunc(granularity, column), False
+        if dialect == 'sqlite':
+            if granularity == 'month':
+                return func.strftime('%Y-%m-01', column), False
+            # Thứ Hai đầu tuần (giống pandas Period 'W')
+            days_back = (cast(func.strftime('%w', column), Integer) + 6) % 7
+            return func.date(column, '-' + cast(days_back, String) + ' days'), False
+        return func.date(column), True
+
+    def _time_series(self, granularity: str) -> pd.DataFrame:
+        """Doanh thu và số đơn theo thời gian (một câu GROUP BY)"""
+        bucket, regroup = self._bucket(granularity)
+        bucket = bucket.label('order_date')
+        rows = db.session.execute(
+            select(bucket, func.sum(Order.total).label('total'), func.count(Order.order_id).label('orders'))
+            .where(*self._order_conditions())
+            .group_by(bucket)
+            .order_by(bucket)
+        ).all()
+
+        df = pd.DataFrame(rows, columns=['order_date', 'total', 'orders'])
+        if df.empty:
+            return df
+        dates = pd.to_datetime(df['order_date'])
+        if regroup:
+            dates = dates.dt.to_period(GRANULARITIES[granularity]).dt.start_time
+            df = df.assign(order_date=dates).groupby('order_date', sort=True)[['total', 'orders']].sum().reset_index()
+            dates = df['order_date']
+        df['order_date'] = dates.dt.date
+        df['total'] = df['total'].astype('float64')
+        df['orders'] = df['orders'].astype('int64')
+        return df
+
+    def get_revenue_over_time(self, granularity: str = 'day') -> pd.DataFrame:
+        """
+        Doanh thu theo thời gian
+
+        Args:
+            granularity: 'day', 'week' hoặc 'month'
+
+        Returns:
+            DataFrame với cột order_date và total
+        """
+        return self._time_series(granularity)[['order_date', 'total']]
+
+    def get_orders_per_day(self, granularity: str = 'day') -> pd.DataFrame:
+        """
+        Số đơn hàng theo thời gian
+
+        Args:
+            granularity: 'day', 'week' hoặc 'month'
+
+        Returns:
+            DataFrame với cột order_date và orders
+        """
+        return self._time_series(granularity)[['order_date', 'orders']]
+
+    def get_top_products_by_revenue(self, n: int = 10) -> pd.DataFrame:
+        """
+        Top N sản phẩm theo doanh thu (GROUP BY product_id + ORDER BY + LIMIT)
+
+        Args:
+            n: Số sản phẩm
+
+        Returns:
+            DataFrame với cột product_id, product_name, subtotal
+        """
+        subtotal = func.sum(OrderDetail.subtotal).label('subtotal')
+        rows = db.session.execute(
+            select(OrderDetail.product_id, OrderDetail.product_name, subtotal)
+            .where(*self._detail_conditions())
+            .group_by(OrderDetail.product_id, OrderDetail.product_name)
+            .order_by(subtotal.desc())
+            .limit(n)
+        ).all()
+        return pd.DataFrame(rows, columns=['product_id', 'product_name', 'subtotal'])
+
+    def get_revenue_breakdown(self, dimension: str, n: Optional[int] = None) -> pd.DataFrame:
+        """
+        Doanh thu theo danh mục / nhà cung cấp / khách hàng (LEFT JOIN + GROUP BY)
+
+        Args:
+            dimension: 'category', 'supplier' hoặc 'customer'
+            n: Chỉ lấy n dòng có doanh thu cao nhất (None: tất cả)
+
+        Returns:
+            DataFrame cùng cột với DataAnalysisService.get_revenue_breakdown
+
+        Raises:
+            ValueError: Nếu dimension không hợp lệ
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        spec = DIMENSIONS[dimension]
+        model = _DIMENSION_MODELS[dimension]
+        key, label = getattr(model, spec.key), getattr(model, spec.label)
+
+        if spec.via_products:
+            revenue = func.sum(OrderDetail.subtotal).label('revenue')
+            statement = (
+                select(key, label, revenue)
+                .select_from(OrderDetail)
+                .outerjoin(Product, Product.product_id == OrderDetail.product_id)
+                .outerjoin(model, key == getattr(Product, spec.key))
+                .where(*self._detail_conditions())
+            )
+            columns = [spec.key, spec.label, 'revenue']
+        else:
+            revenue = func.sum(Order.total).label('revenue')
+            statement = (
+                select(key, label, revenue, func.count(Order.order_id))
+                .select_from(Order)
+                .outerjoin(model, key == Order.user_id)
+                .where(*self._order_conditions())
+            )
+            columns = [spec.key, spec.label, 'revenue', 'orders']
+
+        statement = statement.group_by(key, label).order_by(revenue.desc())
+        if n is not None:
+            statement = statement.limit(n)
+
+        df = pd.DataFrame(db.session.execute(statement).all(), columns=columns)
+        # Khoá không có trong bảng danh mục -> một dòng chung như bản pandas
+        unknown = df[spec.key].isna()
+        df.loc[unknown, spec.key] = ''
+        df.loc[unknown, spec.label] = UNKNOWN_LABEL
+        df['revenue'] = df['revenue'].astype('float64')
+        if 'orders' in df.columns:
+            df['orders'] = df['orders'].astype('int64')
+        return df
+
+    # ---- Dashboard ----------------------------------------------------------
+
+    def compute_kpi_scalars(self) -> Dict[str, Any]:
+        """
+        Chỉ các KPI dạng số
+
+        Returns:
+            Dictionary cùng key với DataAnalysisService.compute_kpi_scalars()
+        """
+        total_orders, total_revenue = db.session.execute(
+            select(func.count(Order.order_id), func.coalesce(func.sum(Order.total), 0.0))
+            .where(*self._order_conditions())
+        ).one()
+        return {
+            **self._product_scalars(),
+            'total_orders': int(total_orders),
+            'total_revenue': float(total_revenue),
+            'total_quantity_sold': self.get_total_quantity_sold(),
+            'avg_order_value': float(total_revenue / total_orders) if total_orders else 0.0
+        }
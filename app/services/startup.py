@@ -0,0 +1,210 @@
+"""
+Startup - Chi phí khởi động của app và nạp sẵn trước khi fork
+Báo cáo thời gian import theo module (python -X importtime) so với ngân sách khởi
+động, và preload() cho master process của gunicorn (preload_app) trước khi fork worker.
+"""
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Thư viện nặng được import sẵn trong master (worker fork ra dùng chung trang bộ nhớ)
+HEAVY_MODULES = (
+    'numpy',
+    'pandas',
+    'pyarrow',
+    'plotly.graph_objects',
+    'plotly.io',
+    'plotly.subplots',
+    'sqlalchemy.orm',
+)
+
+DEFAULT_BUDGET_MS = 1500.0
+
+# Chạy trong process mới: import app, tạo app và in thời gian (JSON) ra stdout
+_PROBE = (
+    'import json, sys, time\n'
+    'started = time.perf_counter()\n'
+    'from app import create_app\n'
+    'imported = time.perf_counter()\n'
+    'create_app(sys.argv[1])\n'
+    'finished = time.perf_counter()\n'
+    'print(json.dumps({"import_s": imported - started, "create_app_s": finished - imported}))\n'
+)
+
+
+@dataclass
+class ImportRecord:
+    """Một dòng của python -X importtime"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+    @property
+    def package(self) -> str:
+        return self.module.split('.', 1)[0]
+
+
+def parse_importtime(text: str) -> List[ImportRecord]:
+    """
+    Đọc output (stderr) của python -X importtime
+
+    Args:
+        text: Các dòng 'import time: self | cumulative | module'
+
+    Returns:
+        Danh sách ImportRecord theo thứ tự trong output
+    """
+    records = []
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            # Dòng tiêu đề 'self [us] | cumulative | imported package'
+            continue
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        records.append(ImportRecord(
+            module=stripped,
+            self_us=int(parts[0]),
+            cumulative_us=int(parts[1]),
+            depth=(len(name) - len(stripped) - 1) // 2,
+        ))
+    return records
+
+
+def package_totals(records: List[ImportRecord]) -> Dict[str, Dict[str, float]]:
+    """
+    Gộp thời gian import theo package gốc (pandas.core.* -> pandas)
+
+    Args:
+        records: Kết quả parse_importtime
+
+    Returns:
+        Mapping package -> {self_ms, modules}, nhiều thời gian nhất trước
+    """
+    totals: Dict[str, Dict[str, float]] = {}
+    for record in records:
+        entry = totals.setdefault(record.package, {'self_ms': 0.0, 'modules': 0})
+        entry['self_ms'] += record.self_us / 1000
+        entry['modules'] += 1
+    return dict(sorted(totals.items(), key=lambda item: -item[1]['self_ms']))
+
+
+def startup_report(config_name: str, budget_ms: float = DEFAULT_BUDGET_MS,
+                   root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Đo thời gian khởi động trong một interpreter mới (import app + create_app)
+
+    Args:
+        config_name: Tên config truyền cho create_app
+        budget_ms: Ngân sách cho import + create_app (ms)
+        root: Thư mục chứa package app (mặc định thư mục cha của app/)
+
+    Returns:
+        Dict gồm import_ms, create_app_ms, total_ms, process_ms, budget_ms,
+        over_budget, packages (package_totals) và records
+
+    Raises:
+        RuntimeError: Nếu process đo bị lỗi
+    """
+    root = root or os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE, config_name],
+        cwd=root, capture_output=True, text=True,
+    )
+    process_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        tail = '\n'.join(line for line in proc.stderr.splitlines() if not line.startswith('import time:'))
+        raise RuntimeError(f"create_app('{config_name}') lỗi:\n{tail[-2000:]}")
+
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    records = parse_importtime(proc.stderr)
+    import_ms = timings['import_s'] * 1000
+    create_app_ms = timings['create_app_s'] * 1000
+    total_ms = import_ms + create_app_ms
+    return {
+        'config': config_name,
+        'import_ms': import_ms,
+        'create_app_ms': create_app_ms,
+        'total_ms': total_ms,
+        'process_ms': process_ms,
+        'budget_ms': budget_ms,
+        'over_budget': total_ms > budget_ms,
+        'packages': package_totals(records),
+        'records': records,
+    }
+
+
+def preload(app, warm_data: Optional[bool] = None, freeze: bool = True) -> Dict[str, float]:
+    """
+    Nạp sẵn trong master process trước khi fork worker (gunicorn preload_app)
+
+    Import các thư viện nặng, dựng thử mỗi loại biểu đồ (validator của Plotly),
+    publish các bảng vào dataset store nếu bật (worker chỉ còn attach) và - nếu
+    PRELOAD_DATA - load dataset vào cache. Thread của load_pool và process kaleido
+    của chart_exporter được dừng trước khi fork; worker tự tạo lại khi cần.
+
+    Args:
+        app: Flask application
+        warm_data: Load dataset (mặc định theo PRELOAD_DATA)
+        freeze: gc.freeze() để GC của worker không ghi vào trang nhớ dùng chung
+
+    Returns:
+        Mapping bước -> thời gian (giây)
+    """
+    import importlib
+    from app.services.chart_export import chart_exporter
+    from app.services.data_analysis import configured_paths
+    from app.services.dataset_store import dataset_store
+    from app.services.load_pool import load_pool
+    from app.services.visualizer import VisualizerService
+
+    steps: Dict[str, float] = {}
+    started = time.perf_counter()
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:  # pragma: no cover - pyarrow là tuỳ chọn
+            pass
+    steps['imports'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    VisualizerService.warm_up()
+    steps['charts'] = time.perf_counter() - started
+
+    if dataset_store.enabled:
+        started = time.perf_counter()
+        dataset_store.convert_all(configured_paths(app.config))
+        steps['store'] = time.perf_counter() - started
+
+    if warm_data is None:
+        warm_data = bool(app.config.get('PRELOAD_DATA', False))
+    if warm_data:
+        from app.extensions import db
+        from app.services.dashboard import build_payload, default_payload_keys
+        from app.services.data_analysis import analysis_service
+
+        started = time.perf_counter()
+        with app.app_context():
+            # Cùng code với /api/* của dashboard: KPI, chuỗi thời gian, top sản phẩm
+            service = analysis_service(app.config)
+            for key in default_payload_keys([]):
+                build_payload(service, key)
+            # Kết nối database (ANALYTICS_BACKEND='sql') không được dùng chung qua fork
+            db.engine.dispose()
+        steps['data'] = time.perf_counter() - started
+
+    load_pool.shutdown()
+    chart_exporter.shutdown()
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return steps
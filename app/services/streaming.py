@@ -0,0 +1,194 @@
+"""
+Streaming Aggregation - Tổng hợp orders / order_details theo từng chunk
+Dùng cho các file lớn hơn RAM: mỗi chunk được tổng hợp rồi gộp vào kết quả
+tạm, nên bộ nhớ tối đa phụ thuộc kích thước chunk chứ không phụ thuộc file.
+"""
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.order_filter import OrderFilter, order_mask
+from app.services.rollups import DailyRollup
+from app.services.schema import read_csv_options
+from app.services.snapshot import SnapshotManager
+
+# Ngưỡng bộ nhớ mặc định cho một chunk (bytes)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Số dòng đọc thử để ước lượng số byte mỗi dòng
+_SAMPLE_ROWS = 1000
+
+# pandas cần thêm bộ nhớ tạm khi parse/groupby so với kích thước chunk
+_OVERHEAD_FACTOR = 4
+
+_PRODUCT_KEYS = ['product_id', 'product_name']
+
+
+@dataclass
+class StreamingAggregates:
+    """Kết quả tổng hợp (có thể gộp dần) của orders và order_details"""
+    orders_count: int = 0
+    orders_revenue: float = 0.0
+    has_orders_total: bool = False
+    quantity_sold: int = 0
+    details_revenue: float = 0.0
+    product_revenue: pd.Series = field(default_factory=lambda: pd.Series(dtype='float64'))
+    daily: DailyRollup = field(default_factory=DailyRollup)
+
+    @property
+    def total_revenue(self) -> float:
+        """Doanh thu: ưu tiên cột total của orders như get_total_revenue"""
+        return self.orders_revenue if self.has_orders_total else self.details_revenue
+
+    def add_orders(self, chunk: pd.DataFrame) -> None:
+        """
+        Gộp một chunk orders
+
+        Args:
+            chunk: Một phần bảng orders
+        """
+        self.orders_count += len(chunk)
+        if 'total' in chunk.columns:
+            self.has_orders_total = True
+            self.orders_revenue += float(chunk['total'].sum())
+        if 'order_date' in chunk.columns:
+            self.daily.append(chunk)
+
+    def add_order_details(self, chunk: pd.DataFrame) -> None:
+        """
+        Gộp một chunk order_details
+
+        Args:
+            chunk: Một phần bảng order_details
+        """
+        self.quantity_sold += int(chunk['quantity'].sum())
+        self.details_revenue += float(chunk['subtotal'].sum())
+        # Key dạng chuỗi để gộp được giữa các chunk có tập category khác nhau
+        partial = chunk.groupby(_PRODUCT_KEYS, observed=True)['subtotal'].sum().reset_index()
+        partial = partial.astype({key: str for key in _PRODUCT_KEYS}).set_index(_PRODUCT_KEYS)['subtotal']
+        if self.product_revenue.empty:
+            self.product_revenue = partial
+        else:
+            self.product_revenue = self.product_revenue.add(partial, fill_value=0)
+
+    def memory_usage(self, deep: bool = True) -> int:
+        """Bộ nhớ của doanh thu theo sản phẩm và rollup theo ngày (dùng bởi DatasetCache)"""
+        nbytes = int(self.product_revenue.memory_usage(index=True, deep=deep))
+        return nbytes + int(self.daily.table.memory_usage(index=True, deep=deep).sum())
+
+    def top_products(self, n: int) -> pd.DataFrame:
+        """
+        Top N sản phẩm theo doanh thu
+
+        Args:
+            n: Số sản phẩm
+
+        Returns:
+            DataFrame với cột product_id, product_name, subtotal
+        """
+        if self.product_revenue.empty:
+            return pd.DataFrame(columns=[*_PRODUCT_KEYS, 'subtotal'])
+        return self.product_revenue.nlargest(n).rename('subtotal').reset_index()
+
+
+def _id_bytes(ids: pd.Series) -> np.ndarray:
+    """order_id -> mảng bytes độ dài cố định (vài byte mỗi id thay vì một str Python trong set)"""
+    return np.array(ids.astype(str).str.encode('utf-8').tolist(), dtype='S')
+
+
+def _isin_sorted(ids: pd.Series, sorted_ids: np.ndarray) -> np.ndarray:
+    """Mask các id có trong mảng đã sắp xếp (tìm nhị phân, không dựng set)"""
+    if len(sorted_ids) == 0 or len(ids) == 0:
+        return np.zeros(len(ids), dtype=bool)
+    values = _id_bytes(ids)
+    positions = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return sorted_ids[positions] == values
+
+
+def chunk_rows_for(table: str, csv_path: str, max_bytes: int) -> int:
+    """
+    Số dòng mỗi chunk sao cho bộ nhớ của một chunk nằm dưới ngưỡng
+
+    Args:
+        table: Tên bảng trong schema
+        csv_path: Đường dẫn CSV
+        max_bytes: Ngưỡng bộ nhớ cho phép
+
+    Returns:
+        Số dòng mỗi chunk (tối thiểu 1000)
+    """
+    sample = pd.read_csv(csv_path, nrows=_SAMPLE_ROWS, **read_csv_options(table))
+    if sample.empty:
+        return _SAMPLE_ROWS
+    bytes_per_row = max(1.0, sample.memory_usage(deep=True).sum() / len(sample))
+    return max(_SAMPLE_ROWS, int(max_bytes / (bytes_per_row * _OVERHEAD_FACTOR)))
+
+
+def iter_chunks(
+    table: str,
+    path: str,
+    snapshot_manager: SnapshotManager,
+    max_bytes: int = DEFAULT_MAX_BYTES
+) -> Iterator[pd.DataFrame]:
+    """
+    Duyệt một bảng theo từng chunk có kích thước bị giới hạn
+
+    Args:
+        table: Tên bảng trong schema
+        path: Đường dẫn CSV nguồn
+        snapshot_manager: Nếu snapshot còn mới thì duyệt các batch trong snapshot
+        max_bytes: Ngưỡng bộ nhớ cho mỗi chunk
+
+    Yields:
+        Các DataFrame con
+    """
+    chunk_rows = chunk_rows_for(table, path, max_bytes)
+    if snapshot_manager.is_fresh(path):
+        yield from snapshot_manager.iter_batches(path, chunk_rows)
+        return
+    with pd.read_csv(path, chunksize=chunk_rows, **read_csv_options(table)) as reader:
+        yield from reader
+
+
+def aggregate_stream(
+    orders_path: str,
+    order_details_path: str,
+    snapshot_manager: SnapshotManager,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    order_filter: Optional[OrderFilter] = None,
+    dimensions=('status',)
+) -> StreamingAggregates:
+    """
+    Một lượt duyệt qua orders và order_details để tính toàn bộ chỉ số
+
+    Args:
+        orders_path: Đường dẫn orders CSV
+        order_details_path: Đường dẫn order_details CSV
+        snapshot_manager: Quản lý snapshot
+        max_bytes: Ngưỡng bộ nhớ cho mỗi chunk
+        order_filter: Cửa sổ ngày / trạng thái (tuỳ chọn)
+        dimensions: Chiều phụ của rollup theo ngày
+
+    Returns:
+        StreamingAggregates
+    """
+    result = StreamingAggregates(daily=DailyRollup(dimensions))
+    id_parts: List[np.ndarray] = []
+
+    for chunk in iter_chunks('orders', orders_path, snapshot_manager, max_bytes):
+        if order_filter is not None:
+            chunk = chunk.loc[order_mask(chunk, order_filter)]
+            id_parts.append(np.unique(_id_bytes(chunk['order_id'])))
+        result.add_orders(chunk)
+
+    # order_id trong cửa sổ: một mảng bytes đã sắp xếp, lọc order_details từng chunk bằng searchsorted
+    order_ids = np.unique(np.concatenate(id_parts)) if id_parts else np.array([], dtype='S1')
+
+    for chunk in iter_chunks('order_details', order_details_path, snapshot_manager, max_bytes):
+        if order_filter is not None:
+            chunk = chunk.loc[_isin_sorted(chunk['order_id'], order_ids)]
+        result.add_order_details(chunk)
+
+    return result
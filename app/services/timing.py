@@ -0,0 +1,308 @@
+"""
+Request Timing - Đo thời gian từng giai đoạn (load, phân tích, biểu đồ, template)
+Mỗi request gom thời gian theo giai đoạn để trả về header Server-Timing; mọi
+lần đo cũng được ghi vào registry của process để xuất percentile qua /metrics.
+"""
+import contextlib
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Số lần đo gần nhất giữ lại cho mỗi giai đoạn (tính percentile)
+DEFAULT_WINDOW = 1024
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+# Số giai đoạn tối đa trong header Server-Timing (lâu nhất trước)
+DEFAULT_HEADER_ENTRIES = 20
+
+
+class RequestTimings:
+    """Thời gian cộng dồn theo giai đoạn của một request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}   # giai đoạn -> [tổng giây, số lần]
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        # Loader có thể chạy trong thread của load_pool: cần lock
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                self.stages[stage] = [seconds, 1]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+
+    def server_timing(self, total: float, max_entries: int = DEFAULT_HEADER_ENTRIES) -> str:
+        """
+        Giá trị header Server-Timing
+
+        Giai đoạn lồng nhau (vd. analysis.compute_kpi_scalars gọi load.orders)
+        được báo riêng nên tổng các giai đoạn có thể lớn hơn total.
+
+        Args:
+            total: Thời gian của cả request (giây)
+            max_entries: Số giai đoạn tối đa
+
+        Returns:
+            Chuỗi 'stage;dur=1.234;desc="3x", ..., total;dur=...'
+        """
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: -item[1][0])[:max_entries]
+        parts = []
+        for stage, (seconds, count) in stages:
+            part = f'{stage};dur={seconds * 1000:.3f}'
+            if count > 1:
+                part += f';desc="{int(count)}x"'
+            parts.append(part)
+        parts.append(f'total;dur={total * 1000:.3f}')
+        return ', '.join(parts)
+
+
+class _Series:
+    """Cửa sổ các lần đo gần nhất cùng tổng / số đếm từ đầu"""
+    __slots__ = ('samples', 'total', 'count')
+
+    def __init__(self, window: int):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+
+
+class TimingRegistry:
+    """Registry của process: percentile theo giai đoạn (cửa sổ trượt) và tổng / số đếm"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        """
+        Args:
+            window: Số lần đo gần nhất giữ lại cho mỗi giai đoạn
+        """
+        self.enabled = True
+        self.header = True
+        self.window = window
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Đọc cấu hình từ Flask app (TIMING_ENABLED, TIMING_WINDOW,
+        SERVER_TIMING_HEADER) và gắn hook cho request / template
+
+        Args:
+            app: Flask application
+        """
+        from flask import before_render_template, template_rendered
+
+        self.enabled = bool(app.config.get('TIMING_ENABLED', True))
+        self.header = bool(app.config.get('SERVER_TIMING_HEADER', True))
+        self.window = int(app.config.get('TIMING_WINDOW', DEFAULT_WINDOW))
+        self.clear()
+        app.extensions['timings'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._start_template, app)
+        template_rendered.connect(self._finish_template, app)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Ghi một lần đo vào registry và vào request hiện tại (nếu có)
+
+        Args:
+            stage: Tên giai đoạn (vd. 'load.orders')
+            seconds: Thời gian (giây)
+        """
+        timings = _current.get()
+        if timings is not None:
+            timings.add(stage, seconds)
+        with self._lock:
+            series = self._series.get(stage)
+            if series is None:
+                series = self._series[stage] = _Series(self.window)
+            series.samples.append(seconds)
+            series.total += seconds
+            series.count += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Thống kê hiện tại của từng giai đoạn
+
+        Returns:
+            Mapping giai đoạn -> {count, sum, 0.5, 0.9, 0.95, 0.99} (giây)
+        """
+        with self._lock:
+            copies = [(stage, list(s.samples), s.total, s.count) for stage, s in self._series.items()]
+        result = {}
+        for stage, samples, total, count in sorted(copies):
+            stats: Dict[str, float] = {'count': count, 'sum': total}
+            if samples:
+                for q, value in zip(QUANTILES, np.quantile(samples, QUANTILES)):
+                    stats[q] = float(value)
+            result[stage] = stats
+        return result
+
+    def clear(self) -> None:
+        """Xoá mọi lần đo"""
+        with self._lock:
+            self._series.clear()
+
+    def _start_request(self) -> None:
+        from flask import g
+        g.timing_token = _current.set(RequestTimings())
+        _templates.set([])
+
+    def _finish_request(self, response: Any) -> Any:
+        from flask import request
+        timings = _current.get()
+        if timings is None:
+            return response
+        total = time.perf_counter() - timings.started
+        if self.header:
+            response.headers['Server-Timing'] = timings.server_timing(total)
+        self.record(f'route.{request.endpoint or "unmatched"}', total)
+        return response
+
+    def _teardown_request(self, exc: Optional[BaseException] = None) -> None:
+        from flask import g
+        token = g.pop('timing_token', None)
+        if token is not None:
+            _current.reset(token)
+
+    def _start_template(self, app: Any, template: Any, context: Dict[str, Any], **extra: Any) -> None:
+        stack = _templates.get()
+        if stack is None:
+            stack = []
+            _templates.set(stack)
+        stack.append(time.perf_counter())
+
+    def _finish_template(self, app: Any, template: Any, context: Dict[str, Any], **extra: Any) -> None:
+        stack = _templates.get()
+        if stack:
+            self.record(f'template.{template.name}', time.perf_counter() - stack.pop())
+
+
+# Request đang chạy (None ngoài request: CLI, precompute worker)
+_current: ContextVar[Optional[RequestTimings]] = ContextVar('request_timings', default=None)
+
+# Thời điểm bắt đầu của các template đang render (template lồng nhau)
+_templates: ContextVar[Optional[List[float]]] = ContextVar('template_timings', default=None)
+
+
+# Instance dùng chung cho toàn bộ process
+timings = TimingRegistry()
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Đo thời gian một khối lệnh
+
+    Args:
+        name: Tên giai đoạn
+    """
+    if not timings.enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(name, time.perf_counter() - started)
+
+
+def timed(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator đo thời gian mỗi lần gọi hàm
+
+    Args:
+        name: Tên giai đoạn
+
+    Returns:
+        Decorator
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not timings.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.record(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def method_stage(name: str) -> str:
+    """Tên giai đoạn của một method service: load_orders -> load.orders, còn lại analysis.<tên>"""
+    if name.startswith('load_'):
+        return 'load.' + name[len('load_'):]
+    return 'analysis.' + name
+
+
+def instrument_methods(cls: type) -> type:
+    """
+    Class decorator: bọc mọi method public (không gồm property / classmethod)
+    bằng timed(method_stage(tên))
+
+    Args:
+        cls: Class service
+
+    Returns:
+        Chính class đó
+    """
+    for name, member in list(vars(cls).items()):
+        if name.startswith('_') or not inspect.isfunction(member):
+            continue
+        setattr(cls, name, timed(method_stage(name))(member))
+    return cls
+
+
+def format_prometheus(
+    snapshot: Dict[str, Dict[str, float]],
+    gauges: Optional[Dict[str, Tuple[str, Dict[str, float]]]] = None
+) -> str:
+    """
+    Xuất registry theo định dạng text của Prometheus
+
+    Args:
+        snapshot: Kết quả TimingRegistry.snapshot()
+        gauges: Mapping tên metric -> (mô tả, {giá trị label 'stat': giá trị})
+
+    Returns:
+        Nội dung text/plain; version=0.0.4
+    """
+    lines = [
+        '# HELP app_stage_duration_seconds Thời gian từng giai đoạn xử lý request',
+        '# TYPE app_stage_duration_seconds summary',
+    ]
+    for name, stats in snapshot.items():
+        label = _escape(name)
+        for q in QUANTILES:
+            if q in stats:
+                lines.append(f'app_stage_duration_seconds{{stage="{label}",quantile="{q}"}} {stats[q]:.9f}')
+        lines.append(f'app_stage_duration_seconds_sum{{stage="{label}"}} {stats["sum"]:.9f}')
+        lines.append(f'app_stage_duration_seconds_count{{stage="{label}"}} {int(stats["count"])}')
+
+    for metric, (description, values) in (gauges or {}).items():
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} gauge')
+        for stat, value in values.items():
+            lines.append(f'{metric}{{stat="{_escape(stat)}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -2,23 +2,310 @@
 Visualizer Service - Tạo biểu đồ với Plotly
 Python First: Tất cả biểu đồ được tạo từ Python, không viết JS thủ công
 """
+import plotly
 import plotly.graph_objects as go
-import plotly.express as px
+import plotly.io as pio
 from plotly.subplots import make_subplots
+from plotly.utils import PlotlyJSONEncoder
+from plotly.colors import qualitative
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
+import base64
 import json
+import os
+import uuid
+
+from app.services.chart_cache import cached_chart, chart_cache
+from app.services.downsample import downsample_series, top_n_other
+from app.services.timing import stage
+
+# Chế độ render: 'spec' (JSON gọn, hydrate bằng static/js/charts.js) hoặc 'html' (fig.to_html)
+RENDER_MODES = ('spec', 'html')
+
+# Số điểm tối đa của một chuỗi thời gian / số mục tối đa của biểu đồ theo nhóm (0 = không giới hạn)
+DEFAULT_MAX_POINTS = 1000
+DEFAULT_MAX_CATEGORIES = 20
+
+# Template dùng cho mọi biểu đồ - được gửi một lần qua /assets/plotly-templates.js
+CHART_TEMPLATE = 'plotly_white'
+
+# Id của div trong HTML đã cache - thay bằng id riêng mỗi lần render trang (filter `chart`)
+CHART_ID_PLACEHOLDER = '__plotly_chart_id__'
+
+# Các key giữ nguyên mảng JSON (Plotly cần chuỗi / không hỗ trợ typed array)
+_PLAIN_KEYS = frozenset({'text', 'hovertext', 'ids', 'customdata', 'labels', 'tickvals', 'ticktext'})
+
+# Kiểu typed array nhỏ nhất cho mảng số nguyên (theo thứ tự ưu tiên)
+_INT_DTYPES = (('u1', np.uint8), ('i2', np.int16), ('i4', np.int32))
+
+
+def _encode_array(values: Any) -> Any:
+    """
+    Mã hoá mảng số thành {dtype, bdata} (base64, little-endian).
+    Mảng không phải số được trả về nguyên dạng.
+    """
+    arr = np.asarray(values)
+    if arr.ndim != 1 or arr.size == 0 or arr.dtype.kind not in 'iuf':
+        return values
+    if arr.dtype.kind == 'f' and not np.isfinite(arr).all():
+        return values
+
+    if arr.dtype.kind in 'iu' or np.array_equal(arr, np.round(arr)):
+        lo, hi = arr.min(), arr.max()
+        for name, dtype in _INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                encoded = arr.astype(dtype)
+                break
+        else:
+            name, encoded = 'f8', arr.astype('<f8')
+    else:
+        name, encoded = 'f8', arr.astype('<f8')
+
+    return {'dtype': name, 'bdata': base64.b64encode(encoded.astype(encoded.dtype.newbyteorder('<')).tobytes()).decode('ascii')}
+
+
+def _encode_tree(node: Any, key: str = '') -> Any:
+    """Duyệt spec và mã hoá các mảng số"""
+    if isinstance(node, dict):
+        return {k: _encode_tree(v, k) for k, v in node.items()}
+    if isinstance(node, (list, tuple, np.ndarray, pd.Series)):
+        if key not in _PLAIN_KEYS:
+            try:
+                encoded = _encode_array(node)
+            except (TypeError, ValueError):
+                encoded = node
+            if encoded is not node:
+                return encoded
+        return [_encode_tree(item) for item in node]
+    return node
+
+
+def _decode_tree(node: Any) -> Any:
+    """Ngược với _encode_tree: {dtype, bdata} -> list số"""
+    if isinstance(node, dict):
+        if set(node) == {'dtype', 'bdata'}:
+            return np.frombuffer(base64.b64decode(node['bdata']), dtype='<' + node['dtype']).tolist()
+        return {k: _decode_tree(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_decode_tree(item) for item in node]
+    return node
 
 
 class VisualizerService:
-    """Service tạo biểu đồ tương tác với Plotly"""
+    """
+    Service tạo biểu đồ tương tác với Plotly
+    
+    Kết quả được cache theo tham số và dữ liệu đầu vào (xem chart_cache),
+    biểu đồ không đổi sẽ không bị dựng lại.
+    
+    Ở chế độ 'spec' (mặc định) mỗi biểu đồ chỉ là một thẻ div kèm JSON gọn;
+    plotly.js được tải một lần trong base.html.
+    """
+    
+    render_mode: str = 'spec'
+    max_points: int = DEFAULT_MAX_POINTS
+    max_categories: int = DEFAULT_MAX_CATEGORIES
+    
+    @classmethod
+    def init_app(cls, app) -> None:
+        """
+        Đọc chế độ render và giới hạn số điểm từ config (CHART_RENDER_MODE,
+        CHART_MAX_POINTS, CHART_MAX_CATEGORIES)
+        
+        Args:
+            app: Flask application
+        """
+        mode = app.config.get('CHART_RENDER_MODE', 'spec')
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Unknown CHART_RENDER_MODE: {mode}")
+        max_points = int(app.config.get('CHART_MAX_POINTS', DEFAULT_MAX_POINTS))
+        max_categories = int(app.config.get('CHART_MAX_CATEGORIES', DEFAULT_MAX_CATEGORIES))
+        if (mode, max_points, max_categories) != (cls.render_mode, cls.max_points, cls.max_categories):
+            # HTML đã cache được tạo theo chế độ / giới hạn cũ
+            chart_cache.clear()
+        cls.render_mode = mode
+        cls.max_points = max_points
+        cls.max_categories = max_categories
     
     @staticmethod
+    def reduce_series(x: List[Any], y: List[float], max_points: Optional[int] = None) -> tuple:
+        """
+        Rút gọn chuỗi theo thứ tự bằng LTTB
+        
+        Args:
+            x: Trục X
+            y: Giá trị
+            max_points: Số điểm tối đa (None: CHART_MAX_POINTS, 0: không giới hạn)
+        
+        Returns:
+            Tuple (x, y)
+        """
+        budget = VisualizerService.max_points if max_points is None else max_points
+        return downsample_series(x, y, budget)
+    
+    @staticmethod
+    def reduce_categories(labels: List[Any], values: List[float], max_items: Optional[int] = None) -> tuple:
+        """
+        Giữ top-N mục và gộp phần còn lại vào "Khác"
+        
+        Args:
+            labels: Nhãn
+            values: Giá trị
+            max_items: Số mục tối đa kể cả "Khác" (None: CHART_MAX_CATEGORIES, 0: không giới hạn)
+        
+        Returns:
+            Tuple (labels, values)
+        """
+        budget = VisualizerService.max_categories if max_items is None else max_items
+        return top_n_other(labels, values, budget)
+    
+    @staticmethod
+    def figure_spec(fig: go.Figure) -> Dict[str, Any]:
+        """
+        Spec gọn của figure: mảng số mã hoá base64, template thay bằng tên
+        
+        Args:
+            fig: Plotly figure
+        
+        Returns:
+            Dictionary {data, layout} có thể serialize JSON
+        """
+        spec = fig.to_plotly_json()
+        layout = spec.get('layout', {})
+        if 'template' in layout:
+            layout['template'] = CHART_TEMPLATE
+        return {
+            'data': _encode_tree(spec.get('data', [])),
+            'layout': _encode_tree(layout)
+        }
+    
+    @staticmethod
+    def figure_from_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Figure đầy đủ từ spec gọn: giải mã mảng base64, thay tên template bằng template
+
+        Dùng cho renderer không hiểu {dtype, bdata} (plotly.js < 2.28, kaleido).
+
+        Args:
+            spec: Spec từ figure_spec
+
+        Returns:
+            Dictionary {data, layout} dạng figure của Plotly
+        """
+        layout = _decode_tree(spec.get('layout', {}))
+        if layout.get('template') == CHART_TEMPLATE:
+            layout['template'] = pio.templates[CHART_TEMPLATE].to_plotly_json()
+        return {'data': _decode_tree(spec.get('data', [])), 'layout': layout}
+
+    @staticmethod
+    def spec_to_json(spec: Dict[str, Any]) -> str:
+        """
+        Serialize spec thành JSON gọn (an toàn khi nhúng trong thẻ script)
+        
+        Args:
+            spec: Spec từ figure_spec
+        
+        Returns:
+            JSON string
+        """
+        text = json.dumps(spec, cls=PlotlyJSONEncoder, separators=(',', ':'), ensure_ascii=False)
+        return text.replace('</', '<\\/')
+    
+    @staticmethod
+    def _render(fig: go.Figure, as_spec: bool = False) -> Union[str, Dict[str, Any]]:
+        """
+        Render figure theo chế độ hiện tại
+        
+        Args:
+            fig: Plotly figure
+            as_spec: Trả về spec (cho JSON API) thay vì HTML
+        
+        Returns:
+            HTML string (div + spec JSON, hoặc HTML đầy đủ của Plotly) hoặc spec.
+            Id của div là CHART_ID_PLACEHOLDER (xem assign_chart_id)
+        """
+        with stage('chart.serialize'):
+            if as_spec:
+                return VisualizerService.figure_spec(fig)
+            if VisualizerService.render_mode == 'html':
+                # plotly.js được tải (không defer) bởi components/plotly_scripts.html
+                return fig.to_html(full_html=False, include_plotlyjs=False, div_id=CHART_ID_PLACEHOLDER)
+
+            spec = VisualizerService.figure_spec(fig)
+            height = spec['layout'].get('height')
+            style = f' style="height:{int(height)}px"' if isinstance(height, (int, float)) else ''
+            return (
+                f'<div id="{CHART_ID_PLACEHOLDER}" class="plotly-chart"{style}></div>'
+                f'<script type="application/json" data-plotly-spec="{CHART_ID_PLACEHOLDER}">'
+                f'{VisualizerService.spec_to_json(spec)}</script>'
+            )
+
+    @staticmethod
+    def assign_chart_id(html: str) -> str:
+        """
+        Gán id riêng cho HTML biểu đồ (có thể lấy từ cache) lúc render trang
+
+        Args:
+            html: HTML từ các hàm create_* (chế độ HTML)
+
+        Returns:
+            HTML với CHART_ID_PLACEHOLDER được thay bằng một id mới
+        """
+        return html.replace(CHART_ID_PLACEHOLDER, f"chart-{uuid.uuid4().hex}")
+    
+    @staticmethod
+    def plotlyjs_path() -> str:
+        """Đường dẫn plotly.min.js đi kèm package plotly (phục vụ local, không cần CDN)"""
+        return os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js')
+    
+    @staticmethod
+    def plotlyjs_version() -> str:
+        """Phiên bản plotly.js đi kèm (dùng làm cache-buster)"""
+        from plotly.offline import get_plotlyjs_version
+        return get_plotlyjs_version()
+    
+    @staticmethod
+    def templates_script() -> str:
+        """
+        Script khai báo template dùng chung cho các spec
+        
+        Returns:
+            JavaScript gán window.PLOTLY_TEMPLATES
+        """
+        templates = {CHART_TEMPLATE: pio.templates[CHART_TEMPLATE].to_plotly_json()}
+        return 'window.PLOTLY_TEMPLATES = ' + json.dumps(templates, cls=PlotlyJSONEncoder, separators=(',', ':')) + ';\n'
+
+    @staticmethod
+    def warm_up() -> None:
+        """
+        Dựng và serialize một biểu đồ mỗi loại (không qua cache)
+
+        Plotly chỉ nạp validator của trace / layout ở figure đầu tiên (~0.5 s);
+        gọi trong master process trước khi fork để các worker không trả lại chi phí này.
+        """
+        figures = [
+            go.Figure(data=[go.Bar(x=['a'], y=[1])]),
+            go.Figure(data=[go.Pie(labels=['a'], values=[1], marker=dict(colors=qualitative.Set3))]),
+            go.Figure(data=[go.Scatter(x=['a'], y=[1], mode='lines+markers')]),
+            make_subplots(rows=1, cols=3),
+        ]
+        for fig in figures:
+            fig.update_layout(title='warm-up', template=CHART_TEMPLATE, height=100)
+            VisualizerService.spec_to_json(VisualizerService.figure_spec(fig))
+        VisualizerService.templates_script()
+
+    @staticmethod
+    @cached_chart
     def create_bar_chart(
         labels: List[str], 
         values: List[int], 
-        title: str = "Biểu đồ cột"
-    ) -> str:
+        title: str = "Biểu đồ cột",
+        as_spec: bool = False,
+        ordered: bool = False,
+        max_points: Optional[int] = None
+    ) -> Union[str, Dict[str, Any]]:
         """
         Tạo biểu đồ cột với Plotly
         
@@ -26,10 +313,18 @@ class VisualizerService:
             labels: Tên các mục
             values: Giá trị tương ứng
             title: Tiêu đề biểu đồ
+            as_spec: Trả về spec (dict) thay vì HTML
+            ordered: Các cột là một chuỗi theo thứ tự (vd. theo ngày): rút gọn
+                bằng LTTB thay vì top-N + "Khác"
+            max_points: Số cột tối đa (None: theo config, 0: không giới hạn)
         
         Returns:
             HTML string của biểu đồ
         """
+        if ordered:
+            labels, values = VisualizerService.reduce_series(labels, values, max_points)
+        else:
+            labels, values = VisualizerService.reduce_categories(labels, values, max_points)
         fig = go.Figure(data=[
             go.Bar(
                 x=labels,
@@ -53,15 +348,18 @@ class VisualizerService:
             hovermode='x unified'
         )
         
-        return fig.to_html(full_html=False, include_plotlyjs='cdn')
+        return VisualizerService._render(fig, as_spec)
     
     @staticmethod
+    @cached_chart
     def create_pie_chart(
         labels: List[str], 
         values: List[float], 
         title: str = "Biểu đồ tròn",
-        height: int = 400
-    ) -> str:
+        height: int = 400,
+        as_spec: bool = False,
+        max_slices: Optional[int] = None
+    ) -> Union[str, Dict[str, Any]]:
         """
         Tạo biểu đồ tròn với Plotly
         
@@ -69,10 +367,13 @@ class VisualizerService:
             labels: Tên các mục
             values: Giá trị tương ứng
             title: Tiêu đề
+            as_spec: Trả về spec (dict) thay vì HTML
+            max_slices: Số lát tối đa kể cả "Khác" (None: theo config, 0: không giới hạn)
         
         Returns:
             HTML string
         """
+        labels, values = VisualizerService.reduce_categories(labels, values, max_slices)
         fig = go.Figure(data=[
             go.Pie(
                 labels=labels,
@@ -81,7 +382,7 @@ class VisualizerService:
                 textinfo='label+percent',
                 textposition='auto',
                 marker=dict(
-                    colors=px.colors.qualitative.Set3
+                    colors=qualitative.Set3
                 )
             )
         ])
@@ -92,15 +393,23 @@ class VisualizerService:
             height=height
         )
         
-        return fig.to_html(full_html=False, include_plotlyjs='cdn')
+        return VisualizerService._render(fig, as_spec)
     
     @staticmethod
-    def create_multi_chart(df: pd.DataFrame) -> str:
+    @cached_chart
+    def create_multi_chart(
+        df: pd.DataFrame,
+        as_spec: bool = False,
+        max_products: Optional[int] = None
+    ) -> Union[str, Dict[str, Any]]:
         """
         Tạo dashboard với nhiều biểu đồ con
         
         Args:
             df: DataFrame chứa dữ liệu
+            as_spec: Trả về spec (dict) thay vì HTML
+            max_products: Chỉ vẽ các sản phẩm có doanh thu cao nhất
+                (None: CHART_MAX_CATEGORIES, 0: không giới hạn)
         
         Returns:
             HTML string chứa nhiều biểu đồ
@@ -108,6 +417,10 @@ class VisualizerService:
         # Tính revenue
         df = df.copy()
         df['revenue'] = df['price'] * df['quantity']
+        budget = VisualizerService.max_categories if max_products is None else max_products
+        if 0 < budget < len(df):
+            # Ba biểu đồ con dùng chung trục sản phẩm: không gộp "Khác" được cho giá
+            df = df.loc[df['revenue'].nlargest(budget).index.sort_values()]
         
         # Create subplots
         fig = make_subplots(
@@ -153,16 +466,19 @@ class VisualizerService:
             template="plotly_white"
         )
         
-        return fig.to_html(full_html=False, include_plotlyjs='cdn')
+        return VisualizerService._render(fig, as_spec)
     
     @staticmethod
+    @cached_chart
     def create_line_chart(
         x: List[Any],
         y: List[float],
         title: str = "Biểu đồ đường",
         x_title: str = "X",
-        y_title: str = "Y"
-    ) -> str:
+        y_title: str = "Y",
+        as_spec: bool = False,
+        max_points: Optional[int] = None
+    ) -> Union[str, Dict[str, Any]]:
         """
         Tạo biểu đồ đường
         
@@ -172,10 +488,13 @@ class VisualizerService:
             title: Tiêu đề
             x_title: Label trục X
             y_title: Label trục Y
+            as_spec: Trả về spec (dict) thay vì HTML
+            max_points: Số điểm tối đa, rút gọn bằng LTTB (None: theo config, 0: không giới hạn)
         
         Returns:
             HTML string
         """
+        x, y = VisualizerService.reduce_series(x, y, max_points)
         fig = go.Figure(data=[
             go.Scatter(
                 x=x,
@@ -194,4 +513,4 @@ class VisualizerService:
             height=400
         )
         
-        return fig.to_html(full_html=False, include_plotlyjs='cdn')
+        return VisualizerService._render(fig, as_spec)
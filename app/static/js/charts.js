@@ -0,0 +1,87 @@
+/**
+ * Charts - Hydrate các biểu đồ Plotly được gửi dưới dạng spec JSON gọn
+ * Mảng số được mã hoá {dtype, bdata} (base64, little-endian) và giải mã
+ * thành typed array; template được tham chiếu theo tên (window.PLOTLY_TEMPLATES).
+ */
+(function () {
+    'use strict';
+
+    var TYPED_ARRAYS = {
+        u1: Uint8Array,
+        i2: Int16Array,
+        i4: Int32Array,
+        f4: Float32Array,
+        f8: Float64Array
+    };
+
+    function decodeArray(value) {
+        var Typed = TYPED_ARRAYS[value.dtype];
+        var binary = atob(value.bdata);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return new Typed(bytes.buffer);
+    }
+
+    function decode(node) {
+        if (Array.isArray(node)) {
+            return node.map(decode);
+        }
+        if (node && typeof node === 'object') {
+            if (typeof node.bdata === 'string' && TYPED_ARRAYS[node.dtype]) {
+                return decodeArray(node);
+            }
+            var out = {};
+            Object.keys(node).forEach(function (key) {
+                out[key] = decode(node[key]);
+            });
+            return out;
+        }
+        return node;
+    }
+
+    function resolveTemplate(layout) {
+        var templates = window.PLOTLY_TEMPLATES || {};
+        if (typeof layout.template === 'string') {
+            layout.template = templates[layout.template];
+        }
+        return layout;
+    }
+
+    /**
+     * Vẽ một spec vào phần tử cho trước
+     * @param {HTMLElement|string} target - Phần tử hoặc id
+     * @param {{data: Array, layout: Object}} spec - Spec từ VisualizerService.figure_spec
+     */
+    function renderChartSpec(target, spec) {
+        var element = typeof target === 'string' ? document.getElementById(target) : target;
+        var layout = resolveTemplate(decode(spec.layout || {}));
+        return Plotly.react(element, decode(spec.data || []), layout, {responsive: true});
+    }
+
+    /**
+     * Hydrate mọi spec nhúng trong trang (<script type="application/json" data-plotly-spec>)
+     * @param {ParentNode} [root=document]
+     */
+    function hydrateCharts(root) {
+        var scripts = (root || document).querySelectorAll('script[data-plotly-spec]');
+        Array.prototype.forEach.call(scripts, function (script) {
+            var element = document.getElementById(script.getAttribute('data-plotly-spec'));
+            if (!element || element.getAttribute('data-hydrated')) {
+                return;
+            }
+            element.setAttribute('data-hydrated', '1');
+            renderChartSpec(element, JSON.parse(script.textContent));
+        });
+    }
+
+    window.renderChartSpec = renderChartSpec;
+    window.hydrateCharts = hydrateCharts;
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', function () { hydrateCharts(); });
+    } else {
+        hydrateCharts();
+    }
+})();
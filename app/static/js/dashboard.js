@@ -0,0 +1,130 @@
+/**
+ * Dashboard - Tải KPI và từng biểu đồ song song từ các endpoint JSON
+ * Mỗi phần được vẽ ngay khi dữ liệu của nó về, không chờ các phần khác.
+ * Nếu trang có data-live-url, KPI và chuỗi thời gian được cập nhật qua SSE.
+ */
+(function () {
+    'use strict';
+
+    function formatNumber(value) {
+        return Math.round(value).toLocaleString('en-US');
+    }
+
+    function showError(element, message) {
+        var alert = document.createElement('div');
+        alert.className = 'alert alert-danger mb-0';
+        alert.textContent = message;
+        element.replaceChildren(alert);
+        element.style.height = 'auto';
+    }
+
+    function fetchJSON(url) {
+        return fetch(url, {headers: {'Accept': 'application/json'}}).then(function (response) {
+            return response.json().then(function (payload) {
+                if (!response.ok) {
+                    throw new Error(payload.error || response.statusText);
+                }
+                return payload;
+            });
+        });
+    }
+
+    function showKPIs(kpis, root) {
+        var targets = (root || document).querySelectorAll('[data-kpi]');
+        Array.prototype.forEach.call(targets, function (element) {
+            var value = kpis[element.getAttribute('data-kpi')];
+            if (value !== undefined) {
+                element.textContent = formatNumber(value) + (element.getAttribute('data-kpi-suffix') || '');
+            }
+        });
+    }
+
+    function loadKPIs(container) {
+        fetchJSON(container.getAttribute('data-kpi-url')).then(function (kpis) {
+            showKPIs(kpis, container.parentNode);
+        }).catch(function (error) {
+            showError(container, 'Lỗi khi tải KPI: ' + error.message);
+        });
+    }
+
+    function loadChart(element) {
+        fetchJSON(element.getAttribute('data-chart-url')).then(function (payload) {
+            window.renderChartSpec(element, payload.chart);
+        }).catch(function (error) {
+            showError(element, 'Lỗi khi tải biểu đồ: ' + error.message);
+        });
+    }
+
+    function plainTrace(element) {
+        // Trace giải mã từ bdata là typed array: chuyển sang mảng thường trước khi
+        // extendTraces (giá trị mới có thể vượt kiểu Int16 / Uint8 ban đầu)
+        var trace = element.data[0];
+        if (ArrayBuffer.isView(trace.x) || ArrayBuffer.isView(trace.y)) {
+            Plotly.restyle(element, {x: [Array.from(trace.x)], y: [Array.from(trace.y)]}, [0]);
+        }
+        return element.data[0];
+    }
+
+    /**
+     * Áp dụng thay đổi của một chuỗi từ event SSE
+     * @param {HTMLElement} element - Biểu đồ đã vẽ (một trace)
+     * @param {Object} change - {x, y} (thay cả trace) hoặc {points: {index, y}, extend: {x, y}}
+     */
+    function applySeries(element, change) {
+        if (!element.data || !element.data.length) {
+            // Biểu đồ chưa tải xong: /api trả về dữ liệu mới nhất
+            return;
+        }
+        if (change.x) {
+            Plotly.restyle(element, {x: [change.x], y: [change.y]}, [0]);
+            return;
+        }
+        var trace = plainTrace(element);
+        if (change.points) {
+            var y = trace.y.slice();
+            change.points.index.forEach(function (index, i) {
+                y[index] = change.points.y[i];
+            });
+            Plotly.restyle(element, {y: [y]}, [0]);
+        }
+        if (change.extend) {
+            Plotly.extendTraces(element, {x: [change.extend.x], y: [change.extend.y]}, [0]);
+        }
+    }
+
+    function applyEvent(event) {
+        var payload = JSON.parse(event.data);
+        if (payload.kpis) {
+            showKPIs(payload.kpis);
+        }
+        Object.keys(payload.series || {}).forEach(function (name) {
+            var element = document.querySelector('[data-live-series="' + name + '"]');
+            if (element) {
+                applySeries(element, payload.series[name]);
+            }
+        });
+    }
+
+    function subscribe(container) {
+        if (!window.EventSource) {
+            return;
+        }
+        // EventSource tự kết nối lại (gửi Last-Event-ID) khi server đóng kết nối
+        var source = new EventSource(container.getAttribute('data-live-url'));
+        source.addEventListener('snapshot', applyEvent);
+        source.addEventListener('update', applyEvent);
+    }
+
+    function init() {
+        Array.prototype.forEach.call(document.querySelectorAll('[data-kpi-url]'), loadKPIs);
+        Array.prototype.forEach.call(document.querySelectorAll('[data-chart-url]'), loadChart);
+        Array.prototype.forEach.call(document.querySelectorAll('[data-live-url]'), subscribe);
+    }
+
+    // charts.js được nạp với defer: chờ DOMContentLoaded để renderChartSpec sẵn sàng
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+})();
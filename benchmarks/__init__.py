@@ -0,0 +1,4 @@
+"""
+Benchmarks - Bộ dữ liệu giả lập và bộ đo hiệu năng cho service / route
+Chạy bằng: python -m benchmarks <generate|run|compare>
+"""
@@ -0,0 +1,148 @@
+"""
+Benchmark CLI
+python -m benchmarks generate --rows 1000000 --out bench-data
+python -m benchmarks run --data bench-data --output results.json
+python -m benchmarks compare baseline.json results.json
+"""
+import json
+import os
+import sys
+
+import click
+
+# Chạy từ gốc repo: cho phép import app / config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import runner, synthetic  # noqa: E402
+
+
+def _mib(value: int) -> str:
+    return f'{value / 2**20:.1f} MiB'
+
+
+@click.group()
+def cli() -> None:
+    """Benchmark cho DataAnalysisService, VisualizerService và các route"""
+
+
+@cli.command('generate')
+@click.option('--rows', type=click.IntRange(1), default=100_000, show_default=True,
+              help='Số dòng order_details (10k .. 50M)')
+@click.option('--out', 'out_dir', default='bench-data', show_default=True, help='Thư mục đích')
+@click.option('--products', type=click.IntRange(1), default=None, help='Số sản phẩm (mặc định theo rows)')
+@click.option('--users', type=click.IntRange(1), default=None, help='Số khách hàng (mặc định theo số đơn)')
+@click.option('--seed', type=int, default=42, show_default=True)
+@click.option('--chunk-rows', type=click.IntRange(1), default=synthetic.DEFAULT_CHUNK_ROWS, show_default=True,
+              help='Số dòng order_details mỗi chunk khi ghi')
+def generate_command(rows: int, out_dir: str, products: int, users: int, seed: int, chunk_rows: int) -> None:
+    """Sinh bộ CSV giả lập cùng schema với dữ liệu thật"""
+    info = synthetic.generate(out_dir, rows, products, users, seed, chunk_rows)
+    spec = info['spec']
+    click.echo(f"{spec['detail_rows']} order_details / {spec['orders']} orders / "
+               f"{spec['products']} products / {spec['users']} users -> {out_dir}")
+    for table, size in info['bytes'].items():
+        click.echo(f"{table:<15} {_mib(size):>12}")
+
+
+@cli.command('run')
+@click.option('--data', 'data_dir', required=True, help='Thư mục dữ liệu (xem generate)')
+@click.option('--rows', type=click.IntRange(1), default=None,
+              help='Sinh dữ liệu vào --data trước nếu thư mục chưa có')
+@click.option('--groups', default=','.join(runner.GROUPS), show_default=True,
+              help='Các nhóm cần đo, cách nhau bởi dấu phẩy')
+@click.option('--repeat', type=click.IntRange(1), default=5, show_default=True, help='Số lần đo mỗi case')
+@click.option('--warmup', type=click.IntRange(0), default=1, show_default=True)
+@click.option('--cold', is_flag=True, help='Xoá mọi cache trước mỗi lần đo')
+@click.option('--filter', 'name_filter', default=None, help='Chỉ đo case có tên chứa chuỗi này')
+@click.option('--streaming', is_flag=True, help='Bật STREAMING_MODE')
+@click.option('--store', is_flag=True, help='Bật DATASET_STORE_ENABLED (dataset store dùng chung)')
+@click.option('--output', default=None, help='Ghi JSON kết quả vào file (mặc định: stdout)')
+@click.option('--baseline', default=None, help='So sánh với JSON của một lần chạy trước')
+@click.option('--threshold', type=float, default=runner.DEFAULT_THRESHOLD, show_default=True)
+def run_command(data_dir: str, rows: int, groups: str, repeat: int, warmup: int, cold: bool,
+                name_filter: str, streaming: bool, store: bool, output: str, baseline: str,
+                threshold: float) -> None:
+    """Đo thời gian và peak RSS, xuất JSON"""
+    if rows and not os.path.exists(os.path.join(data_dir, 'order_details.csv')):
+        synthetic.generate(data_dir, rows)
+
+    def progress(key: str, result: dict) -> None:
+        click.echo(f"{key:<50} p50 {result['p50']:>10.2f} ms  p95 {result['p95']:>10.2f} ms  "
+                   f"peak {_mib(result['peak_rss'])}", err=True)
+
+    overrides = {}
+    if streaming:
+        overrides['STREAMING_MODE'] = True
+    if store:
+        overrides['DATASET_STORE_ENABLED'] = True
+
+    try:
+        report = runner.run_benchmarks(
+            data_dir,
+            groups=[group.strip() for group in groups.split(',') if group.strip()],
+            repeat=repeat,
+            warmup=warmup,
+            cold=cold,
+            name_filter=name_filter,
+            overrides=overrides or None,
+            progress=progress
+        )
+    except (ValueError, FileNotFoundError) as e:
+        raise click.ClickException(str(e))
+
+    if report['meta']['uncovered_methods']:
+        click.echo(f"Chưa đo: {', '.join(report['meta']['uncovered_methods'])}", err=True)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        click.echo(text)
+
+    if baseline:
+        _report_comparison(_load(baseline), report, runner.DEFAULT_METRIC, threshold, runner.DEFAULT_MIN_DELTA_MS)
+
+
+@cli.command('compare')
+@click.argument('baseline')
+@click.argument('current')
+@click.option('--metric', default=runner.DEFAULT_METRIC, show_default=True, help='mean, p50, p90, p95, p99, ...')
+@click.option('--threshold', type=float, default=runner.DEFAULT_THRESHOLD, show_default=True,
+              help='Tỉ lệ chậm hơn tối đa cho phép (0.1 = 10%)')
+@click.option('--min-delta', type=float, default=runner.DEFAULT_MIN_DELTA_MS, show_default=True,
+              help='Bỏ qua chênh lệch nhỏ hơn (ms)')
+def compare_command(baseline: str, current: str, metric: str, threshold: float, min_delta: float) -> None:
+    """So sánh hai file kết quả; exit code 1 nếu có regression"""
+    _report_comparison(_load(baseline), _load(current), metric, threshold, min_delta)
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _report_comparison(baseline: dict, current: dict, metric: str, threshold: float, min_delta: float) -> None:
+    for field in ('data_bytes', 'cold', 'overrides'):
+        if baseline['meta'].get(field) != current['meta'].get(field):
+            click.echo(f"Cảnh báo: hai lần chạy khác nhau ở '{field}'", err=True)
+
+    rows = runner.compare(baseline, current, metric, threshold, min_delta)
+    for row in rows:
+        base = f"{row['base']:.2f}" if row['base'] is not None else '-'
+        new = f"{row['current']:.2f}" if row['current'] is not None else '-'
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else ''
+        click.echo(f"{row['key']:<50} {base:>10} {new:>10} ms {ratio:>7}  {row['status']}", err=True)
+
+    peak_base, peak_new = baseline['meta'].get('peak_rss'), current['meta'].get('peak_rss')
+    if peak_base and peak_new:
+        click.echo(f"peak RSS {_mib(peak_base)} -> {_mib(peak_new)}", err=True)
+
+    regressions = [row['key'] for row in rows if row['status'] == 'regression']
+    if regressions:
+        click.echo(f"{len(regressions)} regression ({metric}, ngưỡng {threshold:.0%})", err=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,423 @@
+"""
+Benchmark Runner - Đo thời gian các method của DataAnalysisService, các hàm
+tạo biểu đồ của VisualizerService và từng route (qua Flask test client).
+Kết quả là JSON (percentile + peak RSS) để so sánh với một baseline đã lưu.
+"""
+import inspect
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+GROUPS = ('services', 'charts', 'routes')
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Chỉ số thời gian dùng để so sánh hai lần chạy
+DEFAULT_METRIC = 'p50'
+
+# Mặc định: chậm hơn 10% và hơn 1 ms so với baseline thì tính là regression
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_MIN_DELTA_MS = 1.0
+
+# Các method không đo trực tiếp (factory / property)
+SKIPPED_METHODS = ('from_config', 'folds_aggregates')
+
+
+@dataclass
+class Case:
+    """Một phép đo"""
+    group: str
+    name: str
+    run: Callable[[], Any]
+    setup: Optional[Callable[[], None]] = None   # chạy trước mỗi lần đo, không tính giờ
+
+    @property
+    def key(self) -> str:
+        return f'{self.group}.{self.name}'
+
+
+def peak_rss_bytes() -> int:
+    """Peak RSS của process (ru_maxrss: KiB trên Linux, bytes trên macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == 'darwin' else peak * 1024)
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """
+    Thống kê thời gian (ms)
+
+    Args:
+        samples: Thời gian từng lần đo (giây)
+
+    Returns:
+        Dictionary n, mean, min, max, p50, p90, p95, p99 (ms)
+    """
+    ms = np.asarray(samples, dtype='float64') * 1000.0
+    stats = {'n': int(len(ms)), 'mean': float(ms.mean()), 'min': float(ms.min()), 'max': float(ms.max())}
+    for q, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+        stats[f'p{q}'] = float(value)
+    return stats
+
+
+def measure(case: Case, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Đo một case
+
+    Args:
+        case: Case cần đo
+        repeat: Số lần đo
+        warmup: Số lần chạy trước khi đo (không ghi lại)
+
+    Returns:
+        Thống kê thời gian, peak RSS sau case và mức tăng peak RSS trong case
+    """
+    rss_before = peak_rss_bytes()
+    for _ in range(warmup):
+        if case.setup is not None:
+            case.setup()
+        case.run()
+
+    samples = []
+    for _ in range(repeat):
+        if case.setup is not None:
+            case.setup()
+        started = time.perf_counter()
+        case.run()
+        samples.append(time.perf_counter() - started)
+
+    result = summarize(samples)
+    result['peak_rss'] = peak_rss_bytes()
+    result['peak_rss_growth'] = result['peak_rss'] - rss_before
+    return result
+
+
+def create_benchmark_app(data_dir: str, work_dir: str, **overrides: Any):
+    """
+    Flask app trỏ tới bộ dữ liệu benchmark
+
+    Snapshot và database SQLite nằm trong work_dir để không đụng tới instance/.
+    Precompute worker luôn tắt: route phải tự tính trong request.
+
+    Args:
+        data_dir: Thư mục chứa 6 file CSV
+        work_dir: Thư mục tạm cho snapshot / database
+        **overrides: Config ghi đè (vd. STREAMING_MODE=True)
+
+    Returns:
+        Flask application
+    """
+    from app import create_app
+    from app.services.data_analysis import DATA_PATH_CONFIG
+    from config import TestingConfig, config
+
+    settings = {key: os.path.join(data_dir, default) for key, default in DATA_PATH_CONFIG.values()}
+    settings.update(
+        SQLALCHEMY_DATABASE_URI='sqlite:///' + os.path.join(work_dir, 'benchmark.db'),
+        SNAPSHOT_DIR=os.path.join(work_dir, 'snapshots'),
+        DATASET_STORE_DIR=os.path.join(work_dir, 'dataset_store'),
+        PRECOMPUTE_ENABLED=False,
+        ANALYTICS_BACKEND='csv',
+    )
+    settings.update(overrides)
+    config['benchmark'] = type('BenchmarkConfig', (TestingConfig,), settings)
+    try:
+        return create_app('benchmark')
+    finally:
+        del config['benchmark']
+
+
+def reset_caches() -> None:
+    """Xoá mọi cache trong process (đo lần chạy nguội)"""
+    from app.services.chart_cache import chart_cache
+    from app.services.dataset_cache import dataset_cache
+    from app.services.ingest import ingest
+    from app.services.rollups import rollups
+
+    dataset_cache.clear()
+    rollups.clear()
+    ingest.clear()
+    chart_cache.clear()
+
+
+def service_cases(app) -> List[Case]:
+    """Mỗi lần đo dùng một service mới trên cache dùng chung, giống một request"""
+    from app.services.data_analysis import DataAnalysisService
+    from app.services.dimensions import DIMENSIONS
+    from app.services.product_catalog import ProductQuery
+
+    def case(name: str, call: Callable[[DataAnalysisService], Any]) -> Case:
+        def run() -> Any:
+            with app.app_context():
+                return call(DataAnalysisService.from_config(app.config))
+        return Case('services', name, run)
+
+    cases = [
+        case('load_data', lambda s: s.load_data()),
+        case('load_orders', lambda s: s.load_orders()),
+        case('load_order_details', lambda s: s.load_order_details()),
+        case('load_dimension', lambda s: s.load_dimension('users')),
+        case('load_all', lambda s: s.load_all()),
+        case('memory_report', lambda s: s.memory_report()),
+        case('get_product_index', lambda s: s.get_product_index()),
+        case('get_product_page', lambda s: s.get_product_page(ProductQuery(sort='-revenue'))),
+        case('get_basic_stats', lambda s: s.get_basic_stats()),
+        case('get_folded_aggregates', lambda s: s.get_folded_aggregates()),
+        case('get_streaming_aggregates', lambda s: s.get_streaming_aggregates()),
+        case('get_total_orders', lambda s: s.get_total_orders()),
+        case('get_total_revenue', lambda s: s.get_total_revenue()),
+        case('get_total_quantity_sold', lambda s: s.get_total_quantity_sold()),
+        case('get_avg_order_value', lambda s: s.get_avg_order_value()),
+        case('get_daily_rollup', lambda s: s.get_daily_rollup()),
+        case('get_revenue_over_time', lambda s: s.get_revenue_over_time('day')),
+        case('get_revenue_over_time[month]', lambda s: s.get_revenue_over_time('month')),
+        case('get_orders_per_day', lambda s: s.get_orders_per_day('day')),
+        case('get_top_products_by_revenue', lambda s: s.get_top_products_by_revenue(10)),
+        case('compute_kpi_scalars', lambda s: s.compute_kpi_scalars()),
+        case('get_product_data', lambda s: s.get_product_data()),
+        case('get_revenue_by_product', lambda s: s.get_revenue_by_product()),
+        case('get_top_products', lambda s: s.get_top_products(5, 'quantity')),
+    ]
+    for dimension in DIMENSIONS:
+        cases.append(case(f'get_dimension_index[{dimension}]', lambda s, d=dimension: s.get_dimension_index(d)))
+        cases.append(case(f'get_revenue_breakdown[{dimension}]',
+                          lambda s, d=dimension: s.get_revenue_breakdown(d, 10)))
+    return cases
+
+
+def uncovered_methods(cases: Sequence[Case]) -> List[str]:
+    """Method public của DataAnalysisService chưa có case nào đo"""
+    from app.services.data_analysis import DataAnalysisService
+
+    covered = {case.name.split('[')[0] for case in cases if case.group == 'services'}
+    public = [
+        name for name, _ in inspect.getmembers(DataAnalysisService)
+        if not name.startswith('_') and name not in SKIPPED_METHODS
+    ]
+    return sorted(set(public) - covered)
+
+
+def chart_cases(app) -> List[Case]:
+    """Mỗi hàm tạo biểu đồ ở cả hai chế độ render; chart cache được xoá trước mỗi lần đo"""
+    from app.services.chart_cache import chart_cache
+    from app.services.data_analysis import DataAnalysisService
+    from app.services.visualizer import VisualizerService
+
+    with app.app_context():
+        service = DataAnalysisService.from_config(app.config)
+        products = service.load_data()
+        labels, quantities, _ = service.get_product_data()
+        top = service.get_top_products_by_revenue(10)
+        series = service.get_revenue_over_time('day')
+
+    inputs = {
+        'create_bar_chart': lambda as_spec: VisualizerService.create_bar_chart(
+            labels=top['product_name'].astype(str).tolist(), values=top['subtotal'].tolist(), as_spec=as_spec),
+        # Biểu đồ tròn của /charts: mọi sản phẩm
+        'create_pie_chart': lambda as_spec: VisualizerService.create_pie_chart(
+            labels=labels, values=quantities, height=700, as_spec=as_spec),
+        'create_multi_chart': lambda as_spec: VisualizerService.create_multi_chart(products, as_spec=as_spec),
+        'create_line_chart': lambda as_spec: VisualizerService.create_line_chart(
+            x=series['order_date'].tolist(), y=series['total'].tolist(), as_spec=as_spec),
+    }
+
+    cases = []
+    for name, build in inputs.items():
+        for mode, as_spec in (('spec', True), ('html', False)):
+            cases.append(Case('charts', f'{name}[{mode}]', lambda b=build, a=as_spec: b(a), setup=chart_cache.clear))
+    return cases
+
+
+def route_cases(app) -> List[Case]:
+    """Request đầy đủ qua Flask test client (gồm render template và ETag)"""
+    client = app.test_client()
+    urls = [
+        '/',
+        '/dashboard',
+        '/api/kpis',
+        '/api/revenue-over-time',
+        '/api/revenue-over-time?granularity=month',
+        '/api/orders-per-day',
+        '/api/top-products',
+        '/api/revenue-by/category',
+        '/api/revenue-by/supplier',
+        '/api/revenue-by/customer',
+        '/api/kpis?days=30&status=completed',
+        '/charts',
+        '/products',
+        '/products?sort=-revenue&q=a',
+    ]
+
+    def get(url: str, headers: Optional[Dict[str, str]] = None) -> None:
+        response = client.get(url, headers=headers)
+        if response.status_code not in (200, 304):
+            raise RuntimeError(f'GET {url} -> {response.status_code}')
+        response.close()
+
+    cases = [Case('routes', url, lambda u=url: get(u)) for url in urls]
+
+    # Revalidate bằng If-None-Match: chỉ tính ETag, không chạy view
+    etag = client.get('/api/kpis').headers.get('ETag')
+    if etag:
+        cases.append(Case('routes', '/api/kpis[304]', lambda: get('/api/kpis', {'If-None-Match': etag})))
+    return cases
+
+
+CASE_BUILDERS: Dict[str, Callable[[Any], List[Case]]] = {
+    'services': service_cases,
+    'charts': chart_cases,
+    'routes': route_cases,
+}
+
+
+def run_benchmarks(
+    data_dir: str,
+    groups: Sequence[str] = GROUPS,
+    repeat: int = 5,
+    warmup: int = 1,
+    cold: bool = False,
+    name_filter: Optional[str] = None,
+    overrides: Optional[Dict[str, Any]] = None,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Chạy benchmark trên một bộ dữ liệu
+
+    Args:
+        data_dir: Thư mục chứa các file CSV (xem synthetic.generate)
+        groups: Nhóm cần đo (services, charts, routes)
+        repeat: Số lần đo mỗi case
+        warmup: Số lần chạy trước khi đo
+        cold: Xoá mọi cache trước mỗi lần đo (đo load nguội thay vì cache ấm)
+        name_filter: Chỉ đo case có key chứa chuỗi này
+        overrides: Config ghi đè cho app
+        progress: Callback (key, kết quả) sau mỗi case
+
+    Returns:
+        Dictionary {'meta': ..., 'results': {key: thống kê}}
+
+    Raises:
+        ValueError: Nhóm không hợp lệ
+        FileNotFoundError: Thiếu file dữ liệu
+    """
+    from app.services.data_analysis import DATA_PATH_CONFIG
+
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        raise ValueError(f"Nhóm không hợp lệ: {', '.join(sorted(unknown))}")
+    for _, default in DATA_PATH_CONFIG.values():
+        if not os.path.exists(os.path.join(data_dir, default)):
+            raise FileNotFoundError(f"Data file not found: {os.path.join(data_dir, default)}")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix='benchmark-') as work_dir:
+        app = create_benchmark_app(data_dir, work_dir, **(overrides or {}))
+        started = time.perf_counter()
+        cases: List[Case] = []
+        for group in groups:
+            cases.extend(CASE_BUILDERS[group](app))
+        uncovered = uncovered_methods(cases) if 'services' in groups else []
+
+        for case in cases:
+            if name_filter and name_filter not in case.key:
+                continue
+            if cold:
+                case = Case(case.group, case.name, case.run, _chain(reset_caches, case.setup))
+            results[case.key] = measure(case, repeat, warmup)
+            if progress is not None:
+                progress(case.key, results[case.key])
+
+    return {
+        'meta': _meta(data_dir, groups, repeat, warmup, cold, overrides, uncovered,
+                      time.perf_counter() - started),
+        'results': results,
+    }
+
+
+def _chain(*steps: Optional[Callable[[], None]]) -> Callable[[], None]:
+    def run() -> None:
+        for step in steps:
+            if step is not None:
+                step()
+    return run
+
+
+def _meta(data_dir: str, groups: Sequence[str], repeat: int, warmup: int, cold: bool,
+          overrides: Optional[Dict[str, Any]], uncovered: List[str], duration: float) -> Dict[str, Any]:
+    import flask
+    import pandas as pd
+    import plotly
+
+    from app.services.data_analysis import DATA_PATH_CONFIG
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'data_dir': os.path.abspath(data_dir),
+        'data_bytes': {
+            table: os.path.getsize(os.path.join(data_dir, default))
+            for table, (_, default) in DATA_PATH_CONFIG.items()
+        },
+        'groups': list(groups),
+        'repeat': repeat,
+        'warmup': warmup,
+        'cold': cold,
+        'overrides': {key: repr(value) for key, value in (overrides or {}).items()},
+        'uncovered_methods': uncovered,
+        'duration': duration,
+        'peak_rss': peak_rss_bytes(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'versions': {'pandas': pd.__version__, 'numpy': np.__version__,
+                     'flask': flask.__version__, 'plotly': plotly.__version__},
+    }
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    metric: str = DEFAULT_METRIC,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS
+) -> List[Dict[str, Any]]:
+    """
+    So sánh hai lần chạy theo từng case
+
+    Args:
+        baseline: JSON của lần chạy gốc
+        current: JSON của lần chạy mới
+        metric: Chỉ số thời gian (mean, p50, p90, p95, p99, ...)
+        threshold: Tỉ lệ chậm hơn tối đa cho phép (0.1 = 10%)
+        min_delta_ms: Bỏ qua chênh lệch nhỏ hơn mức này (nhiễu)
+
+    Returns:
+        Danh sách {key, base, current, ratio, status} với status là
+        'regression', 'improvement', 'ok', 'new' hoặc 'missing'
+    """
+    base_results, new_results = baseline['results'], current['results']
+    rows = []
+    for key in sorted(set(base_results) | set(new_results)):
+        base = base_results.get(key, {}).get(metric)
+        new = new_results.get(key, {}).get(metric)
+        row = {'key': key, 'base': base, 'current': new, 'ratio': None}
+        if base is None:
+            row['status'] = 'new'
+        elif new is None:
+            row['status'] = 'missing'
+        else:
+            row['ratio'] = new / base if base else None
+            if new - base > min_delta_ms and new > base * (1 + threshold):
+                row['status'] = 'regression'
+            elif base - new > min_delta_ms and new < base / (1 + threshold):
+                row['status'] = 'improvement'
+            else:
+                row['status'] = 'ok'
+        rows.append(row)
+    return rows
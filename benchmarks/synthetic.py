@@ -0,0 +1,229 @@
+"""
+Synthetic Dataset - Sinh bộ CSV giả lập cùng schema với dữ liệu thật
+products / orders / order_details (cùng categories, suppliers, users) được ghi
+theo từng chunk nên có thể sinh tới hàng chục triệu dòng với bộ nhớ cố định.
+"""
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Số dòng order_details mỗi chunk khi ghi
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+# Số dòng chi tiết trung bình mỗi đơn (số dòng mỗi đơn: 1..5)
+LINES_PER_ORDER = 3
+
+START_DATE = pd.Timestamp('2020-01-01')
+DAYS = 6 * 365
+
+STATUSES = np.array(['completed', 'shipped', 'pending'])
+STATUS_WEIGHTS = [0.6, 0.25, 0.15]
+
+CATEGORY_NAMES = [
+    'Dairy', 'Snack', 'Noodles', 'Beverage', 'Personal Care', 'Household',
+    'Frozen', 'Bakery', 'Spices', 'Baby', 'Health', 'Food',
+]
+_NAME_WORDS = np.array([
+    'Sữa', 'Bánh', 'Mì', 'Nước', 'Trà', 'Cà phê', 'Kẹo', 'Dầu gội',
+    'Kem', 'Gạo', 'Nước mắm', 'Đậu', 'Hạt điều', 'Mật ong', 'Xà phòng',
+])
+_TAGS = np.array(['đồ uống', 'ăn vặt', 'gia đình', 'khuyến mãi', 'nhập khẩu', 'hữu cơ', 'canxi', 'tiện lợi'])
+_FIRST_NAMES = np.array(['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Phan', 'Vũ', 'Đặng'])
+_LAST_NAMES = np.array(['An', 'Bình', 'Chi', 'Dũng', 'Hà', 'Hương', 'Lan', 'Minh', 'Nam', 'Tú'])
+
+
+@dataclass
+class DatasetSpec:
+    """Kích thước bộ dữ liệu"""
+    detail_rows: int
+    orders: int
+    products: int
+    users: int
+    suppliers: int = 25
+    categories: int = len(CATEGORY_NAMES)
+
+    @classmethod
+    def for_rows(cls, rows: int, products: Optional[int] = None, users: Optional[int] = None) -> 'DatasetSpec':
+        """
+        Kích thước hợp lý theo số dòng order_details
+
+        Args:
+            rows: Số dòng order_details (10_000 .. 50_000_000)
+            products: Số sản phẩm (mặc định rows / 100, trong khoảng 50 .. 200_000)
+            users: Số khách hàng (mặc định số đơn / 20, trong khoảng 100 .. 2_000_000)
+
+        Returns:
+            DatasetSpec
+        """
+        orders = max(1, rows // LINES_PER_ORDER)
+        return cls(
+            detail_rows=rows,
+            orders=orders,
+            products=products or int(np.clip(rows // 100, 50, 200_000)),
+            users=users or int(np.clip(orders // 20, 100, 2_000_000)),
+        )
+
+
+def _ids(prefix: str, start: int, stop: int, width: int) -> pd.Series:
+    return prefix + pd.Series(np.arange(start, stop)).astype(str).str.zfill(width)
+
+
+def _write(df: pd.DataFrame, path: str, first: bool) -> None:
+    df.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+
+
+def generate_dimensions(spec: DatasetSpec, out_dir: str, rng: np.random.Generator) -> None:
+    """Ghi categories.csv, suppliers.csv và users.csv"""
+    pd.DataFrame({
+        'category_id': _ids('C', 1, spec.categories + 1, 3),
+        'category_name': CATEGORY_NAMES[:spec.categories],
+        'description': [f'{name} products' for name in CATEGORY_NAMES[:spec.categories]],
+    }).to_csv(os.path.join(out_dir, 'categories.csv'), index=False)
+
+    supplier_ids = _ids('S', 1, spec.suppliers + 1, 3)
+    pd.DataFrame({
+        'supplier_id': supplier_ids,
+        'supplier_name': 'Supplier ' + supplier_ids.str[1:],
+        'contact': 'Sales Dept',
+        'email': 'sales@' + supplier_ids.str.lower() + '.example.com',
+        'country': rng.choice(['Vietnam', 'Global'], spec.suppliers, p=[0.8, 0.2]),
+    }).to_csv(os.path.join(out_dir, 'suppliers.csv'), index=False)
+
+    user_ids = _ids('U', 1, spec.users + 1, 7)
+    pd.DataFrame({
+        'user_id': user_ids,
+        'full_name': (pd.Series(rng.choice(_FIRST_NAMES, spec.users)) + ' '
+                      + pd.Series(rng.choice(_LAST_NAMES, spec.users))),
+        'email': user_ids.str.lower() + '@example.com',
+        'phone': '09' + pd.Series(rng.integers(0, 10**8, spec.users)).astype(str).str.zfill(8),
+        'address': 'Hà Nội, Việt Nam',
+        'created_at': (START_DATE + pd.to_timedelta(rng.integers(0, DAYS, spec.users), 'D')).strftime('%Y-%m-%d'),
+    }).to_csv(os.path.join(out_dir, 'users.csv'), index=False)
+
+
+def generate_products(spec: DatasetSpec, out_dir: str, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Ghi products.csv
+
+    Returns:
+        DataFrame products (dùng để sinh order_details)
+    """
+    n = spec.products
+    product_ids = _ids('P', 1, n + 1, 6)
+    names = pd.Series(rng.choice(_NAME_WORDS, n)) + ' ' + product_ids.str[1:]
+    tags = pd.Series(rng.choice(_TAGS, n)) + ',' + pd.Series(rng.choice(_TAGS, n))
+    products = pd.DataFrame({
+        'product_id': product_ids,
+        'name': names,
+        'sku': _ids('SKU', 1, n + 1, 7),
+        'category_id': _ids('C', 1, spec.categories + 1, 3).to_numpy()[rng.integers(0, spec.categories, n)],
+        'price': rng.integers(5, 500, n) * 1000,
+        'quantity': rng.integers(0, 1000, n),
+        'description': names + ' - hàng chính hãng',
+        'weight_g': rng.integers(50, 5000, n),
+        'supplier_id': _ids('S', 1, spec.suppliers + 1, 3).to_numpy()[rng.integers(0, spec.suppliers, n)],
+        'created_at': (START_DATE + pd.to_timedelta(rng.integers(0, DAYS, n), 'D')).strftime('%Y-%m-%d'),
+        'rating': np.round(rng.uniform(1.0, 5.0, n), 1),
+        'tags': tags,
+    })
+    products.to_csv(os.path.join(out_dir, 'products.csv'), index=False)
+    return products
+
+
+def generate_orders(
+    spec: DatasetSpec,
+    out_dir: str,
+    products: pd.DataFrame,
+    rng: np.random.Generator,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> None:
+    """
+    Ghi orders.csv và order_details.csv theo chunk
+
+    Đơn được sinh theo thứ tự thời gian (như dữ liệu chỉ nối thêm); total của
+    mỗi đơn bằng tổng subtotal các dòng chi tiết của nó. Sản phẩm phổ biến
+    được chọn nhiều hơn (phân phối lệch).
+    """
+    orders_path = os.path.join(out_dir, 'orders.csv')
+    details_path = os.path.join(out_dir, 'order_details.csv')
+    prices = products['price'].to_numpy()
+    product_ids = products['product_id'].to_numpy()
+    skus = products['sku'].to_numpy()
+    names = products['name'].to_numpy()
+    user_ids = _ids('U', 1, spec.users + 1, 7).to_numpy()
+
+    orders_per_chunk = max(1, chunk_rows // LINES_PER_ORDER)
+    next_detail_id = 1
+    for start in range(0, spec.orders, orders_per_chunk):
+        stop = min(start + orders_per_chunk, spec.orders)
+        n = stop - start
+
+        lines = rng.integers(1, 2 * LINES_PER_ORDER, n)
+        order_index = np.repeat(np.arange(n), lines)
+        m = len(order_index)
+        product = (spec.products * rng.random(m) ** 2).astype(np.int64)
+        quantity = rng.integers(1, 6, m)
+        subtotal = prices[product] * quantity
+
+        order_ids = _ids('ORD', start + 1, stop + 1, 9)
+        days = (np.arange(start, stop) * DAYS) // spec.orders
+        _write(pd.DataFrame({
+            'order_id': order_ids,
+            'user_id': user_ids[rng.integers(0, spec.users, n)],
+            'order_date': (START_DATE + pd.to_timedelta(days, 'D')).strftime('%Y-%m-%d'),
+            'total': np.bincount(order_index, weights=subtotal, minlength=n).astype(np.int64),
+            'status': rng.choice(STATUSES, n, p=STATUS_WEIGHTS),
+        }), orders_path, first=start == 0)
+
+        _write(pd.DataFrame({
+            'detail_id': np.arange(next_detail_id, next_detail_id + m),
+            'order_id': order_ids.to_numpy()[order_index],
+            'product_id': product_ids[product],
+            'sku': skus[product],
+            'product_name': names[product],
+            'unit_price': prices[product],
+            'quantity': quantity,
+            'subtotal': subtotal,
+        }), details_path, first=start == 0)
+        next_detail_id += m
+
+
+def generate(
+    out_dir: str,
+    rows: int,
+    products: Optional[int] = None,
+    users: Optional[int] = None,
+    seed: int = 42,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> Dict[str, object]:
+    """
+    Sinh toàn bộ bộ dữ liệu vào một thư mục
+
+    Args:
+        out_dir: Thư mục đích (tạo nếu chưa có)
+        rows: Số dòng order_details xấp xỉ
+        products: Số sản phẩm (mặc định theo rows)
+        users: Số khách hàng (mặc định theo số đơn)
+        seed: Seed của bộ sinh số ngẫu nhiên (cùng seed -> cùng dữ liệu)
+        chunk_rows: Số dòng order_details mỗi chunk khi ghi
+
+    Returns:
+        Dictionary kích thước thực tế và đường dẫn các file
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    spec = DatasetSpec.for_rows(rows, products, users)
+    rng = np.random.default_rng(seed)
+
+    generate_dimensions(spec, out_dir, rng)
+    product_frame = generate_products(spec, out_dir, rng)
+    generate_orders(spec, out_dir, product_frame, rng, chunk_rows)
+
+    paths = {
+        table: os.path.join(out_dir, f'{table}.csv')
+        for table in ('products', 'orders', 'order_details', 'categories', 'suppliers', 'users')
+    }
+    return {'spec': asdict(spec), 'seed': seed, 'paths': paths,
+            'bytes': {table: os.path.getsize(path) for table, path in paths.items()}}
@@ -13,26 +13,149 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///ecommerce.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # db.create_all() mỗi lần create_app - production tạo schema bằng `flask init-db` / `flask db upgrade`
+    AUTO_CREATE_TABLES = os.environ.get('AUTO_CREATE_TABLES', '').lower() in ('1', 'true', 'yes')
+    
     # Data file paths
     CSV_DATA_PATH = 'products.csv'
+    ORDERS_CSV_PATH = 'orders.csv'
+    ORDER_DETAILS_CSV_PATH = 'order_details.csv'
+    CATEGORIES_CSV_PATH = 'categories.csv'
+    SUPPLIERS_CSV_PATH = 'suppliers.csv'
+    USERS_CSV_PATH = 'users.csv'
+    
+    # Nguồn dữ liệu cho analytics: 'csv' (pandas) hoặc 'sql' (group/top-N trong database)
+    ANALYTICS_BACKEND = os.environ.get('ANALYTICS_BACKEND', 'csv')
+    
+    # Số dòng mỗi lần INSERT khi chạy `flask import-csv`
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 5000))
+    
+    # Columnar snapshots (Arrow IPC) - None: <instance>/snapshots
+    SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR')
+    SNAPSHOT_AUTO_CONVERT = True
+    
+    # Dataset store dùng chung giữa các worker: mỗi bảng parse một lần vào file Arrow
+    # (memory-map, manifest có phiên bản) - None: <instance>/dataset_store
+    DATASET_STORE_ENABLED = os.environ.get('DATASET_STORE_ENABLED', '').lower() in ('1', 'true', 'yes')
+    DATASET_STORE_DIR = os.environ.get('DATASET_STORE_DIR')
+    
+    # Số dòng mỗi chunk khi đọc CSV theo từng phần (lọc / streaming)
+    CSV_CHUNK_ROWS = 100_000
+    
+    # Chart fragment cache: số biểu đồ tối đa (0 = tắt) và TTL (giây)
+    CHART_CACHE_MAX_ENTRIES = int(os.environ.get('CHART_CACHE_MAX_ENTRIES', 256))
+    CHART_CACHE_TTL = float(os.environ.get('CHART_CACHE_TTL', 300))
+    
+    # Render biểu đồ: 'spec' (JSON gọn + plotly.js tải một lần) hoặc 'html' (fig.to_html)
+    CHART_RENDER_MODE = os.environ.get('CHART_RENDER_MODE', 'spec')
+    
+    # Giới hạn số điểm gửi xuống trình duyệt: chuỗi thời gian rút gọn bằng LTTB,
+    # biểu đồ theo nhóm (tròn / cột) giữ top-N và gộp phần còn lại vào "Khác" (0 = không giới hạn)
+    CHART_MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', 1000))
+    CHART_MAX_CATEGORIES = int(os.environ.get('CHART_MAX_CATEGORIES', 20))
+    
+    # Thời gian cache (giây) của các endpoint JSON /api/* ở trình duyệt / proxy
+    API_CACHE_MAX_AGE = int(os.environ.get('API_CACHE_MAX_AGE', 60))
+    
+    # Gộp vào mọi ETag - đổi giá trị để vô hiệu hoá cache của client sau khi deploy
+    ETAG_SALT = os.environ.get('ETAG_SALT', '')
+    
+    # Thời gian cache của trình duyệt cho plotly.js phục vụ local (URL có version)
+    STATIC_ASSET_MAX_AGE = int(os.environ.get('STATIC_ASSET_MAX_AGE', 365 * 24 * 3600))
+    
+    # Streaming: tính chỉ số orders/order_details theo chunk, giới hạn bộ nhớ mỗi chunk
+    STREAMING_MODE = os.environ.get('STREAMING_MODE', '').lower() in ('1', 'true', 'yes')
+    STREAMING_MAX_BYTES = int(os.environ.get('STREAMING_MAX_BYTES', 64 * 1024 * 1024))
+    
+    # Orders / order_details chỉ được nối thêm: parse phần mới và gộp vào các chỉ số đã có
+    # (frame ghép từ các phần là bản copy riêng của process - không dùng chung file của dataset store)
+    INCREMENTAL_INGEST = os.environ.get('INCREMENTAL_INGEST', '').lower() in ('1', 'true', 'yes')
+    
+    # Số thread load các bảng song song (1 = tuần tự; mặc định theo số CPU, tối đa 4)
+    LOAD_WORKERS = int(os.environ.get('LOAD_WORKERS', min(4, os.cpu_count() or 1)))
+    
+    # Precompute worker: tính sẵn payload dashboard ở background khi dữ liệu đổi
+    PRECOMPUTE_ENABLED = os.environ.get('PRECOMPUTE_ENABLED', '').lower() in ('1', 'true', 'yes')
+    PRECOMPUTE_INTERVAL = float(os.environ.get('PRECOMPUTE_INTERVAL', 2))   # giây giữa hai lần kiểm tra file
+    PRECOMPUTE_WORKERS = int(os.environ.get('PRECOMPUTE_WORKERS', 4))
+    PRECOMPUTE_WAIT = float(os.environ.get('PRECOMPUTE_WAIT', 10))         # request chờ bộ mới tối đa (giây)
+    
+    # Cập nhật trực tiếp dashboard qua Server-Sent Events (GET /dashboard/live) - mỗi kết nối
+    # giữ một thread tới LIVE_MAX_SECONDS nên với gunicorn cần worker nhiều thread (GUNICORN_THREADS > 1)
+    LIVE_UPDATES_ENABLED = os.environ.get('LIVE_UPDATES_ENABLED', '').lower() in ('1', 'true', 'yes')
+    LIVE_INTERVAL = float(os.environ.get('LIVE_INTERVAL', 2))              # giây giữa hai lần kiểm tra file
+    LIVE_KEEPALIVE = float(os.environ.get('LIVE_KEEPALIVE', 15))           # giây giữa hai comment giữ kết nối
+    LIVE_MAX_SECONDS = float(os.environ.get('LIVE_MAX_SECONDS', 300))      # đóng kết nối, trình duyệt tự kết nối lại
+    LIVE_MAX_SUBSCRIBERS = int(os.environ.get('LIVE_MAX_SUBSCRIBERS', 50))  # số kết nối tối đa mỗi process
+    
+    # Đo thời gian từng giai đoạn (load, phân tích, biểu đồ, template) của mỗi request
+    TIMING_ENABLED = os.environ.get('TIMING_ENABLED', '1').lower() in ('1', 'true', 'yes')
+    SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', '1').lower() in ('1', 'true', 'yes')
+    TIMING_WINDOW = int(os.environ.get('TIMING_WINDOW', 1024))    # số lần đo gần nhất để tính percentile
+    # GET /metrics lộ pid, RSS và thống kê cache: mặc định tắt; METRICS_TOKEN bắt buộc header
+    # `Authorization: Bearer <token>` (đặt khi endpoint truy cập được từ ngoài)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    
+    # Profiler theo yêu cầu (?_profile=<token>, /profile/sample) - token tạo bằng `flask profile-token`
+    # Mặc định tắt; chỉ bật được khi SECRET_KEY đã được đặt (không phải giá trị mặc định)
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '').lower() in ('1', 'true', 'yes')
+    PROFILER_INTERVAL = float(os.environ.get('PROFILER_INTERVAL', 0.005))       # giây giữa hai mẫu stack
+    PROFILER_MAX_SECONDS = float(os.environ.get('PROFILER_MAX_SECONDS', 60))    # giới hạn của /profile/sample
+    
+    # Khởi động: tổng thời gian import + create_app cho phép (ms) - kiểm tra bằng `flask startup-report`
+    STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1500))
+    
+    # Pre-fork (gunicorn preload_app): nạp sẵn dataset vào cache của master để các worker dùng chung
+    PRELOAD_DATA = os.environ.get('PRELOAD_DATA', '').lower() in ('1', 'true', 'yes')
+
+    # Xuất ảnh PNG / SVG của biểu đồ (kaleido): số process render dùng chung và cache trên đĩa
+    # theo dấu vân tay dữ liệu - None: <instance>/chart_exports
+    EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 2))
+    EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR')
+    EXPORT_CACHE_MAX_BYTES = int(os.environ.get('EXPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    EXPORT_WAIT = float(os.environ.get('EXPORT_WAIT', 5))     # request chờ ảnh tối đa rồi trả 202 (giây)
+    EXPORT_WIDTH = int(os.environ.get('EXPORT_WIDTH', 1000))  # kích thước mặc định (px)
+    EXPORT_HEIGHT = int(os.environ.get('EXPORT_HEIGHT', 500))
+
+    # Trạng thái đơn hàng hiển thị trong bộ lọc dashboard
+    ORDER_STATUSES = ('pending', 'shipped', 'completed')
+    
+    # Rollup theo ngày: các chiều phụ được giữ lại (status, user_id)
+    ROLLUP_DIMENSIONS = ('status',)
+    
+    # Dataset cache (bytes) - giới hạn bộ nhớ cho các DataFrame đã parse
+    DATASET_CACHE_MAX_BYTES = int(os.environ.get('DATASET_CACHE_MAX_BYTES', 256 * 1024 * 1024))
 
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     TESTING = False
+    AUTO_CREATE_TABLES = True
 
 
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     TESTING = False
+    
+    # Connection pool cho database server (PostgreSQL/MySQL)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        # Tái tạo kết nối trước khi server đóng kết nối idle
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
 
 
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test.db'
+    AUTO_CREATE_TABLES = True
 
 
 config: dict[str, Type[Config]] = {
@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration (production)
+Chạy bằng: gunicorn -c gunicorn.conf.py
+App được tạo và nạp sẵn một lần trong master rồi mới fork worker: worker khởi
+động gần như tức thì và dùng chung trang bộ nhớ của pandas / Plotly (copy-on-write).
+"""
+import os
+
+wsgi_app = 'run:app'
+# run.py mặc định FLASK_ENV=development (DEBUG, AUTO_CREATE_TABLES): worker luôn chạy
+# ProductionConfig trừ khi FLASK_ENV được đặt rõ ràng. Gunicorn đặt biến này trước khi preload app.
+raw_env = [f"FLASK_ENV={os.environ.get('FLASK_ENV') or 'production'}"]
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+# Import app (và các thư viện nặng) trong master trước khi fork.
+# Lưu ý: HUP không nạp lại code khi preload - deploy bằng cách khởi động lại master.
+preload_app = True
+
+
+def when_ready(server):
+    """Master đã load app, chưa fork worker: nạp sẵn biểu đồ / dataset (xem app.services.startup)"""
+    from app.services.startup import preload
+
+    steps = preload(server.app.wsgi())
+    server.log.info('Preload: ' + ', '.join(f'{step} {seconds * 1000:.0f} ms' for step, seconds in steps.items()))